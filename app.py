@@ -1,28 +1,157 @@
+import click
 from flask import Flask
 from database.custom_models import db
 from database.schemas import ma
 from database.controllers import bp  # seu blueprint
+from database.market_stream import market_stream
+from database.migrations import upgrade_schema
+from database.order_queue import order_queue, ORDER_ASYNC_ENABLED
+from database.positions import rebuild_positions
+from database.pool import engine_options
+from database.order_book import order_books
+from database.klines import ingest_klines
+from database import instrumentation, profiling
+from database.replica import replica_router, replica_binds
+from database.reconciliation import reconciler, RECONCILE_ENABLED
+from database.credentials import encrypt_stored_credentials
+from database.encryption import get_fernet
+from database.archive import archive_old_data, ARCHIVE_HORIZON_DAYS
 import os
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = Flask(__name__)
 
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("DATABASE_URI")
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+def init_database(app):
+    """Cria tabelas se não existirem e aplica colunas/índices novos em bancos antigos"""
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
 
-# Init DB e Marshmallow
-db.init_app(app)
-ma.init_app(app)
 
-# Registra as rotas
-app.register_blueprint(bp, url_prefix="/api")
+def start_services(app):
+    """Inicia as threads de fundo (devem rodar em cada worker, após o fork)"""
+    # Inicia o feed WebSocket de mercado se habilitado
+    if os.getenv("MARKET_STREAM_ENABLED", "false").lower() == "true":
+        # Diffs de profundidade mantêm os livros de ofertas locais
+        market_stream.on_depth = order_books.handle_diff
+        order_books.streaming.update(market_stream.depth_symbols)
+        market_stream.start()
 
-# Cria tabelas se não existirem
-with app.app_context():
-    db.create_all()
+    # Inicia os workers da fila de ordens no modo assíncrono
+    if ORDER_ASYNC_ENABLED:
+        order_queue.init_app(app)
+
+    # Inicia a reconciliação periódica de ordens/execuções com a Binance
+    if RECONCILE_ENABLED:
+        reconciler.init_app(app)
+
+
+def create_app(init_db=None, services=True):
+    """
+    Fábrica da aplicação
+
+    - init_db: cria/atualiza o esquema na inicialização. Por padrão segue
+      DB_AUTO_CREATE (true). No gunicorn o esquema é criado uma única vez
+      pelo processo mestre (ver gunicorn.conf.py) e os workers usam False.
+    - services: inicia as threads de fundo (feed de mercado, fila de ordens)
+    """
+    app = Flask(__name__)
+
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("DATABASE_URI")
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
+    # Pool de conexões (DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_POOL_TIMEOUT)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+
+    # Réplica de leitura opcional (DATABASE_REPLICA_URI) para os SELECTs das rotas GET
+    app.config['SQLALCHEMY_BINDS'] = replica_binds()
+
+    # Init DB e Marshmallow
+    db.init_app(app)
+    ma.init_app(app)
+
+    # Registra as rotas
+    app.register_blueprint(bp, url_prefix="/api")
+
+    # Latência por rota, status e consultas SQL por requisição (exposto em /api/metrics)
+    instrumentation.init_app(app)
+
+    # Profiling opcional de requisições amostradas ou lentas (PROFILING_ENABLED)
+    profiling.init_app(app)
+
+    # Roteamento das leituras para a réplica, com read-your-writes e medição do atraso
+    replica_router.init_app(app)
+
+    # Cria tabelas se não existirem e aplica colunas novas em bancos antigos
+    if init_db is None:
+        init_db = os.getenv("DB_AUTO_CREATE", "true").lower() == "true"
+    if init_db:
+        init_database(app)
+
+    # Comando para criar/atualizar o esquema manualmente
+    @app.cli.command("init-db")
+    def init_db_command():
+        """Cria as tabelas e aplica colunas/índices pendentes"""
+        init_database(app)
+        print("Esquema do banco atualizado")
+
+    # Comando para recalcular as posições a partir do histórico de ordens
+    @app.cli.command("rebuild-positions")
+    def rebuild_positions_command():
+        """Recalcula a tabela positions a partir de todas as ordens"""
+        total = rebuild_positions()
+        print(f"{total} posições recalculadas")
+
+    # Comando para ingerir candles (backfill na primeira vez, incremental depois)
+    @app.cli.command("ingest-klines")
+    @click.argument("symbols")
+    @click.option("--interval", "intervals", default="1h", help="Intervalos separados por vírgula (ex: 1m,1h)")
+    @click.option("--start", default=0, type=int, help="open_time inicial (epoch ms) do backfill")
+    def ingest_klines_command(symbols, intervals, start):
+        """Busca e grava candles OHLCV para SYMBOLS (separados por vírgula)"""
+        for symbol in symbols.split(","):
+            for interval in intervals.split(","):
+                total = ingest_klines(symbol.strip(), interval.strip(), start)
+                print(f"{symbol.strip().upper()} {interval.strip()}: {total} candles gravados")
+
+    # Comando para cifrar as chaves da Binance gravadas em texto puro
+    @app.cli.command("encrypt-credentials")
+    def encrypt_credentials_command():
+        """Regrava as chaves de todos os usuários cifradas com CREDENTIALS_ENCRYPTION_KEY"""
+        if get_fernet() is None:
+            raise click.ClickException("Defina CREDENTIALS_ENCRYPTION_KEY antes de cifrar as chaves")
+        total = encrypt_stored_credentials()
+        print(f"{total} usuários com chaves cifradas")
+
+    # Comando para reconciliar ordens e execuções com a Binance (uma vez ou em loop)
+    @app.cli.command("reconcile")
+    @click.option("--loop", is_flag=True, help="Repete a cada RECONCILE_INTERVAL segundos")
+    def reconcile_command(loop):
+        """Atualiza status das ordens e importa as execuções como relatórios"""
+        while True:
+            updated, imported = reconciler.sweep()
+            print(f"{updated} ordens atualizadas, {imported} execuções importadas")
+            if not loop:
+                break
+            time.sleep(reconciler.interval)
+
+    # Comando para mover ordens e relatórios antigos para as tabelas de arquivo (incremental)
+    @app.cli.command("archive-data")
+    @click.option("--days", default=ARCHIVE_HORIZON_DAYS, type=int, help="Horizonte em dias (padrão ARCHIVE_HORIZON_DAYS)")
+    def archive_data_command(days):
+        """Arquiva as ordens finalizadas (e seus relatórios) anteriores ao horizonte"""
+        orders, reports = archive_old_data(days)
+        print(f"{orders} ordens e {reports} relatórios arquivados")
+
+    if services:
+        start_services(app)
+
+    return app
+
+
+# Servidor de desenvolvimento (em produção use: gunicorn -c gunicorn.conf.py)
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
-    app.run(host="0.0.0.0", port=port)
+    create_app().run(host="0.0.0.0", port=port)
@@ -0,0 +1,62 @@
+# ================================
+# BENCHMARK: ENVIO DE ORDENS EM LOTE
+# ================================
+# Vazão (ordens/s) de N ordens enviadas uma a uma em POST /users/1/orders
+# e de uma única chamada POST /users/1/orders/batch com as N ordens
+# (despacho paralelo à Binance local e um commit por lote).
+#
+# Uso: python bench/batch_orders.py [--orders 50] [--latency 0.02] [--rounds 3]
+
+import argparse
+import time
+
+from common import ORDER, create_bench_app, print_table, setup_env
+from stub_binance import StubBinance
+
+
+def sequential(client, orders):
+    for _ in range(orders):
+        response = client.post("/api/users/1/orders", json=ORDER)
+        assert response.status_code == 201, response.get_data(as_text=True)
+
+
+def batch(client, orders):
+    response = client.post("/api/users/1/orders/batch", json=[ORDER] * orders)
+    assert response.status_code == 201, response.get_data(as_text=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="latência por requisição do stub (s)")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    setup_env()
+    app = create_bench_app()
+
+    with StubBinance(args.latency) as stub:
+        stub.patch_client()
+        client = app.test_client()
+        client.post("/api/users/1/orders", json=ORDER)  # aquece o cliente Binance
+
+        results = []
+        for mode, send in (("sequential", sequential), ("batch", batch)):
+            elapsed = []
+            for _ in range(args.rounds):
+                start = time.perf_counter()
+                send(client, args.orders)
+                elapsed.append(time.perf_counter() - start)
+            best = min(elapsed)
+            results.append({
+                "mode": mode,
+                "orders": args.orders,
+                "best_s": round(best, 3),
+                "orders_per_s": round(args.orders / best, 1),
+            })
+
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
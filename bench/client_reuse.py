@@ -0,0 +1,60 @@
+# ================================
+# BENCHMARK: REUSO DO CLIENTE BINANCE POR USUÁRIO
+# ================================
+# Latência de POST /users/1/orders contra a Binance local, com o registro
+# de clientes (um Client por usuário) e criando um Client novo por ordem
+# (comportamento anterior: nova sessão HTTP, handshake e ping a cada ordem).
+#
+# Uso: python bench/client_reuse.py [--orders 200] [--latency 0.005] [--connect-latency 0.03]
+
+import argparse
+import time
+
+from common import ORDER, create_bench_app, print_table, setup_env, summary
+from stub_binance import StubBinance
+
+
+def run(client, orders):
+    samples = []
+    for _ in range(orders):
+        start = time.perf_counter()
+        response = client.post("/api/users/1/orders", json=ORDER)
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 201, response.get_data(as_text=True)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.005, help="latência por requisição do stub (s)")
+    parser.add_argument("--connect-latency", type=float, default=0.03, help="custo de conexão nova do stub (s)")
+    args = parser.parse_args()
+
+    setup_env()
+    app = create_bench_app()
+
+    from binance.client import Client
+    from database import controllers
+
+    with StubBinance(args.latency, args.connect_latency) as stub:
+        stub.patch_client()
+        client = app.test_client()
+        registry_get = controllers.client_registry.get
+
+        results = []
+        for mode in ("registry", "per_order"):
+            if mode == "per_order":
+                controllers.client_registry.get = lambda user_id, key, secret: Client(key, secret, testnet=True)
+            requests_before, connections_before = stub.requests, stub.connections
+            row = {"mode": mode, **summary(run(client, args.orders))}
+            row["stub_requests"] = stub.requests - requests_before
+            row["stub_connections"] = stub.connections - connections_before
+            results.append(row)
+        controllers.client_registry.get = registry_get
+
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
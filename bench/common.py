@@ -0,0 +1,68 @@
+# ================================
+# FUNÇÕES COMUNS DOS BENCHMARKS
+# ================================
+# Configura o ambiente antes de importar a aplicação (banco SQLite
+# temporário, sem pré-validação nem governador de peso da Binance), cria o
+# usuário de teste e resume as latências medidas.
+
+import os
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def setup_env(database_uri=None, **overrides):
+    """Define as variáveis usadas pela aplicação; deve ser chamada antes de importar app"""
+    if database_uri is None:
+        database_uri = f"sqlite:///{tempfile.mkdtemp(prefix='bench-')}/bench.db"
+    os.environ["DATABASE_URI"] = database_uri
+    os.environ.setdefault("ORDER_PREVALIDATION", "false")
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    for name, value in overrides.items():
+        os.environ[name] = str(value)
+    return database_uri
+
+
+def create_bench_app(users=1):
+    """Aplicação sem threads de fundo, com users usuários de teste (IDs 1..users)"""
+    from app import create_app
+    from database.custom_models import db, User
+
+    app = create_app(services=False)
+    with app.app_context():
+        for user_id in range(1, users + 1):
+            if db.session.get(User, user_id) is None:
+                db.session.add(User(
+                    id=user_id, login=f"bench{user_id}", password="bench",
+                    binance_api_key=f"key{user_id}", binance_secret_key=f"secret{user_id}", saldo_inicio=1000,
+                ))
+        db.session.commit()
+    return app
+
+
+ORDER = {"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": "0.001", "price": "45000.00"}
+
+
+def summary(samples):
+    """Média, p50 e p99 (em ms) de uma lista de durações em segundos"""
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p99_ms": round(p99 * 1000, 3),
+    }
+
+
+def print_table(rows):
+    """Imprime uma lista de dicts como tabela alinhada"""
+    columns = list(rows[0])
+    widths = [max(len(str(column)), *(len(str(row[column])) for row in rows)) for column in columns]
+    print("  ".join(str(column).ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row[column]).ljust(width) for column, width in zip(columns, widths)))
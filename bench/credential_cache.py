@@ -0,0 +1,52 @@
+# ================================
+# BENCHMARK: CACHE DE CREDENCIAIS CIFRADAS
+# ================================
+# Custo por ordem de obter as chaves da Binance do usuário, com as chaves
+# cifradas no banco (CREDENTIALS_ENCRYPTION_KEY):
+#
+# - cached: credential_cache.get com a entrada em memória
+# - uncached: entrada invalidada a cada chamada (SELECT + decifrar)
+#
+# Uso: python bench/credential_cache.py [--calls 5000]
+
+import argparse
+import time
+
+from cryptography.fernet import Fernet
+
+from common import create_bench_app, print_table, setup_env, summary
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=5000)
+    args = parser.parse_args()
+
+    setup_env(CREDENTIALS_ENCRYPTION_KEY=Fernet.generate_key().decode())
+    app = create_bench_app()
+
+    from database.credentials import credential_cache
+    from database.custom_models import db
+
+    results = []
+    with app.app_context():
+        # Confere que as chaves estão cifradas no banco
+        stored = db.session.execute(db.text("SELECT binanceApiKey FROM users WHERE id = 1")).scalar()
+        assert stored.startswith("gAAAA"), stored
+        assert credential_cache.get(1) == ("key1", "secret1")
+
+        for mode in ("cached", "uncached"):
+            samples = []
+            for _ in range(args.calls):
+                if mode == "uncached":
+                    credential_cache.invalidate(1)
+                start = time.perf_counter()
+                credential_cache.get(1)
+                samples.append(time.perf_counter() - start)
+            results.append({"mode": mode, **summary(samples)})
+
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# ================================
+# BENCHMARK: MEMÓRIA DA EXPORTAÇÃO EM STREAMING
+# ================================
+# Pico de RSS ao ler todas as ordens de um SQLite com --rows linhas:
+#
+# - export: GET /export/orders (NDJSON em streaming, cursor no servidor)
+# - legacy: o caminho anterior de /orders (Order.query.all() + orders_schema.jsonify)
+#
+# Cada modo roda em um subprocesso próprio para que o pico de um não
+# contamine o outro.
+#
+# Uso: python bench/export_rss.py [--rows 1000000] [--database /tmp/export.db]
+
+import argparse
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import create_bench_app, print_table, setup_env
+
+
+def peak_rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)  # ru_maxrss em KB (Linux)
+
+
+def seed(path, rows):
+    """Cria o esquema pela aplicação e insere as ordens direto pelo sqlite3"""
+    setup_env(f"sqlite:///{path}")
+    create_bench_app()
+    connection = sqlite3.connect(path)
+    if connection.execute("SELECT COUNT(*) FROM orders").fetchone()[0] >= rows:
+        return
+    connection.execute("DELETE FROM orders")
+    symbols = ("BTCUSDT", "ETHUSDT", "BNBUSDT", "SOLUSDT")
+    connection.executemany(
+        "INSERT INTO orders (id, user_id, symbol, side, types, quantity, price, timeInForce, created_at, status) "
+        "VALUES (?, 1, ?, ?, 'LIMIT', '0.00100000', ?, 'GTC', '2025-01-01 00:00:00', 'FILLED')",
+        ((i, symbols[i % 4], "BUY" if i % 2 else "SELL", f"{45000 + i % 1000}.00000000") for i in range(1, rows + 1)),
+    )
+    connection.commit()
+    connection.close()
+
+
+def measure(path, mode):
+    """Executado no subprocesso: lê todas as ordens pelo modo pedido e imprime o resultado"""
+    setup_env(f"sqlite:///{path}")
+    app = create_bench_app()
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+
+    if mode == "export":
+        response = app.test_client().get("/api/export/orders", buffered=False)
+        size = sum(len(chunk) for chunk in response.iter_encoded())
+        response.close()
+    else:
+        from database.custom_models import Order
+        from database.controllers import orders_schema
+
+        with app.test_request_context():
+            size = len(orders_schema.jsonify(Order.query.all()).get_data())
+
+    print(mode, baseline, peak_rss_mb(), round(time.perf_counter() - start, 2), size)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--database", default=os.path.join(tempfile.gettempdir(), "bench-export.db"))
+    parser.add_argument("--measure", choices=("export", "legacy"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        return measure(args.database, args.measure)
+
+    seed(args.database, args.rows)
+    results = []
+    for mode in ("export", "legacy"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--database", args.database, "--measure", mode],
+            check=True, capture_output=True, text=True,
+        ).stdout.split()
+        _, baseline, peak, seconds, size = output[-5:]
+        results.append({
+            "mode": mode, "rows": args.rows, "baseline_rss_mb": baseline, "peak_rss_mb": peak,
+            "seconds": seconds, "bytes": size,
+        })
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
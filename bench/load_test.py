@@ -0,0 +1,118 @@
+# ================================
+# TESTE DE CARGA: SERVIDOR DE DESENVOLVIMENTO x GUNICORN
+# ================================
+# Sobe a aplicação em um subprocesso (python app.py ou gunicorn -c
+# gunicorn.conf.py) sobre um SQLite com um usuário e dispara requisições
+# GET com --concurrency conexões por --duration segundos, medindo req/s,
+# p50 e p99 de cada modo.
+#
+# Uso: python bench/load_test.py [--modes dev,gunicorn] [--path /api/users/1]
+#                                [--concurrency 32] [--duration 10] [--workers 4] [--threads 4]
+
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from common import ROOT, create_bench_app, print_table, setup_env, summary
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, port, args):
+    env = dict(os.environ, PORT=str(port), DB_AUTO_CREATE="false")
+    if mode == "dev":
+        command = [sys.executable, "app.py"]
+    else:
+        env.update(WEB_CONCURRENCY=str(args.workers), GUNICORN_THREADS=str(args.threads), GUNICORN_ACCESS_LOG=os.devnull)
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"]
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", args.path)
+            connection.getresponse().read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"servidor {mode} não respondeu na porta {port}")
+
+
+def hammer(port, args):
+    samples, errors = [], []
+    lock = threading.Lock()
+    stop_at = time.monotonic() + args.duration
+
+    def worker():
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        local, failed = [], 0
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            try:
+                connection.request("GET", args.path)
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+                if response.will_close:
+                    # Servidor de desenvolvimento: HTTP/1.0, uma conexão por requisição
+                    connection.close()
+                    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            except OSError:
+                failed += 1
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            local.append(time.perf_counter() - start)
+        with lock:
+            samples.extend(local)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", default="dev,gunicorn")
+    parser.add_argument("--path", default="/api/users/1")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    setup_env()
+    create_bench_app()
+
+    results = []
+    for mode in args.modes.split(","):
+        port = _free_port()
+        process = start_server(mode, port, args)
+        try:
+            samples, errors = hammer(port, args)
+        finally:
+            process.terminate()
+            process.wait(10)
+        results.append({
+            "mode": mode, "req_per_s": round(len(samples) / args.duration, 1), "errors": errors, **summary(samples),
+        })
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
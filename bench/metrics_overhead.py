@@ -0,0 +1,77 @@
+# ================================
+# BENCHMARK: CUSTO DA INSTRUMENTAÇÃO (/metrics)
+# ================================
+# Latência de GET /users/1 e GET /users/1/orders com METRICS_ENABLED=true e
+# false (cada modo em um subprocesso, pois a flag é lida na importação) e o
+# custo unitário de Counter.inc e Histogram.observe do registro de métricas.
+#
+# Uso: python bench/metrics_overhead.py [--requests 5000]
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+import timeit
+
+from common import create_bench_app, print_table, setup_env, summary
+
+PATHS = ("/api/users/1", "/api/users/1/orders")
+
+
+def measure(requests):
+    """Executado no subprocesso: imprime média/p50/p99 (ms) das requisições"""
+    setup_env()
+    client = create_bench_app().test_client()
+    for path in PATHS:
+        client.get(path)  # aquece rotas e conexões
+
+    samples = []
+    for index in range(requests):
+        start = time.perf_counter()
+        client.get(PATHS[index % len(PATHS)])
+        samples.append(time.perf_counter() - start)
+    result = summary(samples)
+    print(result["mean_ms"], result["p50_ms"], result["p99_ms"])
+
+
+def primitives(number=200_000):
+    """Custo (ns) por chamada das primitivas do registro"""
+    setup_env()
+    from database.metrics import MetricsRegistry
+
+    registry = MetricsRegistry()
+    counter = registry.counter("bench_total", "bench", ("route", "status"))
+    histogram = registry.histogram("bench_seconds", "bench", ("route",))
+    inc = timeit.timeit(lambda: counter.inc(route="/api/users", status=200), number=number)
+    observe = timeit.timeit(lambda: histogram.observe(0.0123, route="/api/users"), number=number)
+    return {"counter_inc_ns": round(inc / number * 1e9), "histogram_observe_ns": round(observe / number * 1e9)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        return measure(args.requests)
+
+    results = []
+    for enabled in ("false", "true"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--measure", "--requests", str(args.requests)],
+            env=dict(os.environ, METRICS_ENABLED=enabled),
+            check=True, capture_output=True, text=True,
+        ).stdout.split()
+        mean, p50, p99 = output[-3:]
+        results.append({
+            "metrics_enabled": enabled, "requests": args.requests, "mean_ms": mean, "p50_ms": p50, "p99_ms": p99,
+        })
+    print_table(results)
+    print()
+    print_table([primitives()])
+
+
+if __name__ == "__main__":
+    main()
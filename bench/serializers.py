@@ -0,0 +1,86 @@
+# ================================
+# MICROBENCHMARK: SERIALIZAÇÃO DAS LISTAGENS
+# ================================
+# Tempo para consultar e serializar N ordens pelo caminho padrão (objetos
+# ORM + orders_schema.jsonify) e pelo caminho rápido (colunas +
+# serializador gerado, FAST_SERIALIZATION=true), conferindo que os dois
+# corpos são idênticos byte a byte.
+#
+# Uso: python bench/serializers.py [--sizes 10000,100000] [--repeat 3]
+
+import argparse
+import sqlite3
+import time
+
+from common import create_bench_app, print_table, setup_env
+
+
+def seed(path, rows):
+    connection = sqlite3.connect(path)
+    symbols = ("BTCUSDT", "ETHUSDT", "BNBUSDT", "SOLUSDT")
+    connection.executemany(
+        "INSERT INTO orders (id, user_id, symbol, side, types, quantity, price, timeInForce, created_at, "
+        "binance_order_id, status, executed_qty) "
+        "VALUES (?, 1, ?, ?, 'LIMIT', ?, ?, 'GTC', '2025-01-01 12:00:00', ?, 'FILLED', ?)",
+        (
+            (i, symbols[i % 4], "BUY" if i % 2 else "SELL", f"0.00{i % 900 + 100}", f"{45000 + i % 1000}.12345678",
+             10_000_000 + i, f"0.00{i % 900 + 100}")
+            for i in range(1, rows + 1)
+        ),
+    )
+    connection.commit()
+    connection.close()
+
+
+def best_of(repeat, function):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), body
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    database_uri = setup_env()
+    app = create_bench_app()
+    seed(database_uri.removeprefix("sqlite:///"), max(sizes))
+
+    from database.controllers import orders_schema
+    from database.custom_models import db, Order
+    from database.fast_serializers import serializer_for
+
+    serializer = serializer_for(orders_schema)
+    results = []
+    with app.test_request_context():
+        for size in sizes:
+            query = Order.query.order_by(Order.id).limit(size)
+
+            def schema_path():
+                return orders_schema.jsonify(query.all()).get_data()
+
+            def fast_path():
+                return serializer.jsonify(serializer.select_from(query).all()).get_data()
+
+            schema_seconds, schema_body = best_of(args.repeat, schema_path)
+            fast_seconds, fast_body = best_of(args.repeat, fast_path)
+            db.session.remove()
+            results.append({
+                "rows": size,
+                "schema_ms": round(schema_seconds * 1000, 1),
+                "fast_ms": round(fast_seconds * 1000, 1),
+                "speedup": round(schema_seconds / fast_seconds, 2),
+                "identical": schema_body == fast_body,
+            })
+
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
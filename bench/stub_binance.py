@@ -0,0 +1,110 @@
+# ================================
+# BINANCE LOCAL (STUB) PARA OS BENCHMARKS
+# ================================
+# Servidor HTTP/1.1 com keep-alive que responde como a API REST da Binance
+# (ping, time, exchangeInfo, depth e criação de ordens). Cada conexão nova
+# paga connect_latency (simula TCP + TLS) e cada requisição paga latency,
+# de modo que reaproveitar a sessão HTTP aparece na medição.
+#
+# Uso:
+#   with StubBinance(latency=0.01, connect_latency=0.05) as stub:
+#       stub.patch_client()   # Client(testnet=True) passa a usar o stub
+#       ...
+
+import itertools
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        # Cabeçalhos e corpo saem em escritas separadas: sem Nagle/ACK atrasado
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # Primeira requisição da conexão: custo do handshake
+        time.sleep(self.server.stub.connect_latency)
+        self.server.stub.connections += 1
+
+    def _reply(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("x-mbx-used-weight-1m", "1")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self):
+        stub = self.server.stub
+        stub.requests += 1
+        time.sleep(stub.latency)
+        path = urlparse(self.path).path
+
+        if path.endswith("/ping"):
+            return self._reply({})
+        if path.endswith("/time"):
+            return self._reply({"serverTime": int(time.time() * 1000)})
+        if path.endswith("/exchangeInfo"):
+            return self._reply({"symbols": []})
+        if path.endswith("/depth"):
+            return self._reply({"lastUpdateId": 1, "bids": [["100.0", "1.0"]], "asks": [["100.1", "1.0"]]})
+        if path.endswith("/order") and self.command == "POST":
+            length = int(self.headers.get("Content-Length", 0))
+            params = dict(item.split("=", 1) for item in self.rfile.read(length).decode().split("&") if item)
+            return self._reply({
+                "symbol": params.get("symbol"),
+                "orderId": next(stub.order_ids),
+                "status": "NEW",
+                "executedQty": "0.00000000",
+                "origQty": params.get("quantity"),
+                "price": params.get("price"),
+                "side": params.get("side"),
+                "type": params.get("type"),
+                "transactTime": int(time.time() * 1000),
+            })
+        return self._reply({"code": -1, "msg": f"rota não simulada: {path}"}, 404)
+
+    do_GET = do_POST = do_DELETE = _route
+
+
+class StubBinance:
+    """Binance simulada em 127.0.0.1 (porta livre) numa thread de fundo"""
+
+    def __init__(self, latency=0.0, connect_latency=0.0):
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.order_ids = itertools.count(1)
+        self.requests = 0
+        self.connections = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def patch_client(self):
+        """Aponta o Client(testnet=True) do python-binance para o stub"""
+        from binance.client import Client
+
+        Client.API_TESTNET_URL = f"{self.url}/api"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
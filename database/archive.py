@@ -0,0 +1,136 @@
+# ================================
+# ARQUIVAMENTO DE ORDENS E RELATÓRIOS ANTIGOS
+# ================================
+# Ordens criadas há mais de ARCHIVE_HORIZON_DAYS dias são movidas, junto
+# com todos os seus relatórios, para orders_archive e trade_reports_archive
+# (mesmos IDs e colunas). O job é incremental: cada execução move apenas
+# as ordens que passaram do horizonte desde a anterior, em blocos de
+# ARCHIVE_BATCH_SIZE com um commit por bloco.
+#
+# Uma ordem só é arquivada quando está finalizada (status fora dos abertos)
+# e todos os seus relatórios também são anteriores ao horizonte, de modo que
+# ordem e relatórios ficam sempre na mesma camada. Dados arquivados são
+# apenas para leitura: as listagens, exportações, P&L e o rebuild de
+# posições os incluem, mas PUT/DELETE só alcançam as tabelas quentes.
+
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, exists, func, insert, or_, select
+
+from database.custom_models import db, Order, TradeReport, ArchivedOrder, ArchivedTradeReport
+from database.metrics import registry
+from database.pagination import date_arg, page_params
+from database.reconciliation import OPEN_STATUSES
+
+ARCHIVE_HORIZON_DAYS = int(os.getenv("ARCHIVE_HORIZON_DAYS", 365))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 1000))
+
+orders_archived = registry.counter("archive_orders_moved_total", "Ordens movidas para orders_archive")
+reports_archived = registry.counter("archive_reports_moved_total", "Relatórios movidos para trade_reports_archive")
+
+
+def archive_cutoff(horizon_days=ARCHIVE_HORIZON_DAYS):
+    """Data (UTC sem fuso, como created_at) antes da qual os dados são arquivados"""
+    return datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=horizon_days)
+
+
+def _columns(model):
+    return [column.name for column in model.__table__.columns]
+
+
+def _archivable_orders(cutoff, after, batch_size):
+    """IDs das próximas ordens finalizadas, anteriores ao horizonte e sem relatórios recentes"""
+    # A última ordem e o último relatório nunca saem da tabela quente, para que
+    # o autoincremento (SQLite, MySQL < 8 após reinício) não reutilize seus IDs
+    max_order_id = db.session.scalar(select(func.max(Order.id)))
+    max_report_id = db.session.scalar(select(func.max(TradeReport.id))) or 0
+
+    recent_report = exists().where(
+        TradeReport.order_id == Order.id,
+        or_(TradeReport.report_date >= cutoff, TradeReport.report_date.is_(None), TradeReport.id >= max_report_id),
+    )
+    return db.session.scalars(
+        select(Order.id)
+        .where(
+            Order.created_at < cutoff,
+            Order.id > after,
+            Order.id < max_order_id,
+            or_(Order.status.is_(None), Order.status.not_in(OPEN_STATUSES)),
+            ~recent_report,
+        )
+        .order_by(Order.id)
+        .limit(batch_size)
+    ).all()
+
+
+def archive_old_data(horizon_days=ARCHIVE_HORIZON_DAYS, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move ordens e relatórios anteriores ao horizonte; retorna (ordens, relatórios) movidos"""
+    cutoff = archive_cutoff(horizon_days)
+    order_columns, report_columns = _columns(Order), _columns(TradeReport)
+    moved_orders = moved_reports = 0
+    last_id = 0
+
+    while True:
+        order_ids = _archivable_orders(cutoff, last_id, batch_size)
+        if not order_ids:
+            break
+
+        # Copia (INSERT ... SELECT) e remove da tabela quente na mesma transação
+        db.session.execute(insert(ArchivedOrder).from_select(
+            order_columns,
+            select(*Order.__table__.columns).where(Order.id.in_(order_ids)),
+        ))
+        reports = db.session.execute(insert(ArchivedTradeReport).from_select(
+            report_columns,
+            select(*TradeReport.__table__.columns).where(TradeReport.order_id.in_(order_ids)),
+        )).rowcount
+        db.session.execute(delete(TradeReport).where(TradeReport.order_id.in_(order_ids)))
+        db.session.execute(delete(Order).where(Order.id.in_(order_ids)))
+        db.session.commit()
+
+        moved_orders += len(order_ids)
+        moved_reports += max(reports, 0)
+        orders_archived.inc(len(order_ids))
+        reports_archived.inc(max(reports, 0))
+        last_id = order_ids[-1]
+
+    return moved_orders, moved_reports
+
+
+# ---------- leitura (camada quente + arquivo) ----------
+
+def archive_needed(args, id_column, date_column):
+    """
+    True se a página pedida pode conter linhas arquivadas
+
+    O arquivo só entra na consulta quando não está vazio, o cursor (after)
+    ainda não passou do maior ID arquivado e o início do intervalo (start)
+    não é posterior à data mais recente arquivada.
+    """
+    newest = db.session.execute(select(func.max(id_column), func.max(date_column))).one()
+    if newest[0] is None:
+        return False
+    _, after = page_params(args)
+    start = date_arg(args, 'start')
+    return after < newest[0] and (start is None or newest[1] is None or start <= newest[1])
+
+
+def paginate_union(parts, args):
+    """
+    Paginação por cursor sobre várias queries (camada quente e arquivo)
+
+    Cada query traz até limit+1 linhas após o cursor pelo seu índice de ID
+    e o resultado é intercalado por ID; retorna (itens, next_cursor).
+    """
+    limit, after = page_params(args)
+    rows = []
+    for query, id_column in parts:
+        rows.extend(query.filter(id_column > after).order_by(id_column).limit(limit + 1).all())
+    rows.sort(key=lambda row: row.id)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+    return rows, next_cursor
@@ -0,0 +1,106 @@
+# ================================
+# REGISTRO DE CLIENTES BINANCE
+# ================================
+# Mantém clientes Binance de longa duração por usuário, evitando criar
+# uma nova sessão HTTP (handshake TLS + ping inicial) a cada ordem.
+#
+# Clientes removidos (LRU, TTL ou invalidação) não são fechados: outra
+# thread (lote de ordens, fila, reconciliação) pode ainda estar usando o
+# mesmo cliente. O registro apenas solta a referência e a sessão HTTP é
+# fechada pelo coletor de lixo quando o último usuário a descarta.
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from binance.client import Client
+
+
+def _fingerprint(api_key, api_secret):
+    """Gera uma impressão digital das credenciais sem guardá-las em texto puro"""
+    return hashlib.sha256(f"{api_key}:{api_secret}".encode()).hexdigest()
+
+
+def _close_client(client):
+    """Fecha a sessão HTTP de um cliente que nunca foi entregue a ninguém, ignorando falhas"""
+    try:
+        client.close_connection()
+    except Exception:
+        pass
+
+
+class BinanceClientRegistry:
+    """
+    Registro de clientes Binance compartilhado pelo processo
+
+    - Chave: ID do usuário
+    - Evicção LRU quando passa de max_size clientes
+    - Evicção por TTL (ttl segundos desde a criação do cliente)
+    - Invalidação explícita quando as chaves mudam ou o usuário é removido
+    - Seguro para uso entre threads
+    """
+
+    def __init__(self, max_size=128, ttl=900, testnet=True):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.testnet = testnet
+        self._clients = OrderedDict()  # user_id -> (fingerprint, criado_em, client)
+        self._lock = threading.Lock()
+
+    def get(self, user_id, api_key, api_secret):
+        """Retorna o cliente do usuário, criando um novo se necessário"""
+        fingerprint = _fingerprint(api_key, api_secret)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._clients.get(user_id)
+            if entry is not None:
+                cached_fingerprint, created_at, client = entry
+                if cached_fingerprint == fingerprint and now - created_at < self.ttl:
+                    self._clients.move_to_end(user_id)
+                    return client
+                # Chaves alteradas ou TTL expirado: solta o cliente antigo (pode estar em uso)
+                del self._clients[user_id]
+
+        # Cria o cliente fora do lock para não bloquear outras threads
+        client = Client(api_key, api_secret, testnet=self.testnet)
+
+        with self._lock:
+            entry = self._clients.get(user_id)
+            if entry is not None and entry[0] == fingerprint:
+                # Outra thread criou o cliente primeiro: reaproveita o dela
+                _close_client(client)
+                self._clients.move_to_end(user_id)
+                return entry[2]
+
+            self._clients[user_id] = (fingerprint, now, client)
+            self._clients.move_to_end(user_id)
+
+            # Evicção LRU (sem fechar: o cliente pode estar em uso por outra thread)
+            while len(self._clients) > self.max_size:
+                self._clients.popitem(last=False)
+
+        return client
+
+    def invalidate(self, user_id):
+        """Remove o cliente de um usuário (chaves alteradas ou usuário deletado)"""
+        with self._lock:
+            self._clients.pop(user_id, None)
+
+    def clear(self):
+        """Remove todos os clientes do registro"""
+        with self._lock:
+            self._clients.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._clients)
+
+
+# Instância única usada pelas rotas
+client_registry = BinanceClientRegistry(
+    max_size=int(os.getenv("BINANCE_CLIENT_CACHE_SIZE", 128)),
+    ttl=int(os.getenv("BINANCE_CLIENT_TTL", 900)),
+)
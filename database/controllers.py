@@ -1,11 +1,34 @@
 # ================================
 # IMPORTAÇÕES DAS BIBLIOTECAS
 # ================================
-from flask import Blueprint, request, jsonify
-from database.custom_models import db, User, Order, TradeReport
-from database.schemas import UserSchema, OrderSchema, TradeReportSchema
+from flask import Blueprint, request, jsonify, Response, stream_with_context, url_for
+from database.custom_models import db, User, Order, TradeReport, Position, ReconcileCursor, ArchivedOrder, ArchivedTradeReport
+from database.schemas import UserSchema, OrderSchema, TradeReportSchema, PositionSchema
+from database.binance_clients import client_registry
+from database.credentials import credential_cache
+from database.market_data import price_cache, InvalidSymbolError
+from database.market_stream import market_stream
+from database.order_book import order_books
+from database.klines import load_klines, compute_indicator, INTERVALS, INDICATORS
+from database.exports import orders_export_query, reports_export_query, stream_rows, EXPORT_FORMATS
+from database.order_service import normalize_order, send_binance_order, record_binance_response, dispatch_batch, ORDER_BATCH_MAX_SIZE
+from database.order_queue import order_queue, QueueFullError, ORDER_ASYNC_ENABLED
+from database.exchange_filters import prevalidate, OrderRejected
+from database.rate_limit import RateLimitExceeded
+from database.metrics import registry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from database.pnl import pnl_cache, BUCKETS as PNL_BUCKETS
+from database.positions import apply_order
+from database.pool import pool_stats
+from database.fast_serializers import serializer_for, FAST_SERIALIZATION
+from database.http_cache import conditional_get, bump_user, bump_users
+from database.pagination import paginate, with_cursor, date_arg, PaginationError
+from database.imports import read_records, import_users, import_reports, ImportFormatError
+from database.profiling import profiles, collapsed_stacks
+from database.archive import archive_needed, paginate_union
+import hmac
+import math
+import os
 import requests
-from binance.client import Client
 from http import HTTPStatus
 
 # ================================
@@ -24,6 +47,106 @@ order_schema = OrderSchema()        # Para uma única ordem
 orders_schema = OrderSchema(many=True)  # Para múltiplas ordens
 report_schema = TradeReportSchema()  # Para um único relatório
 reports_schema = TradeReportSchema(many=True)  # Para múltiplos relatórios
+positions_schema = PositionSchema(many=True)  # Para múltiplas posições
+
+# ================================
+# FILTROS DAS LISTAGENS
+# ================================
+
+def filter_orders(query, args, order=Order):
+    """Aplica os filtros opcionais symbol, side, start e end a uma query de Order (ou ArchivedOrder)"""
+    if args.get('symbol'):
+        query = query.filter(order.symbol == args['symbol'].upper())
+    if args.get('side'):
+        query = query.filter(order.side == args['side'].upper())
+    start = date_arg(args, 'start')
+    if start:
+        query = query.filter(order.created_at >= start)
+    end = date_arg(args, 'end')
+    if end:
+        query = query.filter(order.created_at < end)
+    return query
+
+
+def list_response(schema, id_column, query, args, archived=None):
+    """
+    Pagina a query e serializa a página com o schema
+    Com FAST_SERIALIZATION=true busca só as colunas e usa o serializador
+    gerado (mesmo JSON, sem objetos ORM nem Marshmallow por linha)
+    archived: (query, coluna de ID) equivalente nas tabelas de arquivo,
+    intercalada na página por ID
+    """
+    if archived is None:
+        if FAST_SERIALIZATION:
+            serializer = serializer_for(schema)
+            rows, next_cursor = paginate(serializer.select_from(query), id_column, args)
+            return with_cursor(serializer.jsonify(rows), next_cursor)
+        
+        items, next_cursor = paginate(query, id_column, args)
+        return with_cursor(schema.jsonify(items), next_cursor)
+    
+    parts = [(query, id_column), archived]
+    if FAST_SERIALIZATION:
+        serializer = serializer_for(schema)
+        parts = [(serializer.select_from(part, column.class_), column) for part, column in parts]
+        rows, next_cursor = paginate_union(parts, args)
+        return with_cursor(serializer.jsonify(rows), next_cursor)
+    
+    items, next_cursor = paginate_union(parts, args)
+    return with_cursor(schema.jsonify(items), next_cursor)
+
+
+def filter_reports(query, args, report=TradeReport, order=Order):
+    """Aplica os filtros opcionais symbol, start e end a uma query de TradeReport já unida a Order"""
+    if args.get('symbol'):
+        query = query.filter(order.symbol == args['symbol'].upper())
+    start = date_arg(args, 'start')
+    if start:
+        query = query.filter(report.report_date >= start)
+    end = date_arg(args, 'end')
+    if end:
+        query = query.filter(report.report_date < end)
+    return query
+
+
+def archived_orders(args, **filters):
+    """(query, ID) das ordens arquivadas com os mesmos filtros, ou None se o intervalo pedido não alcança o arquivo"""
+    if not archive_needed(args, ArchivedOrder.id, ArchivedOrder.created_at):
+        return None
+    return filter_orders(ArchivedOrder.query.filter_by(**filters), args, ArchivedOrder), ArchivedOrder.id
+
+
+def archived_reports(args, user_id):
+    """(query, ID) dos relatórios arquivados do usuário, ou None se o intervalo pedido não alcança o arquivo"""
+    if not archive_needed(args, ArchivedTradeReport.id, ArchivedTradeReport.report_date):
+        return None
+    query = ArchivedTradeReport.query.join(ArchivedOrder, ArchivedTradeReport.order_id == ArchivedOrder.id)
+    query = filter_reports(query.filter(ArchivedOrder.user_id == user_id), args, ArchivedTradeReport, ArchivedOrder)
+    return query, ArchivedTradeReport.id
+
+
+def rate_limited(error):
+    """Resposta 429 para chamadas descartadas pelo governador de rate limit da Binance"""
+    retry_after = str(max(1, math.ceil(error.retry_after)))
+    return jsonify({"error": str(error)}), HTTPStatus.TOO_MANY_REQUESTS, {"Retry-After": retry_after}
+
+
+def import_response(result):
+    """201 se todas as linhas entraram, 207 se parte falhou, 400 se nenhuma entrou"""
+    if not result.failed:
+        status = HTTPStatus.CREATED
+    elif result.inserted:
+        status = HTTPStatus.MULTI_STATUS
+    else:
+        status = HTTPStatus.BAD_REQUEST
+    return jsonify(result.as_dict()), status
+
+
+def admin_authorized():
+    """Confere o header X-Admin-Token contra ADMIN_TOKEN (rotas de admin ficam desativadas sem ele)"""
+    token = os.getenv("ADMIN_TOKEN")
+    provided = request.headers.get("X-Admin-Token", "")
+    return bool(token) and hmac.compare_digest(provided.encode(), token.encode())
 
 # ================================
 # ROTAS DE USUÁRIO - CRUD COMPLETO
@@ -75,6 +198,10 @@ def create_user():
         db.session.add(user)
         db.session.commit()
         
+        # Invalida os ETags da lista de usuários e do novo usuário
+        bump_users()
+        bump_user(user.id)
+        
         # Retorna os dados do usuário criado serializado
         return user_schema.jsonify(user), HTTPStatus.CREATED
         
@@ -84,34 +211,80 @@ def create_user():
         return jsonify({"error": f"Erro ao criar usuário: {str(e)}"}), HTTPStatus.BAD_REQUEST
 
 
+@bp.route('/users/bulk', methods=['POST'])
+def import_users_bulk():
+    """
+    Importar vários usuários de uma só vez
+    As linhas são inseridas em blocos de IMPORT_CHUNK_SIZE (um commit por
+    bloco); linhas inválidas são reportadas sem interromper a importação
+    
+    Método: POST
+    Endpoint: /users/bulk
+    
+    Corpo:
+    - Lista JSON de usuários (mesmos campos de POST /users), ou
+    - NDJSON, um usuário por linha (Content-Type: application/x-ndjson)
+    
+    Retornos:
+    - 201: Todos os usuários importados
+    - 207: Parte das linhas falhou (ver "errors", com o índice de cada linha)
+    - 400: Corpo inválido ou nenhuma linha importada
+    
+    Exemplo de uso:
+    POST /users/bulk
+    Content-Type: application/x-ndjson
+    
+    {"login": "joao", "password": "...", "binance_api_key": "...", "binance_secret_key": "...", "saldo_inicio": 1000}
+    {"login": "maria", "password": "...", "binance_api_key": "...", "binance_secret_key": "...", "saldo_inicio": 500}
+    """
+    try:
+        result = import_users(read_records(request))
+        
+        # Invalida os ETags da lista de usuários
+        if result.inserted:
+            bump_users()
+        
+        return import_response(result)
+        
+    except ImportFormatError as e:
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Erro ao importar usuários: {str(e)}"}), HTTPStatus.BAD_REQUEST
+
+
 @bp.route('/users', methods=['GET'])
+@conditional_get(lambda: "users")
 def get_users():
     """
-    Obter todos os usuários cadastrados no sistema
+    Obter os usuários cadastrados no sistema, paginados por ID
     
     Método: GET
     Endpoint: /users
     
-    Parâmetros: Nenhum
+    Parâmetros da query (opcionais):
+    - limit (int): Tamanho da página (máximo PAGE_SIZE_MAX)
+    - after (int): Cursor; retorna usuários com ID maior que este
     
     Retornos:
-    - 200: Lista de todos os usuários + seus dados
+    - 200: Página de usuários + cabeçalho X-Next-Cursor se houver mais
+    - 400: Parâmetros de paginação inválidos
     
     Exemplo de uso:
-    GET /users
+    GET /users?limit=50&after=100
     """
     try:
-        # Busca todos os usuários no banco de dados
-        users = User.query.all()
-        
-        # Serializa e retorna a lista de usuários
-        return users_schema.jsonify(users), HTTPStatus.OK
+        # Busca e serializa uma página de usuários
+        return list_response(users_schema, User.id, User.query, request.args), HTTPStatus.OK
         
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
     except Exception as e:
         return jsonify({"error": f"Erro ao buscar usuários: {str(e)}"}), HTTPStatus.INTERNAL_SERVER_ERROR
 
 
 @bp.route('/users/<int:user_id>', methods=['GET'])
+@conditional_get(lambda user_id: f"user:{user_id}")
 def get_user(user_id):
     """
     Obter um usuário específico pelo seu ID
@@ -163,10 +336,17 @@ def delete_user(user_id):
         # Busca o usuário pelo ID, retorna 404 se não encontrar
         user = User.query.get_or_404(user_id)
         
-        # Remove o usuário do banco de dados
+        # Remove o usuário (e seus cursores de reconciliação) do banco de dados
+        ReconcileCursor.query.filter_by(user_id=user_id).delete()
         db.session.delete(user)
         db.session.commit()
         
+        # Descarta o cliente Binance, o P&L e os ETags em cache do usuário
+        client_registry.invalidate(user_id)
+        pnl_cache.invalidate(user_id)
+        bump_users()
+        bump_user(user_id)
+        
         return jsonify({"message": "Usuário deletado com sucesso"}), HTTPStatus.OK
         
     except Exception as e:
@@ -197,10 +377,17 @@ def create_order(user_id):
     - price (float): Preço da ordem (obrigatório para LIMIT)
     - timeInForce (str): 'GTC', 'IOC', 'FOK' (padrão: 'GTC')
     
+    As ordens são validadas localmente contra os filtros do símbolo
+    (tick size, lot size, notional mínimo) antes do envio à Binance;
+    com ORDER_AUTO_ROUND=true preço e quantidade são arredondados para baixo.
+    
     Retornos:
     - 201: Ordem criada com sucesso + resposta da Binance
-    - 400: Erro na criação (saldo insuficiente, parâmetros inválidos, etc.)
+    - 202: Ordem enfileirada (modo assíncrono, ORDER_ASYNC_ENABLED=true) + tracking_id
+    - 400: Erro na criação (saldo insuficiente, parâmetros inválidos, ordem fora dos filtros do símbolo, etc.)
     - 404: Usuário não encontrado
+    - 429: Limite de requisições da Binance próximo (ver Retry-After)
+    - 503: Fila de ordens cheia (modo assíncrono)
     
     Exemplo de uso:
     POST /users/1/orders
@@ -214,42 +401,38 @@ def create_order(user_id):
     }
     """
     try:
-        # Busca o usuário e suas credenciais da Binance
-        user = User.query.get_or_404(user_id)
-        
-        # Extrai dados da requisição e adiciona o user_id
-        order_data = request.json
-        order_data['user_id'] = user_id
+        # Credenciais da Binance do usuário (cache em memória, sem consulta ao banco)
+        credentials = credential_cache.get(user_id)
+        if credentials is None:
+            return jsonify({"error": "Usuário não encontrado"}), HTTPStatus.NOT_FOUND
         
-        # Configuração do cliente Binance com as credenciais do usuário
-        api_key = user.binance_api_key
-        api_secret = user.binance_secret_key
+        # Extrai dados da requisição, valida contra os filtros do símbolo e
+        # converte para os campos do modelo (type -> types, user_id)
+        order_data = normalize_order(prevalidate(request.json), user_id)
         
-        # Inicializa cliente Binance (testnet=True para ambiente de teste)
-        client = Client(api_key, api_secret, testnet=True)
+        # Modo assíncrono: valida, enfileira e responde sem esperar a Binance
+        if ORDER_ASYNC_ENABLED:
+            Order(**order_data)
+            tracking_id = order_queue.submit(user_id, order_data)
+            return jsonify({
+                "message": "Ordem enfileirada",
+                "tracking_id": tracking_id,
+                "status_url": url_for('api.get_order_status', tracking_id=tracking_id)
+            }), HTTPStatus.ACCEPTED
         
-        # Extrai parâmetros da ordem
-        symbol = order_data.get('symbol')
-        side = order_data.get('side', 'BUY')
-        order_type = order_data.get('type', 'LIMIT')
-        quantity = order_data.get('quantity')
-        price = order_data.get('price')
-        time_in_force = order_data.get('timeInForce', 'GTC')
+        # Reaproveita o cliente Binance do usuário (testnet=True para ambiente de teste)
+        client = client_registry.get(user_id, *credentials)
         
         # Envia a ordem para a Binance API
-        binance_response = client.create_order(
-            symbol=symbol,
-            side=side,
-            type=order_type,
-            quantity=quantity,
-            price=price,
-            timeInForce=time_in_force
-        )
-        
-        # Salva a ordem no banco de dados local
+        binance_response = send_binance_order(client, order_data)
+        
+        # Salva a ordem no banco de dados local e atualiza a posição do usuário
         order = Order(**order_data)
+        record_binance_response(order, binance_response)
         db.session.add(order)
+        apply_order(order)
         db.session.commit()
+        bump_user(user_id)
         
         # Retorna confirmação com dados da ordem local e resposta da Binance
         return jsonify({
@@ -258,42 +441,189 @@ def create_order(user_id):
             "binance_response": binance_response
         }), HTTPStatus.CREATED
         
+    except OrderRejected as e:
+        return jsonify({"error": f"Ordem rejeitada: {str(e)}", "reason": e.reason}), HTTPStatus.BAD_REQUEST
+    except RateLimitExceeded as e:
+        db.session.rollback()
+        return rate_limited(e)
+    except QueueFullError as e:
+        return jsonify({"error": str(e)}), HTTPStatus.SERVICE_UNAVAILABLE, {"Retry-After": "1"}
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Erro ao criar ordem: {str(e)}"}), HTTPStatus.BAD_REQUEST
 
 
+@bp.route('/users/<int:user_id>/orders/batch', methods=['POST'])
+def create_orders_batch(user_id):
+    """
+    Criar várias ordens de trading de uma só vez para um usuário
+    As ordens são validadas antes do envio, enviadas à Binance em paralelo
+    e as aceitas são salvas cada uma em seu SAVEPOINT; falhas individuais
+    não cancelam o lote
+    
+    Método: POST
+    Endpoint: /users/{user_id}/orders/batch
+    
+    Parâmetros da URL:
+    - user_id (int): ID do usuário que está criando as ordens
+    
+    Parâmetros esperados no JSON:
+    - Lista de ordens, cada uma com os mesmos campos de POST /users/{user_id}/orders
+    
+    Retornos:
+    - 201: Todas as ordens criadas
+    - 207: Parte das ordens falhou (ver "results")
+    - 400: Lote inválido ou todas as ordens falharam
+    - 404: Usuário não encontrado
+    
+    Exemplo de uso:
+    POST /users/1/orders/batch
+    [
+        {"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": "0.001", "price": "45000.00"},
+        {"symbol": "ETHUSDT", "side": "SELL", "type": "LIMIT", "quantity": "0.01", "price": "2500.00"}
+    ]
+    """
+    try:
+        # Credenciais da Binance do usuário (cache em memória, sem consulta ao banco)
+        credentials = credential_cache.get(user_id)
+        if credentials is None:
+            return jsonify({"error": "Usuário não encontrado"}), HTTPStatus.NOT_FOUND
+        
+        # Valida o lote recebido
+        batch = request.json
+        if not isinstance(batch, list) or not batch:
+            return jsonify({"error": "Envie uma lista não vazia de ordens"}), HTTPStatus.BAD_REQUEST
+        if len(batch) > ORDER_BATCH_MAX_SIZE:
+            return jsonify({"error": f"Lote excede o máximo de {ORDER_BATCH_MAX_SIZE} ordens"}), HTTPStatus.BAD_REQUEST
+        
+        # Monta as ordens locais antes do envio, para não enviar ordens inválidas
+        results = [None] * len(batch)
+        pending = []  # (posição, dados, ordem local)
+        for index, order_data in enumerate(batch):
+            try:
+                order_data = normalize_order(prevalidate(order_data), user_id)
+                pending.append((index, order_data, Order(**order_data)))
+            except OrderRejected as e:
+                results[index] = {"index": index, "error": f"Ordem rejeitada: {str(e)}", "reason": e.reason}
+            except Exception as e:
+                results[index] = {"index": index, "error": f"Ordem inválida: {str(e)}"}
+        
+        # Envia as ordens válidas para a Binance em paralelo
+        client = client_registry.get(user_id, *credentials)
+        responses = dispatch_batch(client, [order_data for _, order_data, _ in pending])
+        
+        # Salva cada ordem aceita em um SAVEPOINT próprio: uma linha recusada pelo
+        # banco não descarta as demais, que já estão ativas na Binance
+        accepted = []
+        for (index, _, order), (binance_response, error) in zip(pending, responses):
+            if error is not None:
+                results[index] = {"index": index, "error": f"Erro ao criar ordem: {error}"}
+                continue
+            record_binance_response(order, binance_response)
+            try:
+                with db.session.begin_nested():
+                    db.session.add(order)
+                    apply_order(order)
+                accepted.append((index, order, binance_response))
+            except Exception as e:
+                results[index] = {
+                    "index": index,
+                    "error": f"Ordem enviada à Binance, mas não salva: {str(e)}",
+                    "binance_response": binance_response
+                }
+        db.session.commit()
+        bump_user(user_id)
+        
+        for index, order, binance_response in accepted:
+            results[index] = {
+                "index": index,
+                "local_order": order_schema.dump(order),
+                "binance_response": binance_response
+            }
+        
+        # 201 se tudo deu certo, 207 se parcial, 400 se nada foi aceito
+        if len(accepted) == len(batch):
+            status = HTTPStatus.CREATED
+        elif accepted:
+            status = HTTPStatus.MULTI_STATUS
+        else:
+            status = HTTPStatus.BAD_REQUEST
+        
+        return jsonify({
+            "created": len(accepted),
+            "failed": len(batch) - len(accepted),
+            "results": results
+        }), status
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Erro ao criar lote de ordens: {str(e)}"}), HTTPStatus.BAD_REQUEST
+
+
 @bp.route('/orders', methods=['GET'])
 def get_all_orders():
     """
-    Obter todas as ordens do sistema (todos os usuários)
+    Obter as ordens do sistema (todos os usuários), paginadas por ID
     
     Método: GET
     Endpoint: /orders
     
-    Parâmetros: Nenhum
+    Parâmetros da query (opcionais):
+    - limit (int): Tamanho da página (máximo PAGE_SIZE_MAX)
+    - after (int): Cursor; retorna ordens com ID maior que este
+    - symbol (str): Filtra pelo par de trading
+    - side (str): Filtra por 'BUY' ou 'SELL'
+    - start / end (str): Intervalo de datas de criação (ISO 8601)
     
     Retornos:
-    - 200: Lista de todas as ordens do sistema
+    - 200: Página de ordens + cabeçalho X-Next-Cursor se houver mais
+    - 400: Parâmetros inválidos
     
     Exemplo de uso:
-    GET /orders
+    GET /orders?symbol=BTCUSDT&side=BUY&limit=100
     """
     try:
-        # Busca todas as ordens no banco de dados
-        orders = Order.query.all()
-        
-        # Serializa e retorna todas as ordens
-        return orders_schema.jsonify(orders), HTTPStatus.OK
+        # Busca e serializa uma página de ordens
+        # (inclui as ordens arquivadas só se o intervalo pedido as alcança)
+        query = filter_orders(Order.query, request.args)
+        archived = archived_orders(request.args)
+        return list_response(orders_schema, Order.id, query, request.args, archived), HTTPStatus.OK
         
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
     except Exception as e:
         return jsonify({"error": f"Erro ao buscar ordens: {str(e)}"}), HTTPStatus.INTERNAL_SERVER_ERROR
 
 
+@bp.route('/orders/<string:tracking_id>', methods=['GET'])
+def get_order_status(tracking_id):
+    """
+    Obter o estado de uma ordem enviada no modo assíncrono
+    
+    Método: GET
+    Endpoint: /orders/{tracking_id}
+    
+    Parâmetros da URL:
+    - tracking_id (str): ID de acompanhamento retornado no 202
+    
+    Retornos:
+    - 200: Estado do job (QUEUED, SUBMITTING, PLACED, DONE, FAILED ou UNKNOWN)
+    - 404: tracking_id desconhecido
+    
+    Exemplo de uso:
+    GET /orders/5f2b8c0e4d1a4e0f9a7c3b2d1e0f9a8b
+    """
+    job = order_queue.status(tracking_id)
+    if job is None:
+        return jsonify({"error": "Ordem não encontrada na fila"}), HTTPStatus.NOT_FOUND
+    return jsonify(job), HTTPStatus.OK
+
+
 @bp.route('/users/<int:user_id>/orders', methods=['GET'])
+@conditional_get(lambda user_id: f"user:{user_id}")
 def get_user_orders(user_id):
     """
-    Obter todas as ordens de um usuário específico
+    Obter as ordens de um usuário específico, paginadas por ID
     
     Método: GET
     Endpoint: /users/{user_id}/orders
@@ -301,23 +631,28 @@ def get_user_orders(user_id):
     Parâmetros da URL:
     - user_id (int): ID do usuário
     
+    Parâmetros da query (opcionais):
+    - limit, after, symbol, side, start, end (mesmos de /orders)
+    
     Retornos:
-    - 200: Lista de ordens do usuário
+    - 200: Página de ordens do usuário + cabeçalho X-Next-Cursor se houver mais
+    - 400: Parâmetros inválidos
     - 404: Usuário não encontrado
     
     Exemplo de uso:
-    GET /users/1/orders
+    GET /users/1/orders?limit=50&after=200
     """
     try:
         # Verifica se o usuário existe (retorna 404 se não existir)
         User.query.get_or_404(user_id)
         
-        # Busca todas as ordens do usuário específico
-        orders = Order.query.filter_by(user_id=user_id).all()
-        
-        # Serializa e retorna as ordens do usuário
-        return orders_schema.jsonify(orders), HTTPStatus.OK
+        # Busca e serializa uma página de ordens do usuário específico
+        query = filter_orders(Order.query.filter_by(user_id=user_id), request.args)
+        archived = archived_orders(request.args, user_id=user_id)
+        return list_response(orders_schema, Order.id, query, request.args, archived), HTTPStatus.OK
         
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
     except Exception as e:
         return jsonify({"error": f"Erro ao buscar ordens do usuário: {str(e)}"}), HTTPStatus.NOT_FOUND
 
@@ -353,18 +688,27 @@ def update_order(user_id, order_id):
     try:
         # Busca a ordem específica que pertence ao usuário
         order = Order.query.filter_by(id=order_id, user_id=user_id).first_or_404()
+        previous_user_id = order.user_id
         
         # Extrai dados da requisição
         update_data = request.json
         
+        # Reverte o efeito atual da ordem na posição antes de alterá-la
+        apply_order(order, -1)
+        
         # Atualiza apenas os campos enviados na requisição
         for field, value in update_data.items():
             if hasattr(order, field):
                 setattr(order, field, value)
         
-        # Salva as alterações no banco de dados
+        # Aplica o novo efeito da ordem e salva as alterações no banco de dados
+        apply_order(order)
         db.session.commit()
         
+        # Invalida o P&L e os ETags em cache (dono anterior e atual, caso user_id mude)
+        pnl_cache.invalidate(previous_user_id, order.user_id)
+        bump_user(previous_user_id, order.user_id)
+        
         # Retorna a ordem atualizada
         return order_schema.jsonify(order), HTTPStatus.OK
         
@@ -397,9 +741,11 @@ def delete_order(user_id, order_id):
         # Busca a ordem específica que pertence ao usuário
         order = Order.query.filter_by(id=order_id, user_id=user_id).first_or_404()
         
-        # Remove a ordem do banco de dados
+        # Remove a ordem do banco de dados e reverte seu efeito na posição
+        apply_order(order, -1)
         db.session.delete(order)
         db.session.commit()
+        bump_user(user_id)
         
         return jsonify({"message": "Ordem deletada com sucesso"}), HTTPStatus.OK
         
@@ -407,6 +753,38 @@ def delete_order(user_id, order_id):
         db.session.rollback()
         return jsonify({"error": f"Erro ao deletar ordem: {str(e)}"}), HTTPStatus.BAD_REQUEST
 
+@bp.route('/users/<int:user_id>/positions', methods=['GET'])
+@conditional_get(lambda user_id: f"user:{user_id}")
+def get_user_positions(user_id):
+    """
+    Obter a posição consolidada de um usuário por símbolo
+    Lida da tabela positions, mantida a cada criação/alteração/remoção de ordem
+    
+    Método: GET
+    Endpoint: /users/{user_id}/positions
+    
+    Parâmetros da URL:
+    - user_id (int): ID do usuário
+    
+    Retornos:
+    - 200: Lista de posições (quantidade líquida, valor investido e nº de ordens)
+    - 404: Usuário não encontrado
+    
+    Exemplo de uso:
+    GET /users/1/positions
+    """
+    try:
+        # Verifica se o usuário existe
+        User.query.get_or_404(user_id)
+        
+        # Busca as posições do usuário (uma linha por símbolo)
+        positions = Position.query.filter_by(user_id=user_id).order_by(Position.symbol).all()
+        
+        return positions_schema.jsonify(positions), HTTPStatus.OK
+        
+    except Exception as e:
+        return jsonify({"error": f"Erro ao buscar posições: {str(e)}"}), HTTPStatus.NOT_FOUND
+
 # ================================
 # ROTAS DE RELATÓRIOS DE TRADE
 # ================================
@@ -447,6 +825,10 @@ def create_report():
         db.session.add(report)
         db.session.commit()
         
+        # Invalida o P&L e os ETags em cache do dono da ordem
+        pnl_cache.invalidate(report.order.user_id)
+        bump_user(report.order.user_id)
+        
         # Retorna o relatório criado serializado
         return report_schema.jsonify(report), HTTPStatus.CREATED
         
@@ -455,10 +837,56 @@ def create_report():
         return jsonify({"error": f"Erro ao criar relatório: {str(e)}"}), HTTPStatus.BAD_REQUEST
 
 
+@bp.route('/reports/bulk', methods=['POST'])
+def import_reports_bulk():
+    """
+    Importar vários relatórios de trade de uma só vez (ex: backfill de histórico)
+    As linhas são inseridas em blocos de IMPORT_CHUNK_SIZE (um commit por
+    bloco); linhas inválidas ou de ordens inexistentes são reportadas sem
+    interromper a importação
+    
+    Método: POST
+    Endpoint: /reports/bulk
+    
+    Corpo:
+    - Lista JSON de relatórios (order_id obrigatório; profit_loss, report_date
+      em ISO 8601 e demais colunas de TradeReport opcionais), ou
+    - NDJSON, um relatório por linha (Content-Type: application/x-ndjson)
+    
+    Retornos:
+    - 201: Todos os relatórios importados
+    - 207: Parte das linhas falhou (ver "errors", com o índice de cada linha)
+    - 400: Corpo inválido ou nenhuma linha importada
+    
+    Exemplo de uso:
+    POST /reports/bulk
+    [
+        {"order_id": 1, "profit_loss": 150.50, "report_date": "2024-05-01T10:00:00"},
+        {"order_id": 2, "profit_loss": -20.00}
+    ]
+    """
+    try:
+        result = import_reports(read_records(request))
+        
+        # Invalida o P&L e os ETags em cache dos donos das ordens
+        if result.user_ids:
+            pnl_cache.invalidate(*result.user_ids)
+            bump_user(*result.user_ids)
+        
+        return import_response(result)
+        
+    except ImportFormatError as e:
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Erro ao importar relatórios: {str(e)}"}), HTTPStatus.BAD_REQUEST
+
+
 @bp.route('/users/<int:user_id>/reports', methods=['GET'])
+@conditional_get(lambda user_id: f"user:{user_id}")
 def get_user_reports(user_id):
     """
-    Obter todos os relatórios de trade de um usuário específico
+    Obter os relatórios de trade de um usuário específico, paginados por ID
     
     Método: GET
     Endpoint: /users/{user_id}/reports
@@ -466,12 +894,19 @@ def get_user_reports(user_id):
     Parâmetros da URL:
     - user_id (int): ID do usuário
     
+    Parâmetros da query (opcionais):
+    - limit (int): Tamanho da página (máximo PAGE_SIZE_MAX)
+    - after (int): Cursor; retorna relatórios com ID maior que este
+    - symbol (str): Filtra pelo par de trading da ordem
+    - start / end (str): Intervalo de datas do relatório (ISO 8601)
+    
     Retornos:
-    - 200: Lista de relatórios do usuário
+    - 200: Página de relatórios do usuário + cabeçalho X-Next-Cursor se houver mais
+    - 400: Parâmetros inválidos
     - 404: Usuário não encontrado
     
     Exemplo de uso:
-    GET /users/1/reports
+    GET /users/1/reports?start=2025-01-01&limit=100
     """
     try:
         # Verifica se o usuário existe
@@ -479,14 +914,57 @@ def get_user_reports(user_id):
         
         # Busca relatórios através da relação com Order
         # JOIN: TradeReport -> Order -> User
-        reports = TradeReport.query.join(Order).filter(Order.user_id == user_id).all()
+        query = filter_reports(TradeReport.query.join(Order).filter(Order.user_id == user_id), request.args)
         
-        # Serializa e retorna os relatórios
-        return reports_schema.jsonify(reports), HTTPStatus.OK
+        # Relatórios arquivados entram só se o intervalo pedido os alcança
+        archived = archived_reports(request.args, user_id)
         
+        # Serializa e retorna uma página de relatórios
+        return list_response(reports_schema, TradeReport.id, query, request.args, archived), HTTPStatus.OK
+        
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
     except Exception as e:
         return jsonify({"error": f"Erro ao buscar relatórios: {str(e)}"}), HTTPStatus.NOT_FOUND
 
+@bp.route('/users/<int:user_id>/pnl', methods=['GET'])
+@conditional_get(lambda user_id: f"user:{user_id}")
+def get_user_pnl(user_id):
+    """
+    Obter o resumo de lucro/prejuízo (P&L) de um usuário
+    Calculado no banco com GROUP BY e mantido em cache até que algum
+    relatório do usuário seja criado, alterado ou removido
+    
+    Método: GET
+    Endpoint: /users/{user_id}/pnl
+    
+    Parâmetros da URL:
+    - user_id (int): ID do usuário
+    
+    Parâmetros da query (opcionais):
+    - bucket (str): Agrupamento por período, 'day' (padrão) ou 'week'
+    
+    Retornos:
+    - 200: Totais, ganhos/perdas, drawdown máximo, quebra por símbolo e por período
+    - 400: bucket inválido
+    - 404: Usuário não encontrado
+    
+    Exemplo de uso:
+    GET /users/1/pnl?bucket=week
+    """
+    try:
+        # Verifica se o usuário existe
+        User.query.get_or_404(user_id)
+        
+        bucket = request.args.get('bucket', 'day')
+        if bucket not in PNL_BUCKETS:
+            return jsonify({"error": f"bucket inválido: {bucket} (use day ou week)"}), HTTPStatus.BAD_REQUEST
+        
+        return jsonify(pnl_cache.get(user_id, bucket)), HTTPStatus.OK
+        
+    except Exception as e:
+        return jsonify({"error": f"Erro ao calcular P&L: {str(e)}"}), HTTPStatus.NOT_FOUND
+
 #Relatorio de trade
 
 @bp.route('/reports/<int:report_id>', methods=['PUT'])
@@ -518,6 +996,7 @@ def update_report(report_id):
     try:
         # Busca o relatório pelo ID
         report = TradeReport.query.get_or_404(report_id)
+        previous_user_id = report.order.user_id
         
         # Extrai dados da requisição
         update_data = request.json
@@ -530,6 +1009,10 @@ def update_report(report_id):
         # Salva as alterações
         db.session.commit()
         
+        # Invalida o P&L e os ETags em cache (dono anterior e atual, caso order_id mude)
+        pnl_cache.invalidate(previous_user_id, report.order.user_id)
+        bump_user(previous_user_id, report.order.user_id)
+        
         # Retorna o relatório atualizado
         return report_schema.jsonify(report), HTTPStatus.OK
         
@@ -560,17 +1043,214 @@ def delete_report(report_id):
     try:
         # Busca o relatório pelo ID
         report = TradeReport.query.get_or_404(report_id)
+        user_id = report.order.user_id
         
         # Remove o relatório do banco de dados
         db.session.delete(report)
         db.session.commit()
         
+        # Invalida o P&L e os ETags em cache do dono da ordem
+        pnl_cache.invalidate(user_id)
+        bump_user(user_id)
+        
         return jsonify({"message": "Relatório deletado com sucesso"}), HTTPStatus.OK
         
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Erro ao deletar relatório: {str(e)}"}), HTTPStatus.BAD_REQUEST
 
+# ================================
+# ROTAS DE EXPORTAÇÃO - CONCILIAÇÃO
+# ================================
+
+def export_response(statements, name):
+    """Monta a resposta em streaming (das consultas em sequência) no formato pedido em ?format= (ndjson ou csv)"""
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Formato inválido: {fmt} (use ndjson ou csv)"}), HTTPStatus.BAD_REQUEST
+    
+    response = Response(stream_with_context(stream_rows(statements, fmt)), mimetype=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename={name}.{fmt}'
+    return response, HTTPStatus.OK
+
+
+@bp.route('/export/orders', methods=['GET'])
+def export_orders():
+    """
+    Exportar todas as ordens (com o login do usuário) em streaming
+    
+    Método: GET
+    Endpoint: /export/orders
+    
+    Parâmetros da query (opcionais):
+    - format (str): 'ndjson' (padrão) ou 'csv'
+    - symbol, side, start, end: mesmos filtros de /orders
+    
+    Retornos:
+    - 200: Arquivo NDJSON/CSV gerado linha a linha
+    - 400: Formato ou filtros inválidos
+    
+    Exemplo de uso:
+    GET /export/orders?format=csv&start=2025-01-01
+    """
+    try:
+        statements = [filter_orders(orders_export_query(), request.args)]
+        if archive_needed(request.args, ArchivedOrder.id, ArchivedOrder.created_at):
+            # Ordens arquivadas, intercaladas por ID com as da tabela quente
+            archived = orders_export_query(ArchivedOrder)
+            statements.append(filter_orders(archived, request.args, ArchivedOrder))
+        return export_response(statements, 'orders')
+        
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
+    except Exception as e:
+        return jsonify({"error": f"Erro ao exportar ordens: {str(e)}"}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@bp.route('/export/reports', methods=['GET'])
+def export_reports():
+    """
+    Exportar todos os relatórios de trade (com ordem e usuário) em streaming
+    
+    Método: GET
+    Endpoint: /export/reports
+    
+    Parâmetros da query (opcionais):
+    - format (str): 'ndjson' (padrão) ou 'csv'
+    - symbol, start, end: mesmos filtros de /users/{user_id}/reports
+    
+    Retornos:
+    - 200: Arquivo NDJSON/CSV gerado linha a linha
+    - 400: Formato ou filtros inválidos
+    
+    Exemplo de uso:
+    GET /export/reports?format=ndjson
+    """
+    try:
+        statements = [filter_reports(reports_export_query(), request.args)]
+        if archive_needed(request.args, ArchivedTradeReport.id, ArchivedTradeReport.report_date):
+            # Relatórios arquivados, intercalados por ID com os da tabela quente
+            archived = reports_export_query(ArchivedTradeReport, ArchivedOrder)
+            statements.append(filter_reports(archived, request.args, ArchivedTradeReport, ArchivedOrder))
+        return export_response(statements, 'reports')
+        
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
+    except Exception as e:
+        return jsonify({"error": f"Erro ao exportar relatórios: {str(e)}"}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+# ================================
+# ROTAS DE MONITORAMENTO
+# ================================
+
+@bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Obter as métricas do processo no formato de exposição do Prometheus
+    
+    Método: GET
+    Endpoint: /metrics
+    
+    Retornos:
+    - 200: Texto com contadores, medidores e histogramas (latência por rota, consultas SQL, chamadas à Binance)
+    
+    Exemplo de uso:
+    GET /metrics
+    """
+    return Response(registry.render(), content_type=METRICS_CONTENT_TYPE), HTTPStatus.OK
+
+
+@bp.route('/health/pool', methods=['GET'])
+def get_pool_stats():
+    """
+    Obter o estado do pool de conexões com o banco de dados
+    
+    Método: GET
+    Endpoint: /health/pool
+    
+    Retornos:
+    - 200: Conexões em uso, livres, overflow e tempo de espera para obter conexão
+      (com a réplica de leitura configurada, o pool dela vem em "replica")
+    
+    Exemplo de uso:
+    GET /health/pool
+    """
+    stats = pool_stats(db.engine)
+    if "replica" in db.engines:
+        stats["replica"] = pool_stats(db.engines["replica"])
+    return jsonify(stats), HTTPStatus.OK
+
+
+@bp.route('/admin/profiles', methods=['GET'])
+def list_profiles():
+    """
+    Listar os perfis de requisições capturados (PROFILING_ENABLED=true)
+    Perfis por amostragem (cProfile) ou por latência acima de PROFILE_SLOW_MS
+    (pilhas amostradas), do mais recente ao mais antigo
+    
+    Método: GET
+    Endpoint: /admin/profiles
+    
+    Headers:
+    - X-Admin-Token (str): Deve ser igual à variável ADMIN_TOKEN
+    
+    Retornos:
+    - 200: Lista com rota, status, duração, motivo e totais de SQL de cada perfil
+    - 403: Token ausente ou inválido
+    
+    Exemplo de uso:
+    GET /admin/profiles
+    """
+    if not admin_authorized():
+        return jsonify({"error": "Acesso negado"}), HTTPStatus.FORBIDDEN
+    return jsonify(profiles.list()), HTTPStatus.OK
+
+
+@bp.route('/admin/profiles/<int:profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """
+    Obter ou baixar um perfil capturado
+    
+    Método: GET
+    Endpoint: /admin/profiles/{profile_id}
+    
+    Parâmetros da URL:
+    - profile_id (int): ID do perfil (ver GET /admin/profiles)
+    
+    Parâmetros da query (opcionais):
+    - format (str): 'json' (padrão) com estatísticas e SQL; 'raw' baixa o
+      arquivo .prof (cProfile, abre com pstats/snakeviz) ou as pilhas em
+      formato colapsado (flame graph)
+    
+    Headers:
+    - X-Admin-Token (str): Deve ser igual à variável ADMIN_TOKEN
+    
+    Retornos:
+    - 200: Perfil em JSON ou arquivo para download
+    - 403: Token ausente ou inválido
+    - 404: Perfil não encontrado (pode ter saído do buffer)
+    
+    Exemplo de uso:
+    GET /admin/profiles/3?format=raw
+    """
+    if not admin_authorized():
+        return jsonify({"error": "Acesso negado"}), HTTPStatus.FORBIDDEN
+    
+    profile = profiles.get(profile_id)
+    if profile is None:
+        return jsonify({"error": "Perfil não encontrado"}), HTTPStatus.NOT_FOUND
+    
+    if request.args.get('format') == 'raw':
+        if profile["kind"] == "cprofile":
+            body, mimetype, extension = profile["raw"], 'application/octet-stream', 'prof'
+        else:
+            body, mimetype, extension = collapsed_stacks(profile), 'text/plain', 'txt'
+        return Response(body, mimetype=mimetype, headers={
+            "Content-Disposition": f'attachment; filename="profile-{profile_id}.{extension}"'
+        })
+    
+    return jsonify({key: value for key, value in profile.items() if key != "raw"}), HTTPStatus.OK
+
 # ================================
 # ROTAS DE UTILIDADES - DADOS DE MERCADO
 # ================================
@@ -579,7 +1259,8 @@ def delete_report(report_id):
 def get_price(symbol):
     """
     Obter o preço atual de um símbolo/par de trading na Binance
-    Consulta diretamente a API pública da Binance
+    Lê do feed WebSocket quando habilitado e fresco; caso contrário consulta
+    a API pública da Binance através do cache local de preços
     
     Método: GET
     Endpoint: /market/price/{symbol}
@@ -590,6 +1271,7 @@ def get_price(symbol):
     Retornos:
     - 200: Preço atual do símbolo
     - 400: Símbolo inválido ou erro na API da Binance
+    - 429: Limite de requisições da Binance próximo (ver Retry-After)
     - 500: Erro interno do servidor
     
     Exemplo de uso:
@@ -602,28 +1284,26 @@ def get_price(symbol):
     }
     """
     try:
-        # Monta a URL da API pública da Binance para consulta de preço
-        binance_url = f"https://api.binance.com/api/v3/ticker/price?symbol={symbol.upper()}"
-        
-        # Faz a requisição para a API da Binance
-        response = requests.get(binance_url)
-        
-        # Verifica se a requisição foi bem-sucedida
-        if response.status_code != 200:
-            return jsonify({
-                "error": "Símbolo inválido ou erro na API da Binance",
-                "symbol": symbol.upper()
-            }), HTTPStatus.BAD_REQUEST
+        # Usa o feed WebSocket quando habilitado e com dados frescos
+        price = market_stream.last_price(symbol) if market_stream.running else None
         
-        # Extrai dados da resposta da Binance
-        price_data = response.json()
+        # Fallback: cache REST (só consulta a Binance se estiver expirado)
+        if price is None:
+            price = price_cache.get(symbol)
         
         # Formata e retorna o resultado
         return jsonify({
-            "symbol": price_data["symbol"],
-            "price": float(price_data["price"])
+            "symbol": symbol.upper(),
+            "price": price
         }), HTTPStatus.OK
         
+    except InvalidSymbolError:
+        return jsonify({
+            "error": "Símbolo inválido ou erro na API da Binance",
+            "symbol": symbol.upper()
+        }), HTTPStatus.BAD_REQUEST
+    except RateLimitExceeded as e:
+        return rate_limited(e)
     except requests.RequestException as e:
         return jsonify({
             "error": f"Erro de conexão com a API da Binance: {str(e)}"
@@ -631,4 +1311,242 @@ def get_price(symbol):
     except Exception as e:
         return jsonify({
             "error": f"Erro interno ao buscar preço: {str(e)}"
-        }), HTTPStatus.INTERNAL_SERVER_ERROR
\ No newline at end of file
+        }), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@bp.route('/market/prices', methods=['GET'])
+def get_prices():
+    """
+    Obter o preço atual de vários símbolos de uma só vez
+    Respondido pelo cache local; faltas são preenchidas com uma única
+    chamada em lote à Binance
+    
+    Método: GET
+    Endpoint: /market/prices?symbols=BTCUSDT,ETHUSDT
+    
+    Parâmetros da query:
+    - symbols (str): Lista de símbolos separados por vírgula
+    
+    Retornos:
+    - 200: Lista com o preço de cada símbolo
+    - 400: Parâmetro ausente ou símbolo(s) inválido(s)
+    - 429: Limite de requisições da Binance próximo (ver Retry-After)
+    - 500: Erro de conexão com a Binance
+    
+    Exemplo de uso:
+    GET /market/prices?symbols=BTCUSDT,ETHUSDT
+    
+    Resposta esperada:
+    [
+        {"symbol": "BTCUSDT", "price": 45000.50},
+        {"symbol": "ETHUSDT", "price": 2500.10}
+    ]
+    """
+    try:
+        # Extrai a lista de símbolos da query string
+        symbols = [s.strip().upper() for s in request.args.get('symbols', '').split(',') if s.strip()]
+        if not symbols:
+            return jsonify({"error": "Informe ao menos um símbolo em 'symbols'"}), HTTPStatus.BAD_REQUEST
+        
+        # Busca os preços no cache
+        prices = price_cache.get_many(symbols)
+        
+        return jsonify([
+            {"symbol": symbol, "price": price} for symbol, price in prices.items()
+        ]), HTTPStatus.OK
+        
+    except InvalidSymbolError as e:
+        return jsonify({
+            "error": "Símbolo inválido ou erro na API da Binance",
+            "symbols": e.symbols
+        }), HTTPStatus.BAD_REQUEST
+    except RateLimitExceeded as e:
+        return rate_limited(e)
+    except requests.RequestException as e:
+        return jsonify({
+            "error": f"Erro de conexão com a API da Binance: {str(e)}"
+        }), HTTPStatus.INTERNAL_SERVER_ERROR
+    except Exception as e:
+        return jsonify({
+            "error": f"Erro interno ao buscar preços: {str(e)}"
+        }), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+
+@bp.route('/market/depth/<string:symbol>', methods=['GET'])
+def get_depth(symbol):
+    """
+    Obter o livro de ofertas de um símbolo a partir do livro local
+    Mantido pelos diffs do stream de profundidade (MARKET_DEPTH_SYMBOLS) ou,
+    sem stream, por snapshots REST renovados a cada DEPTH_SNAPSHOT_TTL segundos
+    
+    Método: GET
+    Endpoint: /market/depth/{symbol}
+    
+    Parâmetros da URL:
+    - symbol (str): Símbolo do par de trading (ex: 'BTCUSDT')
+    
+    Parâmetros da query (opcionais):
+    - limit (int): Quantidade de níveis de cada lado (padrão: 10)
+    - quantity (float): Calcula o VWAP de compra e venda para esta quantidade
+    
+    Retornos:
+    - 200: Melhores níveis de bids/asks, spread, preço médio e VWAP
+    - 400: Símbolo ou parâmetros inválidos
+    - 429: Limite de requisições da Binance próximo (ver Retry-After)
+    - 500: Erro de conexão com a Binance
+    
+    Exemplo de uso:
+    GET /market/depth/BTCUSDT?limit=5&quantity=0.5
+    """
+    try:
+        limit = int(request.args.get('limit', 10))
+        quantity = float(request.args['quantity']) if request.args.get('quantity') else None
+        if limit < 1 or (quantity is not None and quantity <= 0):
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": "Parâmetros 'limit' e 'quantity' devem ser positivos"}), HTTPStatus.BAD_REQUEST
+    
+    try:
+        book = order_books.get(symbol)
+        return jsonify(book.summary(limit, quantity)), HTTPStatus.OK
+        
+    except InvalidSymbolError:
+        return jsonify({
+            "error": "Símbolo inválido ou erro na API da Binance",
+            "symbol": symbol.upper()
+        }), HTTPStatus.BAD_REQUEST
+    except RateLimitExceeded as e:
+        return rate_limited(e)
+    except requests.RequestException as e:
+        return jsonify({
+            "error": f"Erro de conexão com a API da Binance: {str(e)}"
+        }), HTTPStatus.INTERNAL_SERVER_ERROR
+    except Exception as e:
+        return jsonify({
+            "error": f"Erro interno ao buscar livro de ofertas: {str(e)}"
+        }), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+def kline_params(args):
+    """Valida symbol, interval, start/end (epoch em ms) e limit das rotas de candles"""
+    symbol = args.get('symbol', '').upper()
+    interval = args.get('interval', '1h')
+    if not symbol:
+        raise ValueError("Informe o parâmetro 'symbol'")
+    if interval not in INTERVALS:
+        raise ValueError(f"Intervalo inválido: {interval}")
+    start = int(args['start']) if args.get('start') else None
+    end = int(args['end']) if args.get('end') else None
+    limit = int(args.get('limit', 500))
+    if limit < 1:
+        raise ValueError("Parâmetro 'limit' deve ser maior que zero")
+    return symbol, interval, start, end, limit
+
+
+def nullable(values):
+    """Converte um array NumPy em lista, trocando NaN por None (null no JSON)"""
+    return [None if value != value else value for value in values.tolist()]
+
+
+@bp.route('/market/klines', methods=['GET'])
+def get_klines():
+    """
+    Obter candles OHLCV armazenados localmente (ingeridos com flask ingest-klines)
+    
+    Método: GET
+    Endpoint: /market/klines
+    
+    Parâmetros da query:
+    - symbol (str): Par de trading (obrigatório)
+    - interval (str): Intervalo do candle, ex: '1m', '1h', '1d' (padrão: '1h')
+    - start / end (int): Intervalo de open_time em epoch ms (opcionais)
+    - limit (int): Quantidade máxima de candles mais recentes (padrão: 500)
+    
+    Retornos:
+    - 200: Colunas open_time, open, high, low, close e volume
+    - 400: Parâmetros inválidos
+    
+    Exemplo de uso:
+    GET /market/klines?symbol=BTCUSDT&interval=1h&limit=100
+    """
+    try:
+        symbol, interval, start, end, limit = kline_params(request.args)
+        arrays = load_klines(symbol, interval, start, end, limit)
+        
+        return jsonify({
+            "symbol": symbol,
+            "interval": interval,
+            **{column: arrays[column].tolist() for column in ("open_time", "open", "high", "low", "close", "volume")}
+        }), HTTPStatus.OK
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
+    except Exception as e:
+        return jsonify({"error": f"Erro ao buscar candles: {str(e)}"}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@bp.route('/market/indicators', methods=['GET'])
+def get_indicator():
+    """
+    Calcular um indicador técnico sobre os candles armazenados
+    
+    Método: GET
+    Endpoint: /market/indicators
+    
+    Parâmetros da query:
+    - symbol, interval, start, end, limit: mesmos de /market/klines
+    - indicator (str): 'sma', 'ema', 'rsi' ou 'vwap' (obrigatório)
+    - period (int): Período do indicador (padrão: 14; no VWAP, omitido = acumulado)
+    
+    Retornos:
+    - 200: open_time e valores do indicador (null enquanto não há dados suficientes)
+    - 400: Parâmetros inválidos
+    
+    Exemplo de uso:
+    GET /market/indicators?symbol=BTCUSDT&interval=1h&indicator=rsi&period=14
+    """
+    try:
+        symbol, interval, start, end, limit = kline_params(request.args)
+        indicator = request.args.get('indicator', '').lower()
+        if indicator not in INDICATORS:
+            raise ValueError(f"Indicador inválido: {indicator} (use {', '.join(INDICATORS)})")
+        
+        default_period = None if indicator == 'vwap' else 14
+        period = int(request.args['period']) if request.args.get('period') else default_period
+        if period is not None and period < 1:
+            raise ValueError("Parâmetro 'period' deve ser maior que zero")
+        
+        arrays = load_klines(symbol, interval, start, end, limit)
+        values = compute_indicator(arrays, indicator, period)
+        
+        return jsonify({
+            "symbol": symbol,
+            "interval": interval,
+            "indicator": indicator,
+            "period": period,
+            "open_time": arrays["open_time"].tolist(),
+            "values": nullable(values)
+        }), HTTPStatus.OK
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
+    except Exception as e:
+        return jsonify({"error": f"Erro ao calcular indicador: {str(e)}"}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@bp.route('/market/stream/status', methods=['GET'])
+def get_market_stream_status():
+    """
+    Obter o estado do feed WebSocket de mercado
+    
+    Método: GET
+    Endpoint: /market/stream/status
+    
+    Retornos:
+    - 200: Conexão, reconexões, mensagens recebidas e idade dos dados por símbolo
+    
+    Exemplo de uso:
+    GET /market/stream/status
+    """
+    return jsonify(market_stream.status()), HTTPStatus.OK
@@ -0,0 +1,110 @@
+# ================================
+# CACHE DE CREDENCIAIS DA BINANCE
+# ================================
+# Credenciais já decifradas por usuário em um cache LRU com TTL, para que
+# as rotas de ordem não consultem o banco nem decifrem as chaves a cada
+# requisição. Alterações e exclusões de usuários invalidam a entrada
+# (eventos do mapper); com vários workers cada processo tem o seu cache e
+# o TTL limita por quanto tempo uma chave alterada em outro processo é usada.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event, select
+from sqlalchemy.orm.attributes import flag_modified
+
+from database.custom_models import db, User
+from database.encryption import get_fernet
+
+
+class CredentialCache:
+    """
+    Cache user_id -> (api_key, api_secret)
+
+    - get(user_id): credenciais do usuário (None se o usuário não existe)
+    - invalidate(*user_ids): descarta as entradas (chaves alteradas ou usuário removido)
+    - Evicção LRU acima de max_size e por TTL (ttl segundos desde a leitura do banco)
+    """
+
+    def __init__(self, max_size=1024, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # user_id -> (credenciais, lido_em)
+        self._versions = {}  # user_id -> nº de invalidações (evita gravar credencial obsoleta)
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._entries.move_to_end(user_id)
+                return entry[0]
+            version = self._versions.get(user_id, 0)
+
+        # Lê apenas as duas colunas (decifradas pelo tipo EncryptedString)
+        row = db.session.execute(
+            select(User.binance_api_key, User.binance_secret_key).where(User.id == user_id)
+        ).first()
+        if row is None:
+            return None
+        credentials = (row[0], row[1])
+
+        with self._lock:
+            if self._versions.get(user_id, 0) == version:
+                self._entries[user_id] = (credentials, now)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return credentials
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._versions[user_id] = self._versions.get(user_id, 0) + 1
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            for user_id in self._entries:
+                self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+# Instância única usada pelas rotas e workers
+credential_cache = CredentialCache(
+    max_size=int(os.getenv("CREDENTIAL_CACHE_SIZE", 1024)),
+    ttl=float(os.getenv("CREDENTIAL_CACHE_TTL", 300)),
+)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target):
+    credential_cache.invalidate(target.id)
+
+
+def encrypt_stored_credentials(batch_size=500):
+    """Regrava as chaves de todos os usuários (cifra as que estão em texto puro); retorna o total"""
+    if get_fernet() is None:
+        raise RuntimeError("CREDENTIALS_ENCRYPTION_KEY não definida: as chaves seriam regravadas em texto puro")
+    total, last_id = 0, 0
+    while True:
+        users = db.session.scalars(
+            select(User).where(User.id > last_id).order_by(User.id).limit(batch_size)
+        ).all()
+        if not users:
+            break
+        for user in users:
+            flag_modified(user, "binance_api_key")
+            flag_modified(user, "binance_secret_key")
+        last_id = users[-1].id
+        total += len(users)
+        db.session.commit()
+    return total
@@ -1,8 +1,10 @@
 # Bibliotecas para criação de Banco de Dados / Teste
 
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy import ForeignKey, String, Numeric, DateTime
+from sqlalchemy import ForeignKey, String, Numeric, DateTime, Index, Integer, BigInteger, Float, UniqueConstraint
 from flask_sqlalchemy import SQLAlchemy
+from database.encryption import EncryptedString
+from database.replica import RoutingSession
 import os
 from dotenv import load_dotenv
 from datetime import datetime
@@ -12,8 +14,8 @@ import random
 class Base(DeclarativeBase):
     pass
 
-#Criação banco de Dados
-db = SQLAlchemy(model_class=Base)
+#Criação banco de Dados (a sessão envia as leituras das rotas GET para a réplica, se configurada)
+db = SQLAlchemy(model_class=Base, session_options={"class_": RoutingSession})
 
 # Carrega as variáveis do .env
 load_dotenv()
@@ -25,8 +27,9 @@ class User(db.Model):
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     login: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
     password: Mapped[str] = mapped_column(String(100), nullable=False)
-    binance_api_key: Mapped[str] = mapped_column(String(100), name='binanceApiKey', nullable=False)
-    binance_secret_key: Mapped[str] = mapped_column(String(100), name='binanceSecretKey', nullable=False)
+    # Chaves cifradas em repouso (CREDENTIALS_ENCRYPTION_KEY); 512 comporta o token Fernet
+    binance_api_key: Mapped[str] = mapped_column(EncryptedString(512), name='binanceApiKey', nullable=False)
+    binance_secret_key: Mapped[str] = mapped_column(EncryptedString(512), name='binanceSecretKey', nullable=False)
     saldo_inicio: Mapped[float] = mapped_column(Numeric(10, 2), name='saldoInicio', nullable=False)
     
     # Relacionamento bidirecional
@@ -35,6 +38,19 @@ class User(db.Model):
 # Order Data
 class Order(db.Model):
     __tablename__ = 'orders'  # Adicionando nome explícito da tabela
+    __table_args__ = (
+        # Ordens de um usuário paginadas por ID / busca por (id, user_id)
+        Index('ix_orders_user_id_id', 'user_id', 'id'),
+        # Ordens de um usuário filtradas por par de trading
+        Index('ix_orders_user_id_symbol', 'user_id', 'symbol'),
+        # Listagem geral filtrada por par de trading
+        Index('ix_orders_symbol_id', 'symbol', 'id'),
+        # Ordens em aberto e ordens recentes (reconciliação com a Binance)
+        Index('ix_orders_status_user_id', 'status', 'user_id'),
+        Index('ix_orders_created_at', 'created_at'),
+        # Ordem local correspondente a um orderId da Binance
+        Index('ix_orders_symbol_binance_order_id', 'symbol', 'binance_order_id'),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
@@ -44,6 +60,11 @@ class Order(db.Model):
     quantity: Mapped[float] = mapped_column(Numeric(18, 8), nullable=False)  # 8 casas decimais para cripto
     price: Mapped[float] = mapped_column(Numeric(18, 8), nullable=False)
     timeInForce: Mapped[str] = mapped_column(String(20), nullable=False) 
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=True)
+    # Dados da Binance atualizados pela reconciliação (NEW, PARTIALLY_FILLED, FILLED, CANCELED, ...)
+    binance_order_id: Mapped[int] = mapped_column(BigInteger, nullable=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=True)
+    executed_qty: Mapped[float] = mapped_column(Numeric(18, 8), nullable=True)
     
     # Relacionamentos bidirecionais
     user = relationship("User", back_populates="orders")
@@ -52,16 +73,124 @@ class Order(db.Model):
 # Trade Report Data
 class TradeReport(db.Model):
     __tablename__ = 'trade_reports'
+    __table_args__ = (
+        # JOIN TradeReport -> Order e filtros por data do relatório
+        Index('ix_trade_reports_order_id_report_date', 'order_id', 'report_date'),
+        # Cada execução da Binance gera no máximo um relatório
+        Index('ix_trade_reports_order_id_binance_trade_id', 'order_id', 'binance_trade_id', unique=True),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     order_id: Mapped[int] = mapped_column(ForeignKey('orders.id'), nullable=False)
     profit_loss: Mapped[float] = mapped_column(Numeric(15, 2), nullable=True)
     report_date: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # Execução (fill) da Binance que originou o relatório; nulo nos relatórios manuais
+    binance_trade_id: Mapped[int] = mapped_column(BigInteger, nullable=True)
+    quantity: Mapped[float] = mapped_column(Numeric(18, 8), nullable=True)
+    price: Mapped[float] = mapped_column(Numeric(18, 8), nullable=True)
+    commission: Mapped[float] = mapped_column(Numeric(18, 8), nullable=True)
+    commission_asset: Mapped[str] = mapped_column(String(20), nullable=True)
     
     
     # Relacionamento bidirecional
     order = relationship("Order", back_populates="reports")
 
+# Archived Order Data (ordens antigas movidas de orders pelo "flask archive-data"; mesmos IDs e colunas)
+class ArchivedOrder(db.Model):
+    __tablename__ = 'orders_archive'
+    __table_args__ = (
+        Index('ix_orders_archive_user_id_id', 'user_id', 'id'),
+        Index('ix_orders_archive_created_at', 'created_at'),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
+    symbol: Mapped[str] = mapped_column(String(20), nullable=False)
+    side: Mapped[str] = mapped_column(String(20), nullable=False)
+    types: Mapped[str] = mapped_column(String(20), nullable=False)
+    quantity: Mapped[float] = mapped_column(Numeric(18, 8), nullable=False)
+    price: Mapped[float] = mapped_column(Numeric(18, 8), nullable=False)
+    timeInForce: Mapped[str] = mapped_column(String(20), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    binance_order_id: Mapped[int] = mapped_column(BigInteger, nullable=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=True)
+    executed_qty: Mapped[float] = mapped_column(Numeric(18, 8), nullable=True)
+
+# Archived Trade Report Data (relatórios das ordens arquivadas, movidos junto com elas)
+class ArchivedTradeReport(db.Model):
+    __tablename__ = 'trade_reports_archive'
+    __table_args__ = (
+        Index('ix_trade_reports_archive_order_id_report_date', 'order_id', 'report_date'),
+        Index('ix_trade_reports_archive_report_date', 'report_date'),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    order_id: Mapped[int] = mapped_column(ForeignKey('orders_archive.id'), nullable=False)
+    profit_loss: Mapped[float] = mapped_column(Numeric(15, 2), nullable=True)
+    report_date: Mapped[datetime] = mapped_column(DateTime)
+    binance_trade_id: Mapped[int] = mapped_column(BigInteger, nullable=True)
+    quantity: Mapped[float] = mapped_column(Numeric(18, 8), nullable=True)
+    price: Mapped[float] = mapped_column(Numeric(18, 8), nullable=True)
+    commission: Mapped[float] = mapped_column(Numeric(18, 8), nullable=True)
+    commission_asset: Mapped[str] = mapped_column(String(20), nullable=True)
+
+# Cache Version Data (versão por escopo do cache HTTP, compartilhada entre os workers)
+class CacheVersion(db.Model):
+    __tablename__ = 'cache_versions'
+
+    scope: Mapped[str] = mapped_column(String(64), primary_key=True)  # "users" ou "user:<id>"
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    modified_at: Mapped[int] = mapped_column(BigInteger, nullable=False)  # epoch em segundos
+
+# Position Data (posição consolidada por usuário e símbolo, mantida a cada ordem)
+class Position(db.Model):
+    __tablename__ = 'positions'
+    __table_args__ = (
+        UniqueConstraint('user_id', 'symbol', name='uq_positions_user_id_symbol'),
+    )
+    
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
+    symbol: Mapped[str] = mapped_column(String(20), nullable=False)
+    quantity: Mapped[float] = mapped_column(Numeric(28, 8), nullable=False, default=0)  # BUY soma, SELL subtrai
+    notional: Mapped[float] = mapped_column(Numeric(28, 8), nullable=False, default=0)  # valor líquido investido
+    orders_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# Reconcile Cursor Data (último trade da Binance já importado por usuário e símbolo)
+class ReconcileCursor(db.Model):
+    __tablename__ = 'reconcile_cursors'
+    __table_args__ = (
+        UniqueConstraint('user_id', 'symbol', name='uq_reconcile_cursors_user_id_symbol'),
+    )
+    
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
+    symbol: Mapped[str] = mapped_column(String(20), nullable=False)
+    last_trade_id: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# Kline Data (candles OHLCV por símbolo e intervalo)
+class Kline(db.Model):
+    __tablename__ = 'klines'
+    __table_args__ = (
+        # Série de um símbolo/intervalo ordenada por tempo de abertura
+        Index('ix_klines_symbol_interval_open_time', 'symbol', 'interval', 'open_time', unique=True),
+    )
+    
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    symbol: Mapped[str] = mapped_column(String(20), nullable=False)
+    interval: Mapped[str] = mapped_column(String(5), nullable=False)
+    open_time: Mapped[int] = mapped_column(BigInteger, nullable=False)  # epoch em ms (como na Binance)
+    open: Mapped[float] = mapped_column(Float, nullable=False)
+    high: Mapped[float] = mapped_column(Float, nullable=False)
+    low: Mapped[float] = mapped_column(Float, nullable=False)
+    close: Mapped[float] = mapped_column(Float, nullable=False)
+    volume: Mapped[float] = mapped_column(Float, nullable=False)
+    close_time: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    quote_volume: Mapped[float] = mapped_column(Float, nullable=False)
+    trades: Mapped[int] = mapped_column(Integer, nullable=False)
+
 # Função de Deste Dataable 
 """
 if __name__ == "__main__":
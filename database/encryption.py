@@ -0,0 +1,92 @@
+# ================================
+# CRIPTOGRAFIA DAS CREDENCIAIS EM REPOUSO
+# ================================
+# Tipo de coluna que grava o valor cifrado com Fernet (pacote cryptography)
+# e o decifra na leitura. As chaves vêm de CREDENTIALS_ENCRYPTION_KEY:
+# uma ou mais chaves Fernet separadas por vírgula; a primeira cifra e todas
+# decifram (rotação de chaves). Sem a variável os valores são gravados em
+# texto puro, como antes; valores antigos em texto puro continuam legíveis
+# e são cifrados pelo comando "flask encrypt-credentials".
+#
+# A variável é lida no primeiro uso (e não na importação), para valer
+# também quando definida apenas no .env carregado depois.
+
+import logging
+import os
+import threading
+
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from sqlalchemy import String
+from sqlalchemy.types import TypeDecorator
+
+_TOKEN_PREFIX = "gAAAAA"  # início de todo token Fernet (versão 0x80 em base64)
+
+logger = logging.getLogger(__name__)
+
+
+class CredentialDecryptionError(ValueError):
+    """Valor cifrado que nenhuma das chaves de CREDENTIALS_ENCRYPTION_KEY decifra"""
+
+
+def _load_fernet():
+    keys = [key.strip() for key in os.getenv("CREDENTIALS_ENCRYPTION_KEY", "").split(",") if key.strip()]
+    if not keys:
+        return None
+    return MultiFernet([Fernet(key) for key in keys])
+
+
+_fernet = None
+_loaded = False
+_lock = threading.Lock()
+
+
+def get_fernet():
+    """MultiFernet das chaves configuradas (None sem CREDENTIALS_ENCRYPTION_KEY), carregado no primeiro uso"""
+    global _fernet, _loaded
+    if not _loaded:
+        with _lock:
+            if not _loaded:
+                _fernet = _load_fernet()
+                _loaded = True
+    return _fernet
+
+
+def encrypt(value):
+    """Cifra value (str); sem chave configurada ou se já cifrado, retorna como está"""
+    fernet = get_fernet()
+    if value is None or fernet is None or is_encrypted(value):
+        return value
+    return fernet.encrypt(value.encode()).decode()
+
+
+def decrypt(value):
+    """Decifra value; valores em texto puro (legados) são retornados como estão"""
+    if not is_encrypted(value):
+        return value
+    fernet = get_fernet()
+    if fernet is None:
+        logger.error("Credencial cifrada no banco, mas CREDENTIALS_ENCRYPTION_KEY não está definida")
+        raise CredentialDecryptionError("Credencial cifrada sem CREDENTIALS_ENCRYPTION_KEY configurada")
+    try:
+        return fernet.decrypt(value.encode()).decode()
+    except InvalidToken:
+        # Chave errada ou removida da rotação: falha explícita em vez de enviar o token à Binance
+        logger.error("Nenhuma chave de CREDENTIALS_ENCRYPTION_KEY decifra a credencial gravada")
+        raise CredentialDecryptionError("Credencial não pôde ser decifrada (verifique CREDENTIALS_ENCRYPTION_KEY)")
+
+
+def is_encrypted(value):
+    return isinstance(value, str) and value.startswith(_TOKEN_PREFIX)
+
+
+class EncryptedString(TypeDecorator):
+    """VARCHAR cifrado com Fernet na gravação e decifrado na leitura"""
+
+    impl = String
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return encrypt(value)
+
+    def process_result_value(self, value, dialect):
+        return decrypt(value)
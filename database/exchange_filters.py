@@ -0,0 +1,251 @@
+# ================================
+# VALIDAÇÃO PRÉ-TRADE (EXCHANGEINFO)
+# ================================
+# Tabela em memória com os filtros de cada símbolo (tick size, lot size,
+# notional mínimo) carregada do exchangeInfo e renovada periodicamente.
+# As ordens são validadas (e opcionalmente arredondadas) localmente em
+# O(1) antes de qualquer chamada à Binance.
+#
+# Se o exchangeInfo não responder, novas tentativas só acontecem após
+# EXCHANGE_INFO_RETRY segundos; enquanto isso a tabela anterior continua em
+# uso (ou, sem tabela, as ordens seguem sem validação local).
+
+import os
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+
+import requests
+
+from database.metrics import registry
+from database.rate_limit import governed_get, RateLimitExceeded, WEIGHT_EXCHANGE_INFO
+
+# As ordens vão para a testnet (Client(testnet=True)), então os filtros também
+EXCHANGE_INFO_URL = os.getenv("EXCHANGE_INFO_URL", "https://testnet.binance.vision")
+EXCHANGE_INFO_TTL = float(os.getenv("EXCHANGE_INFO_TTL", 3600))
+EXCHANGE_INFO_RETRY = float(os.getenv("EXCHANGE_INFO_RETRY", 30))  # espera após falha ao carregar
+ORDER_PREVALIDATION = os.getenv("ORDER_PREVALIDATION", "true").lower() == "true"
+ORDER_AUTO_ROUND = os.getenv("ORDER_AUTO_ROUND", "false").lower() == "true"
+
+# Métricas: quantas ordens foram checadas e quantas chamadas à Binance foram evitadas
+orders_checked = registry.counter("order_prevalidation_checked_total", "Ordens validadas localmente")
+orders_rejected = registry.counter(
+    "order_prevalidation_rejected_total", "Ordens rejeitadas localmente (chamadas à Binance evitadas)", ("reason",)
+)
+
+
+# Falhas ao carregar o exchangeInfo (rede, HTTP, JSON inesperado, governador)
+REFRESH_ERRORS = (requests.RequestException, ValueError, KeyError, RateLimitExceeded)
+
+
+class ExchangeInfoUnavailable(Exception):
+    """Tabela de filtros ainda não carregada e exchangeInfo indisponível"""
+
+
+class OrderRejected(Exception):
+    """Ordem rejeitada pelos filtros do símbolo"""
+
+    def __init__(self, reason, message):
+        self.reason = reason
+        super().__init__(message)
+
+
+def _decimal(value):
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def _plain(value):
+    """Decimal sem notação científica nem zeros à direita (ex: '0.001')"""
+    return format(value.normalize(), "f")
+
+
+class SymbolFilters:
+    """Filtros de um símbolo extraídos do exchangeInfo"""
+
+    __slots__ = (
+        "symbol", "status", "tick_size", "min_price", "max_price",
+        "step_size", "min_qty", "max_qty", "market_step_size", "market_min_qty", "market_max_qty",
+        "min_notional", "max_notional",
+    )
+
+    def __init__(self, info):
+        self.symbol = info["symbol"]
+        self.status = info.get("status", "TRADING")
+        self.tick_size = self.min_price = self.max_price = None
+        self.step_size = self.min_qty = self.max_qty = None
+        self.market_step_size = self.market_min_qty = self.market_max_qty = None
+        self.min_notional = self.max_notional = None
+
+        for item in info.get("filters", []):
+            kind = item.get("filterType")
+            if kind == "PRICE_FILTER":
+                self.tick_size = _decimal(item["tickSize"])
+                self.min_price = _decimal(item["minPrice"])
+                self.max_price = _decimal(item["maxPrice"])
+            elif kind == "LOT_SIZE":
+                self.step_size = _decimal(item["stepSize"])
+                self.min_qty = _decimal(item["minQty"])
+                self.max_qty = _decimal(item["maxQty"])
+            elif kind == "MARKET_LOT_SIZE":
+                self.market_step_size = _decimal(item["stepSize"])
+                self.market_min_qty = _decimal(item["minQty"])
+                self.market_max_qty = _decimal(item["maxQty"])
+            elif kind in ("MIN_NOTIONAL", "NOTIONAL"):
+                self.min_notional = _decimal(item.get("minNotional"))
+                self.max_notional = _decimal(item.get("maxNotional"))
+
+
+def _round_down(value, step):
+    if not step:
+        return value
+    return (value // step) * step
+
+
+def _on_step(value, minimum, step):
+    return not step or ((value - (minimum or 0)) % step) == 0
+
+
+def _reject(reason, message):
+    orders_rejected.inc(reason=reason)
+    raise OrderRejected(reason, message)
+
+
+class ExchangeFilterTable:
+    """
+    Tabela symbol -> SymbolFilters
+
+    - validate(order_data, auto_round): valida a ordem e retorna os dados
+      (arredondados a tick/step quando auto_round=True)
+    - Renovada sob demanda quando passa de ttl segundos (uma busca por vez)
+    - Após uma falha, espera retry segundos antes de tentar de novo
+    """
+
+    def __init__(self, base_url=EXCHANGE_INFO_URL, ttl=EXCHANGE_INFO_TTL, timeout=5.0, retry=EXCHANGE_INFO_RETRY):
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.timeout = timeout
+        self.retry = retry
+        self.session = requests.Session()
+        self._filters = {}
+        self._loaded_at = None
+        self._failed_at = None  # instante da última falha ao carregar
+        self._refresh_lock = threading.Lock()
+
+    def refresh(self):
+        response = governed_get(
+            self.session, f"{self.base_url}/api/v3/exchangeInfo", WEIGHT_EXCHANGE_INFO, timeout=self.timeout
+        )
+        response.raise_for_status()
+        # Troca o dicionário inteiro de uma vez (leituras sem lock)
+        self._filters = {info["symbol"]: SymbolFilters(info) for info in response.json()["symbols"]}
+        self._loaded_at = time.monotonic()
+
+    def _backing_off(self):
+        return self._failed_at is not None and time.monotonic() - self._failed_at < self.retry
+
+    def _ensure_fresh(self):
+        """Renova a tabela se expirada; lança ExchangeInfoUnavailable se não houver tabela"""
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return
+        # Apenas uma thread renova; as demais usam a tabela atual se houver
+        if not self._backing_off() and self._refresh_lock.acquire(blocking=self._loaded_at is None):
+            try:
+                if not self._backing_off() and (
+                    self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl
+                ):
+                    try:
+                        self.refresh()
+                        self._failed_at = None
+                    except REFRESH_ERRORS:
+                        self._failed_at = time.monotonic()
+            finally:
+                self._refresh_lock.release()
+        if self._loaded_at is None:
+            raise ExchangeInfoUnavailable("exchangeInfo indisponível")
+
+    def get(self, symbol):
+        self._ensure_fresh()
+        return self._filters.get(symbol)
+
+    def validate(self, order_data, auto_round=False):
+        """Valida a ordem contra os filtros do símbolo; lança OrderRejected se inválida"""
+        orders_checked.inc()
+
+        symbol = str(order_data.get('symbol') or '').upper()
+        filters = self.get(symbol)
+        if filters is None:
+            _reject("symbol", f"Símbolo desconhecido: {symbol}")
+        if filters.status != "TRADING":
+            _reject("status", f"Símbolo {symbol} não está em negociação ({filters.status})")
+
+        is_market = str(order_data.get('types') or order_data.get('type') or 'LIMIT').upper() == 'MARKET'
+        quantity = _decimal(order_data.get('quantity'))
+        price = _decimal(order_data.get('price')) if order_data.get('price') is not None else None
+        if quantity is None or quantity <= 0:
+            _reject("quantity", "Quantidade inválida")
+        if not is_market and (price is None or price <= 0):
+            _reject("price", "Preço inválido")
+
+        step = (filters.market_step_size or filters.step_size) if is_market else filters.step_size
+        min_qty = (filters.market_min_qty or filters.min_qty) if is_market else filters.min_qty
+        max_qty = (filters.market_max_qty or filters.max_qty) if is_market else filters.max_qty
+
+        if auto_round:
+            quantity = _round_down(quantity, step)
+            if price is not None:
+                price = _round_down(price, filters.tick_size)
+
+        # LOT_SIZE
+        if min_qty and quantity < min_qty:
+            _reject("lot_size", f"Quantidade abaixo do mínimo {_plain(min_qty)}")
+        if max_qty and quantity > max_qty:
+            _reject("lot_size", f"Quantidade acima do máximo {_plain(max_qty)}")
+        if not _on_step(quantity, min_qty, step):
+            _reject("lot_size", f"Quantidade fora do step size {_plain(step)}")
+
+        # PRICE_FILTER
+        if price is not None:
+            if filters.min_price and price < filters.min_price:
+                _reject("price_filter", f"Preço abaixo do mínimo {_plain(filters.min_price)}")
+            if filters.max_price and price > filters.max_price:
+                _reject("price_filter", f"Preço acima do máximo {_plain(filters.max_price)}")
+            if not _on_step(price, filters.min_price, filters.tick_size):
+                _reject("price_filter", f"Preço fora do tick size {_plain(filters.tick_size)}")
+
+            # NOTIONAL / MIN_NOTIONAL
+            notional = price * quantity
+            if filters.min_notional and notional < filters.min_notional:
+                _reject("notional", f"Valor da ordem abaixo do mínimo {_plain(filters.min_notional)}")
+            if filters.max_notional and notional > filters.max_notional:
+                _reject("notional", f"Valor da ordem acima do máximo {_plain(filters.max_notional)}")
+
+        validated = dict(order_data)
+        validated['symbol'] = symbol
+        validated['quantity'] = _plain(quantity)
+        if price is not None:
+            validated['price'] = _plain(price)
+        return validated
+
+
+# Instância única usada pelas rotas
+exchange_filters = ExchangeFilterTable(timeout=float(os.getenv("BINANCE_HTTP_TIMEOUT", 5)))
+
+
+def prevalidate(order_data):
+    """
+    Valida a ordem localmente se ORDER_PREVALIDATION estiver ativo
+
+    Se o exchangeInfo não puder ser carregado (inclusive quando o governador
+    de rate limit descarta a busca) a ordem segue sem validação local (a
+    Binance continua validando).
+    """
+    if not ORDER_PREVALIDATION:
+        return order_data
+    try:
+        exchange_filters._ensure_fresh()
+    except ExchangeInfoUnavailable:
+        return order_data
+    return exchange_filters.validate(order_data, ORDER_AUTO_ROUND)
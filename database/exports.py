@@ -0,0 +1,121 @@
+# ================================
+# EXPORTAÇÃO EM STREAMING (NDJSON / CSV)
+# ================================
+# Consultas de exportação que leem apenas colunas (sem objetos ORM) com
+# cursor do lado do servidor, gerando a resposta linha a linha para manter
+# o uso de memória constante independente do volume de dados. Com dados
+# arquivados, camada quente e arquivo são lidas em uma única consulta
+# (UNION ALL ... ORDER BY id), de modo que a exportação sai sempre em ordem
+# de ID com um só cursor aberto (MySQL não permite dois cursores em
+# streaming na mesma conexão).
+
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import select, union_all
+
+from database.custom_models import db, User, Order, TradeReport
+
+# Quantidade de linhas buscadas do banco por vez
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def orders_export_query(order=Order):
+    """SELECT das ordens (ou das ordens arquivadas) unidas ao usuário, em ordem de ID"""
+    return (
+        select(
+            order.id.label("id"),
+            order.user_id.label("user_id"),
+            User.login.label("login"),
+            order.symbol.label("symbol"),
+            order.side.label("side"),
+            order.types.label("types"),
+            order.quantity.label("quantity"),
+            order.price.label("price"),
+            order.timeInForce.label("timeInForce"),
+            order.created_at.label("created_at"),
+            order.binance_order_id.label("binance_order_id"),
+            order.status.label("status"),
+            order.executed_qty.label("executed_qty"),
+        )
+        .join(User, order.user_id == User.id)
+        .order_by(order.id)
+    )
+
+
+def reports_export_query(report=TradeReport, order=Order):
+    """SELECT dos relatórios (ou dos arquivados) unidos à ordem e ao usuário, em ordem de ID"""
+    return (
+        select(
+            report.id.label("id"),
+            report.order_id.label("order_id"),
+            order.user_id.label("user_id"),
+            User.login.label("login"),
+            order.symbol.label("symbol"),
+            report.profit_loss.label("profit_loss"),
+            report.report_date.label("report_date"),
+        )
+        .join(order, report.order_id == order.id)
+        .join(User, order.user_id == User.id)
+        .order_by(report.id)
+    )
+
+
+def _plain(value):
+    """Converte Decimal/datetime para texto, como no JSON das demais rotas"""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def merged_by_id(statements):
+    """Une as consultas (mesmas colunas, ex: arquivo e tabela quente) em uma só, em ordem de ID"""
+    if len(statements) == 1:
+        return statements[0]
+    compound = union_all(*(statement.order_by(None) for statement in statements))
+    return compound.order_by(compound.selected_columns.id)
+
+
+def stream_rows(statements, fmt):
+    """
+    Gera a exportação em blocos de texto, buscando EXPORT_BATCH_SIZE linhas por vez
+    As consultas (mesmas colunas, ex: arquivo e tabela quente) são intercaladas por ID
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+
+    result = db.session.execute(
+        merged_by_id(statements).execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+    )
+    columns = list(result.keys())
+    if writer:
+        writer.writerow(columns)
+
+    try:
+        for partition in result.partitions():
+            for row in partition:
+                values = [_plain(value) for value in row]
+                if writer:
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(columns, values))))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    finally:
+        result.close()
+
+    # Cabeçalho do CSV quando não há nenhuma linha
+    if buffer.tell():
+        yield buffer.getvalue()
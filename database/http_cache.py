@@ -0,0 +1,190 @@
+# ================================
+# CACHE HTTP (ETAG / GET CONDICIONAL)
+# ================================
+# Contadores de versão por escopo ("users" e "user:<id>") incrementados
+# pelas rotas de escrita. As rotas de leitura geram ETag/Last-Modified a
+# partir da versão e respondem 304 sem executar a consulta da rota quando
+# o cliente já tem a versão atual. Opcionalmente guarda as respostas em um
+# cache LRU.
+#
+# As versões ficam na tabela cache_versions (uma leitura por chave primária
+# por requisição), de modo que todos os workers concordam. A versão (no
+# ETag) distingue escritas no mesmo segundo; Last-Modified é a hora real da
+# escrita (nunca no futuro) e só é enviado/aceito depois que esse segundo
+# termina, para que If-Modified-Since não devolva 304 com dados antigos.
+
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import make_response, request
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from database.custom_models import db, CacheVersion
+from database.replica import replica_router
+
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "false").lower() == "true"
+HTTP_RESPONSE_CACHE_ENABLED = os.getenv("HTTP_RESPONSE_CACHE", "false").lower() == "true"
+HTTP_RESPONSE_CACHE_MAX_BYTES = int(os.getenv("HTTP_RESPONSE_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+
+
+def _now():
+    # Last-Modified tem resolução de segundos
+    return int(datetime.now(timezone.utc).timestamp())
+
+
+class VersionStore:
+    """Versão e data de modificação por escopo, na tabela cache_versions (sempre no primário)"""
+
+    table = CacheVersion.__table__
+
+    def get(self, scope):
+        """Retorna (versão, modificado_em); cria o escopo na primeira consulta"""
+        for _ in range(2):
+            with db.engine.connect() as connection:
+                row = connection.execute(
+                    select(self.table.c.version, self.table.c.modified_at).where(self.table.c.scope == scope)
+                ).first()
+            if row is not None:
+                return row[0], datetime.fromtimestamp(row[1], timezone.utc)
+            try:
+                with db.engine.begin() as connection:
+                    connection.execute(insert(self.table).values(scope=scope, version=0, modified_at=_now()))
+            except IntegrityError:
+                pass  # criado por outro worker ao mesmo tempo
+        raise LookupError(f"Escopo de cache não encontrado: {scope}")
+
+    def bump(self, *scopes):
+        for scope in scopes:
+            self._bump(scope, _now())
+
+    def _bump(self, scope, now):
+        column = self.table.c
+        statement = update(self.table).where(column.scope == scope).values(
+            version=column.version + 1, modified_at=now
+        )
+        for _ in range(2):
+            try:
+                with db.engine.begin() as connection:
+                    if connection.execute(statement).rowcount:
+                        return
+                    connection.execute(insert(self.table).values(scope=scope, version=1, modified_at=now))
+                    return
+            except IntegrityError:
+                continue  # inserido por outro worker: repete o UPDATE
+
+    def etag(self, scope):
+        """Retorna (ETag, Last-Modified); a data é limitada ao instante atual (relógios entre workers)"""
+        version, modified = self.get(scope)
+        now = datetime.fromtimestamp(_now(), timezone.utc)
+        return f"{scope}-{version}-{int(modified.timestamp())}", min(modified, now)
+
+
+class ResponseCache:
+    """Cache LRU de respostas limitado pelo total de bytes dos corpos"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # chave -> (corpo, status, headers)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, body, status, headers):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous[0])
+            self._entries[key] = (body, status, headers)
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, (evicted, _, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+versions = VersionStore()
+response_cache = ResponseCache(HTTP_RESPONSE_CACHE_MAX_BYTES)
+
+
+def bump_users():
+    """Marca a lista de usuários como alterada"""
+    if HTTP_CACHE_ENABLED:
+        versions.bump("users")
+
+
+def bump_user(*user_ids):
+    """Marca os dados (usuário, ordens, relatórios) dos usuários como alterados"""
+    user_ids = [user_id for user_id in user_ids if user_id is not None]
+    if HTTP_CACHE_ENABLED:
+        versions.bump(*(f"user:{user_id}" for user_id in user_ids))
+    # Próximas leituras desses usuários vêm do primário (read-your-writes)
+    replica_router.mark_written(*user_ids)
+
+
+def _settled(modified):
+    """Last-Modified só é um validador seguro depois do segundo da escrita (outra pode vir no mesmo segundo)"""
+    return modified.timestamp() < _now()
+
+
+def _not_modified(etag, modified):
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since is not None and _settled(modified):
+        return modified <= request.if_modified_since
+    return False
+
+
+def conditional_get(scope):
+    """
+    Decorador de rotas GET com ETag/Last-Modified
+
+    - scope: função que recebe os argumentos da rota e retorna o escopo
+      (ex: lambda user_id: f"user:{user_id}")
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not HTTP_CACHE_ENABLED:
+                return view(*args, **kwargs)
+
+            etag, modified = versions.etag(scope(**kwargs))
+
+            # Cliente já tem a versão atual: 304 sem executar a consulta da rota
+            if _not_modified(etag, modified):
+                response = make_response("", 304)
+                response.set_etag(etag)
+                if _settled(modified):
+                    response.last_modified = modified
+                return response
+
+            cache_key = (request.full_path, etag)
+            if HTTP_RESPONSE_CACHE_ENABLED:
+                cached = response_cache.get(cache_key)
+                if cached is not None:
+                    body, status, headers = cached
+                    return make_response(body, status, headers)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+                if _settled(modified):
+                    response.last_modified = modified
+                response.headers["Cache-Control"] = "no-cache"
+                if HTTP_RESPONSE_CACHE_ENABLED:
+                    response_cache.put(cache_key, response.get_data(), 200, list(response.headers.items()))
+            return response
+
+        return wrapper
+
+    return decorator
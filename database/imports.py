@@ -0,0 +1,223 @@
+# ================================
+# IMPORTAÇÃO EM LOTE (JSON / NDJSON)
+# ================================
+# Leitura de listas JSON ou streams NDJSON (um objeto por linha, lidos
+# sem carregar o corpo inteiro) e inserção em blocos com executemany,
+# um commit por bloco. Erros de validação ou de banco são reportados
+# por linha sem interromper o restante da importação.
+
+import json
+import os
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from sqlalchemy import DateTime, Integer, Numeric, String, inspect, insert, select
+from sqlalchemy.exc import DBAPIError
+
+from database.custom_models import db, User, Order, TradeReport
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 500))
+IMPORT_MAX_ERRORS = 1000  # erros listados na resposta (o total é sempre informado)
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+class ImportFormatError(ValueError):
+    """Corpo da importação ilegível (não é lista JSON nem NDJSON)"""
+
+
+def read_records(request):
+    """Gera (índice, registro) a partir de uma lista JSON ou de um stream NDJSON"""
+    if request.mimetype in NDJSON_TYPES:
+        return _read_ndjson(request.stream)
+
+    records = request.get_json(silent=True)
+    if not isinstance(records, list):
+        raise ImportFormatError("Envie uma lista JSON ou NDJSON (Content-Type: application/x-ndjson)")
+    return enumerate(records)
+
+
+def _read_ndjson(stream):
+    index = 0
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield index, json.loads(line)
+        except ValueError as e:
+            yield index, e
+        index += 1
+
+
+# ---------- validação ----------
+
+def _coerce(model, record, required):
+    """Converte um objeto JSON nas colunas do modelo; lança ValueError se inválido"""
+    if isinstance(record, Exception):
+        raise ValueError(f"JSON inválido: {record}")
+    if not isinstance(record, dict):
+        raise ValueError("Cada registro deve ser um objeto JSON")
+
+    # O ID é sempre gerado pelo banco
+    columns = {
+        attribute.key: attribute.columns[0] for attribute in inspect(model).column_attrs if attribute.key != "id"
+    }
+    unknown = set(record) - set(columns)
+    if unknown:
+        raise ValueError(f"Campos desconhecidos: {', '.join(sorted(unknown))}")
+    missing = [name for name in required if record.get(name) is None]
+    if missing:
+        raise ValueError(f"Campos obrigatórios ausentes: {', '.join(missing)}")
+
+    row = {}
+    for name, value in record.items():
+        column_type = columns[name].type
+        if value is None:
+            if not columns[name].nullable:
+                raise ValueError(f"Campo '{name}' não pode ser nulo")
+        elif isinstance(column_type, Numeric):
+            try:
+                value = Decimal(str(value))
+            except InvalidOperation:
+                raise ValueError(f"Campo '{name}' deve ser numérico")
+        elif isinstance(column_type, Integer):
+            if isinstance(value, bool) or not isinstance(value, int):
+                raise ValueError(f"Campo '{name}' deve ser inteiro")
+        elif isinstance(column_type, DateTime):
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Campo '{name}' deve ser uma data ISO 8601")
+        elif not isinstance(value, str):
+            raise ValueError(f"Campo '{name}' deve ser texto")
+        elif isinstance(column_type, String) and column_type.length and len(value) > column_type.length:
+            raise ValueError(f"Campo '{name}' excede {column_type.length} caracteres")
+        row[name] = value
+    return row
+
+
+# ---------- inserção ----------
+
+class ImportResult:
+    """Totais e erros por linha de uma importação"""
+
+    def __init__(self):
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+        self.user_ids = set()  # usuários afetados (invalidação de cache)
+
+    def error(self, index, message):
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"index": index, "error": message})
+
+    def as_dict(self):
+        return {
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda error: error["index"]),
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _insert_chunk(model, chunk, result):
+    """executemany do bloco; se o banco recusar, isola as linhas com SAVEPOINT"""
+    if not chunk:
+        return
+    try:
+        db.session.execute(insert(model), [row for _, row in chunk])
+        db.session.commit()
+        result.inserted += len(chunk)
+        return
+    except DBAPIError:
+        db.session.rollback()
+
+    # Fallback linha a linha para identificar as que falharam
+    for index, row in chunk:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(model), [row])
+            result.inserted += 1
+        except DBAPIError as e:
+            result.error(index, f"Erro no banco: {e.orig}")
+    db.session.commit()
+
+
+def _chunks(records):
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, IMPORT_CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_users(records):
+    """Insere usuários em blocos; logins repetidos (no banco ou no próprio lote) viram erro da linha"""
+    result = ImportResult()
+    required = ("login", "password", "binance_api_key", "binance_secret_key", "saldo_inicio")
+    seen = set()
+
+    for chunk in _chunks(records):
+        rows = []
+        for index, record in chunk:
+            try:
+                row = _coerce(User, record, required)
+            except ValueError as e:
+                result.error(index, str(e))
+                continue
+            if row["login"] in seen:
+                result.error(index, f"Login repetido: {row['login']}")
+                continue
+            seen.add(row["login"])
+            rows.append((index, row))
+
+        # Uma consulta por bloco para os logins já cadastrados
+        logins = [row["login"] for _, row in rows]
+        existing = set(db.session.scalars(select(User.login).where(User.login.in_(logins)))) if logins else set()
+        valid = []
+        for index, row in rows:
+            if row["login"] in existing:
+                result.error(index, f"Login já cadastrado: {row['login']}")
+            else:
+                valid.append((index, row))
+
+        _insert_chunk(User, valid, result)
+
+    return result
+
+
+def import_reports(records):
+    """Insere relatórios em blocos; ordens inexistentes viram erro da linha"""
+    result = ImportResult()
+
+    for chunk in _chunks(records):
+        rows = []
+        for index, record in chunk:
+            try:
+                rows.append((index, _coerce(TradeReport, record, ("order_id",))))
+            except ValueError as e:
+                result.error(index, str(e))
+
+        # Uma consulta por bloco: ordens existentes e seus donos
+        order_ids = {row["order_id"] for _, row in rows}
+        owners = dict(db.session.execute(
+            select(Order.id, Order.user_id).where(Order.id.in_(order_ids))
+        ).all()) if order_ids else {}
+
+        valid = []
+        for index, row in rows:
+            if row["order_id"] not in owners:
+                result.error(index, f"Ordem {row['order_id']} não encontrada")
+            else:
+                valid.append((index, row))
+
+        inserted_before = result.inserted
+        _insert_chunk(TradeReport, valid, result)
+        if result.inserted > inserted_before:
+            result.user_ids.update(owners[row["order_id"]] for _, row in valid)
+
+    return result
@@ -0,0 +1,118 @@
+# ================================
+# INSTRUMENTAÇÃO (LATÊNCIA, BANCO, BINANCE)
+# ================================
+# Métricas por requisição registradas com hooks before/after_request:
+# latência por rota (histograma), contagem por status e quantidade/tempo
+# de consultas SQL (eventos de cursor do SQLAlchemy acumulados em flask.g).
+# As chamadas à Binance são medidas por endpoint em observe_binance().
+# Tudo é exposto pela rota /metrics.
+
+import os
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from database.metrics import registry
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Quantidade de consultas por requisição (não é tempo)
+_QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+http_requests = registry.counter(
+    "http_requests_total", "Requisições HTTP por rota e status", ("method", "route", "status")
+)
+http_latency = registry.histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP por rota", ("method", "route")
+)
+request_queries = registry.histogram(
+    "http_request_db_queries", "Consultas SQL por requisição", ("route",), buckets=_QUERY_COUNT_BUCKETS
+)
+request_db_time = registry.histogram(
+    "http_request_db_seconds", "Tempo gasto em consultas SQL por requisição", ("route",)
+)
+db_queries = registry.counter("db_queries_total", "Consultas SQL executadas")
+db_query_seconds = registry.counter("db_query_seconds_total", "Tempo total das consultas SQL")
+binance_latency = registry.histogram(
+    "binance_request_duration_seconds", "Latência das chamadas à Binance por endpoint", ("endpoint",)
+)
+binance_requests = registry.counter(
+    "binance_requests_total", "Chamadas à Binance por endpoint e status", ("endpoint", "status")
+)
+binance_errors = registry.counter(
+    "binance_request_errors_total", "Chamadas à Binance com erro (status >= 400 ou falha de rede)", ("endpoint",)
+)
+
+
+def observe_binance(endpoint, status, seconds):
+    """Registra uma chamada à Binance; status é o código HTTP ou None em falha de rede"""
+    if not METRICS_ENABLED:
+        return
+    binance_latency.observe(seconds, endpoint=endpoint)
+    binance_requests.inc(endpoint=endpoint, status=status if status is not None else "error")
+    if status is None or status >= 400:
+        binance_errors.inc(endpoint=endpoint)
+
+
+# ---------- consultas SQL ----------
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if METRICS_ENABLED:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    db_queries.inc()
+    db_query_seconds.inc(elapsed)
+
+    # Acumula na requisição atual (threads de fundo não têm requisição)
+    if has_request_context() and "metrics_start" in g:
+        g.db_queries += 1
+        g.db_seconds += elapsed
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # Consulta com erro não chega ao after_cursor_execute: descarta o início
+    # para que a próxima consulta da conexão não use o instante errado
+    conn = exception_context.connection
+    starts = conn.info.get("query_start") if conn is not None else None
+    if starts:
+        starts.pop()
+
+
+# ---------- requisições HTTP ----------
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+    g.db_queries = 0
+    g.db_seconds = 0.0
+
+
+def _after_request(response):
+    start = g.pop("metrics_start", None)
+    if start is None:
+        return response
+
+    # Usa o padrão da rota (ex: /api/users/<int:user_id>) para limitar as séries
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    http_latency.observe(time.perf_counter() - start, method=request.method, route=route)
+    http_requests.inc(method=request.method, route=route, status=response.status_code)
+    request_queries.observe(g.db_queries, route=route)
+    request_db_time.observe(g.db_seconds, route=route)
+    return response
+
+
+def init_app(app):
+    """Registra os hooks de métricas na aplicação"""
+    if METRICS_ENABLED:
+        app.before_request(_before_request)
+        app.after_request(_after_request)
@@ -0,0 +1,208 @@
+# ================================
+# CANDLES (KLINES) E INDICADORES
+# ================================
+# Ingestão incremental de candles OHLCV da Binance para a tabela klines e
+# indicadores técnicos (SMA, EMA, RSI, VWAP) calculados de forma vetorizada
+# com NumPy sobre as colunas carregadas em arrays.
+
+import os
+
+import numpy as np
+import requests
+from sqlalchemy import func, insert, select
+
+from database.custom_models import db, Kline
+from database.market_data import BINANCE_API_URL, InvalidSymbolError
+from database.rate_limit import governed_get, WEIGHT_KLINES
+
+INTERVALS = ("1m", "3m", "5m", "15m", "30m", "1h", "2h", "4h", "6h", "8h", "12h", "1d", "3d", "1w", "1M")
+INDICATORS = ("sma", "ema", "rsi", "vwap")
+
+KLINES_PAGE_SIZE = 1000  # máximo aceito pela Binance por chamada
+KLINES_MAX_ROWS = int(os.getenv("KLINES_MAX_ROWS", 5000))
+
+_session = requests.Session()
+
+# Colunas carregadas em arrays (na ordem da resposta da Binance)
+_COLUMNS = ("open_time", "open", "high", "low", "close", "volume", "close_time", "quote_volume", "trades")
+
+
+# ---------- ingestão ----------
+
+def _fetch_page(symbol, interval, start_ms):
+    response = governed_get(
+        _session,
+        f"{BINANCE_API_URL.rstrip('/')}/api/v3/klines",
+        WEIGHT_KLINES,
+        params={"symbol": symbol, "interval": interval, "startTime": start_ms, "limit": KLINES_PAGE_SIZE},
+        timeout=float(os.getenv("BINANCE_HTTP_TIMEOUT", 5)),
+    )
+    if response.status_code != 200:
+        raise InvalidSymbolError([symbol])
+    return response.json()
+
+
+def ingest_klines(symbol, interval, start_ms=0):
+    """
+    Busca e grava os candles ainda não armazenados de um símbolo/intervalo
+
+    Continua a partir do último open_time gravado (incremental); o último
+    candle, ainda aberto, é regravado a cada execução. Retorna o número de
+    candles gravados.
+    """
+    symbol = symbol.upper()
+    last_open = db.session.scalar(
+        select(func.max(Kline.open_time)).where(Kline.symbol == symbol, Kline.interval == interval)
+    )
+    if last_open is not None:
+        # Remove o último candle (pode ter sido gravado ainda aberto)
+        db.session.execute(
+            Kline.__table__.delete().where(
+                Kline.symbol == symbol, Kline.interval == interval, Kline.open_time == last_open
+            )
+        )
+        start_ms = last_open
+
+    total = 0
+    while True:
+        page = _fetch_page(symbol, interval, start_ms)
+        if not page:
+            break
+
+        db.session.execute(insert(Kline), [
+            {
+                "symbol": symbol,
+                "interval": interval,
+                "open_time": row[0],
+                "open": float(row[1]),
+                "high": float(row[2]),
+                "low": float(row[3]),
+                "close": float(row[4]),
+                "volume": float(row[5]),
+                "close_time": row[6],
+                "quote_volume": float(row[7]),
+                "trades": row[8],
+            }
+            for row in page
+        ])
+        total += len(page)
+
+        if len(page) < KLINES_PAGE_SIZE:
+            break
+        start_ms = page[-1][0] + 1
+
+    db.session.commit()
+    return total
+
+
+# ---------- leitura em arrays ----------
+
+def load_klines(symbol, interval, start_ms=None, end_ms=None, limit=KLINES_MAX_ROWS):
+    """Carrega os candles mais recentes do intervalo como um dict coluna -> np.ndarray"""
+    statement = select(*(getattr(Kline, column) for column in _COLUMNS)).where(
+        Kline.symbol == symbol.upper(), Kline.interval == interval
+    )
+    if start_ms is not None:
+        statement = statement.where(Kline.open_time >= start_ms)
+    if end_ms is not None:
+        statement = statement.where(Kline.open_time < end_ms)
+    statement = statement.order_by(Kline.open_time.desc()).limit(min(limit, KLINES_MAX_ROWS))
+
+    rows = db.session.execute(statement).all()[::-1]
+    if not rows:
+        return {column: np.empty(0) for column in _COLUMNS}
+
+    matrix = np.array(rows, dtype=np.float64)
+    arrays = {column: matrix[:, index] for index, column in enumerate(_COLUMNS)}
+    arrays["open_time"] = arrays["open_time"].astype(np.int64)
+    arrays["close_time"] = arrays["close_time"].astype(np.int64)
+    return arrays
+
+
+# ---------- indicadores ----------
+
+def sma(values, period):
+    """Média móvel simples via soma acumulada"""
+    result = np.full(values.shape, np.nan)
+    if len(values) >= period:
+        cumulative = np.concatenate(([0.0], np.cumsum(values)))
+        result[period - 1:] = (cumulative[period:] - cumulative[:-period]) / period
+    return result
+
+
+def _smooth(values, alpha, seed, block=256):
+    """
+    Suavização exponencial y[t] = alpha*x[t] + (1-alpha)*y[t-1], com y[-1] = seed
+
+    Resolvida em blocos pela forma fechada
+    y[t] = (1-alpha)^(t+1) * (seed + sum(alpha*x[i] / (1-alpha)^(i+1)))
+    para evitar overflow das potências em séries longas.
+    """
+    if alpha == 1.0:
+        # period=1: sem memória (decay = 0 anularia as potências da forma fechada)
+        return values.astype(np.float64)
+    result = np.empty(values.shape)
+    decay = 1.0 - alpha
+    previous = seed
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        powers = decay ** np.arange(1, len(chunk) + 1)
+        result[start:start + len(chunk)] = powers * (previous + np.cumsum(alpha * chunk / powers))
+        previous = result[start + len(chunk) - 1]
+    return result
+
+
+def ema(values, period):
+    """Média móvel exponencial (semente = SMA do primeiro período)"""
+    result = np.full(values.shape, np.nan)
+    if len(values) >= period:
+        seed = values[:period].mean()
+        result[period - 1] = seed
+        result[period:] = _smooth(values[period:], 2.0 / (period + 1), seed)
+    return result
+
+
+def rsi(values, period):
+    """Índice de força relativa com a suavização de Wilder"""
+    result = np.full(values.shape, np.nan)
+    if len(values) <= period:
+        return result
+
+    changes = np.diff(values)
+    gains = np.clip(changes, 0, None)
+    losses = np.clip(-changes, 0, None)
+
+    average_gain = np.empty(len(changes) - period + 1)
+    average_loss = np.empty(len(changes) - period + 1)
+    average_gain[0], average_loss[0] = gains[:period].mean(), losses[:period].mean()
+    average_gain[1:] = _smooth(gains[period:], 1.0 / period, average_gain[0])
+    average_loss[1:] = _smooth(losses[period:], 1.0 / period, average_loss[0])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        relative = average_gain / average_loss
+        result[period:] = np.where(average_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + relative))
+    return result
+
+
+def vwap(high, low, close, volume, period=None):
+    """VWAP pelo preço típico: acumulado desde o início ou em janela móvel de period candles"""
+    typical_volume = (high + low + close) / 3.0 * volume
+    if period is None:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.cumsum(typical_volume) / np.cumsum(volume)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return sma(typical_volume, period) / sma(volume, period)
+
+
+def compute_indicator(arrays, name, period):
+    """Calcula o indicador pedido sobre os arrays carregados por load_klines"""
+    close = arrays["close"]
+    if name == "sma":
+        return sma(close, period)
+    if name == "ema":
+        return ema(close, period)
+    if name == "rsi":
+        return rsi(close, period)
+    if name == "vwap":
+        return vwap(arrays["high"], arrays["low"], close, arrays["volume"], period)
+    raise ValueError(f"Indicador inválido: {name}")
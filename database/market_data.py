@@ -0,0 +1,176 @@
+# ================================
+# CACHE DE PREÇOS DE MERCADO
+# ================================
+# Cache em memória dos preços da Binance com TTL por símbolo e
+# coalescência de requisições concorrentes (apenas uma busca por
+# símbolo em andamento por vez).
+
+import os
+import threading
+import time
+
+import requests
+
+from database.rate_limit import governed_get, WEIGHT_TICKER_PRICE, WEIGHT_TICKER_PRICE_ALL
+
+BINANCE_API_URL = os.getenv("BINANCE_API_URL", "https://api.binance.com")
+
+
+class InvalidSymbolError(Exception):
+    """Símbolo inexistente ou rejeitado pela Binance"""
+
+    def __init__(self, symbols):
+        self.symbols = list(symbols)
+        super().__init__(f"Símbolo(s) inválido(s): {', '.join(self.symbols)}")
+
+
+class _Pending:
+    """Busca em andamento compartilhada pelas threads que esperam o mesmo símbolo"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.error = None
+
+
+def _parse_symbol_ttls(raw):
+    """Converte 'BTCUSDT=1,ETHUSDT=5' em {'BTCUSDT': 1.0, 'ETHUSDT': 5.0}"""
+    ttls = {}
+    for item in filter(None, (part.strip() for part in (raw or "").split(","))):
+        symbol, _, ttl = item.partition("=")
+        ttls[symbol.strip().upper()] = float(ttl)
+    return ttls
+
+
+class PriceCache:
+    """
+    Cache de preços por símbolo
+
+    - get(symbol): preço de um símbolo, buscando na Binance se expirado
+    - get_many(symbols): vários preços, usando uma única busca em lote nas faltas
+    - refresh_all(): preenche o cache inteiro com uma chamada a ticker/price
+    """
+
+    _ALL = "*"  # chave de coalescência da busca em lote
+
+    def __init__(self, base_url=BINANCE_API_URL, ttl=2.0, symbol_ttls=None, timeout=5.0):
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.symbol_ttls = symbol_ttls or {}
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._prices = {}    # symbol -> (price, atualizado_em)
+        self._inflight = {}  # symbol -> _Pending
+        self._lock = threading.Lock()
+
+    # ---------- leitura do cache ----------
+
+    def _ttl_for(self, symbol):
+        return self.symbol_ttls.get(symbol, self.ttl)
+
+    def _fresh(self, symbol, now):
+        entry = self._prices.get(symbol)
+        if entry is not None and now - entry[1] < self._ttl_for(symbol):
+            return entry[0]
+        return None
+
+    def store(self, symbol, price, updated_at=None):
+        """Grava um preço no cache (também usado por fontes externas)"""
+        with self._lock:
+            self._prices[symbol] = (price, updated_at or time.monotonic())
+
+    # ---------- coalescência ----------
+
+    def _coalesced(self, key, fetch):
+        """Executa fetch() uma única vez por chave, mesmo com chamadas concorrentes"""
+        with self._lock:
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._inflight[key] = _Pending()
+
+        if not owner:
+            pending.event.wait(self.timeout * 2)
+            if pending.error is not None:
+                raise pending.error
+            return
+
+        try:
+            fetch()
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.event.set()
+
+    # ---------- chamadas à Binance ----------
+
+    def _fetch_symbol(self, symbol):
+        response = governed_get(
+            self.session,
+            f"{self.base_url}/api/v3/ticker/price",
+            WEIGHT_TICKER_PRICE,
+            params={"symbol": symbol},
+            timeout=self.timeout,
+        )
+        if response.status_code != 200:
+            raise InvalidSymbolError([symbol])
+        data = response.json()
+        self.store(data["symbol"], float(data["price"]))
+
+    def _fetch_all(self):
+        response = governed_get(
+            self.session, f"{self.base_url}/api/v3/ticker/price", WEIGHT_TICKER_PRICE_ALL, timeout=self.timeout
+        )
+        response.raise_for_status()
+        now = time.monotonic()
+        prices = {item["symbol"]: (float(item["price"]), now) for item in response.json()}
+        with self._lock:
+            self._prices.update(prices)
+
+    # ---------- API pública ----------
+
+    def refresh_all(self):
+        """Atualiza o cache inteiro com uma única chamada à Binance"""
+        self._coalesced(self._ALL, self._fetch_all)
+
+    def get(self, symbol):
+        """Retorna o preço de um símbolo, buscando na Binance apenas se expirado"""
+        symbol = symbol.upper()
+        price = self._fresh(symbol, time.monotonic())
+        if price is not None:
+            return price
+
+        self._coalesced(symbol, lambda: self._fetch_symbol(symbol))
+
+        price = self._fresh(symbol, time.monotonic())
+        if price is None:
+            raise InvalidSymbolError([symbol])
+        return price
+
+    def get_many(self, symbols):
+        """Retorna {symbol: price}; faltas múltiplas viram uma única busca em lote"""
+        symbols = [s.upper() for s in symbols]
+        now = time.monotonic()
+        missing = [s for s in symbols if self._fresh(s, now) is None]
+
+        if len(missing) == 1:
+            self.get(missing[0])
+        elif missing:
+            self.refresh_all()
+
+        now = time.monotonic()
+        prices = {s: self._fresh(s, now) for s in symbols}
+        invalid = [s for s, price in prices.items() if price is None]
+        if invalid:
+            raise InvalidSymbolError(invalid)
+        return prices
+
+
+# Instância única usada pelas rotas
+price_cache = PriceCache(
+    ttl=float(os.getenv("PRICE_CACHE_TTL", 2)),
+    symbol_ttls=_parse_symbol_ttls(os.getenv("PRICE_CACHE_SYMBOL_TTLS")),
+    timeout=float(os.getenv("BINANCE_HTTP_TIMEOUT", 5)),
+)
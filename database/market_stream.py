@@ -0,0 +1,201 @@
+# ================================
+# FEED DE MERCADO VIA WEBSOCKET
+# ================================
+# Assinante opcional dos streams bookTicker/miniTicker da Binance.
+# Roda em uma thread própria (loop asyncio) e mantém em memória a
+# tabela symbol -> (bid, ask, last, ts) usada pelas rotas de preço.
+# Opcionalmente assina também os diffs de profundidade (<symbol>@depth),
+# repassados ao callback on_depth (livro de ofertas local).
+
+import asyncio
+import json
+import os
+import threading
+import time
+
+MARKET_STREAM_URL = os.getenv("MARKET_STREAM_URL", "wss://stream.binance.com:9443")
+
+
+class MarketStream:
+    """
+    Assinante dos streams de mercado da Binance
+
+    - start()/stop(): controla a thread de fundo
+    - last_price(symbol): último preço se o dado estiver fresco, senão None
+    - quote(symbol): bid/ask/last do símbolo
+    - status(): reconexões, mensagens e idade dos dados por símbolo
+    """
+
+    def __init__(self, symbols, base_url=MARKET_STREAM_URL, max_age=5.0, depth_symbols=()):
+        self.symbols = [s.upper() for s in symbols]
+        self.depth_symbols = [s.upper() for s in depth_symbols]
+        self.on_depth = None  # callback(event) para eventos depthUpdate
+        self.base_url = base_url.rstrip("/")
+        self.max_age = max_age
+
+        self._quotes = {}  # symbol -> {"bid", "ask", "last", "ts", "last_ts"}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._loop = None
+        self._task = None
+        self._stopping = threading.Event()
+
+        # Estatísticas do feed
+        self.connected = False
+        self.reconnects = 0
+        self.messages = 0
+        self.stale_reads = 0
+        self.last_error = None
+
+    @property
+    def stream_url(self):
+        streams = [
+            f"{symbol.lower()}@{kind}" for symbol in self.symbols for kind in ("bookTicker", "miniTicker")
+        ]
+        streams += [f"{symbol.lower()}@depth@100ms" for symbol in self.depth_symbols]
+        streams = "/".join(streams)
+        return f"{self.base_url}/stream?streams={streams}"
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # ---------- ciclo de vida ----------
+
+    def start(self):
+        """Inicia a thread de fundo (idempotente)"""
+        if self.running or not (self.symbols or self.depth_symbols):
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._thread_main, name="market-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Interrompe o feed e aguarda a thread terminar"""
+        self._stopping.set()
+        if self._loop is not None and self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _thread_main(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._task = self._loop.create_task(self._run())
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+            self._loop = None
+            self._task = None
+
+    async def _run(self):
+        import websockets
+
+        backoff = 1
+        while not self._stopping.is_set():
+            try:
+                async with websockets.connect(self.stream_url, ping_interval=20) as ws:
+                    self.connected = True
+                    backoff = 1
+                    async for raw in ws:
+                        self.handle_message(json.loads(raw))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+            finally:
+                self.connected = False
+
+            if self._stopping.is_set():
+                break
+
+            # Reconexão com backoff exponencial
+            self.reconnects += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+    # ---------- processamento das mensagens ----------
+
+    def handle_message(self, message):
+        """Atualiza a tabela a partir de uma mensagem bookTicker ou miniTicker"""
+        data = message.get("data", message)
+        symbol = data.get("s")
+        if not symbol:
+            return
+
+        # Diffs de profundidade vão para o livro de ofertas
+        if data.get("e") == "depthUpdate":
+            self.messages += 1
+            if self.on_depth is not None:
+                try:
+                    self.on_depth(data)
+                except Exception as e:
+                    self.last_error = str(e)
+            return
+
+        now = time.time()
+        with self._lock:
+            self.messages += 1
+            quote = self._quotes.setdefault(
+                symbol, {"bid": None, "ask": None, "last": None, "ts": None, "last_ts": None}
+            )
+            if data.get("e") == "24hrMiniTicker":
+                quote["last"] = float(data["c"])
+                quote["last_ts"] = now
+            elif "b" in data and "a" in data:
+                quote["bid"] = float(data["b"])
+                quote["ask"] = float(data["a"])
+            quote["ts"] = now
+
+    # ---------- leitura ----------
+
+    def quote(self, symbol):
+        """Retorna uma cópia do bid/ask/last do símbolo (ou None)"""
+        with self._lock:
+            quote = self._quotes.get(symbol.upper())
+            return dict(quote) if quote is not None else None
+
+    def last_price(self, symbol):
+        """Retorna o último preço do símbolo se estiver fresco; senão None"""
+        with self._lock:
+            quote = self._quotes.get(symbol.upper())
+            if quote and quote["last_ts"] is not None and time.time() - quote["last_ts"] <= self.max_age:
+                return quote["last"]
+            self.stale_reads += 1
+            return None
+
+    def status(self):
+        """Resumo do estado do feed para monitoramento"""
+        now = time.time()
+        with self._lock:
+            symbols = {
+                symbol: {
+                    "bid": quote["bid"],
+                    "ask": quote["ask"],
+                    "last": quote["last"],
+                    "age": round(now - quote["ts"], 3) if quote["ts"] is not None else None,
+                    "stale": quote["ts"] is None or now - quote["ts"] > self.max_age,
+                }
+                for symbol, quote in self._quotes.items()
+            }
+        return {
+            "running": self.running,
+            "connected": self.connected,
+            "reconnects": self.reconnects,
+            "messages": self.messages,
+            "stale_reads": self.stale_reads,
+            "last_error": self.last_error,
+            "max_age": self.max_age,
+            "symbols": symbols,
+        }
+
+
+# Instância única usada pelas rotas (iniciada em app.py se habilitada)
+market_stream = MarketStream(
+    symbols=[s.strip() for s in os.getenv("MARKET_STREAM_SYMBOLS", "").split(",") if s.strip()],
+    max_age=float(os.getenv("MARKET_STREAM_MAX_AGE", 5)),
+    depth_symbols=[s.strip() for s in os.getenv("MARKET_DEPTH_SYMBOLS", "").split(",") if s.strip()],
+)
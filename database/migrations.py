@@ -0,0 +1,76 @@
+# ================================
+# MIGRAÇÃO DE BANCOS EXISTENTES
+# ================================
+# db.create_all() só cria tabelas novas; colunas e índices adicionados
+# (ou colunas de texto ampliadas) depois da criação precisam ser aplicados
+# em bancos já existentes.
+
+from sqlalchemy import inspect, text
+
+from database.custom_models import db
+
+
+def _add_missing_columns(connection, inspector):
+    """Executa ALTER TABLE ... ADD COLUMN para colunas do modelo ausentes no banco"""
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            quote = connection.dialect.identifier_preparer.quote
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.execute(text(
+                f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"
+            ))
+
+
+def _widen_string_columns(connection, inspector):
+    """Amplia colunas VARCHAR menores no banco do que no modelo (MySQL e PostgreSQL)"""
+    dialect = connection.dialect.name
+    if dialect not in ("mysql", "postgresql"):
+        # SQLite não impõe o tamanho do VARCHAR
+        return
+
+    quote = connection.dialect.identifier_preparer.quote
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"]: column["type"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            current = existing.get(column.name)
+            wanted = getattr(column.type, "length", None)
+            current_length = getattr(current, "length", None)
+            if wanted is None or current_length is None or current_length >= wanted:
+                continue
+            column_type = column.type.compile(dialect=connection.dialect)
+            if dialect == "mysql":
+                null = "NULL" if column.nullable else "NOT NULL"
+                connection.execute(text(
+                    f"ALTER TABLE {quote(table.name)} MODIFY COLUMN {quote(column.name)} {column_type} {null}"
+                ))
+            else:
+                connection.execute(text(
+                    f"ALTER TABLE {quote(table.name)} ALTER COLUMN {quote(column.name)} TYPE {column_type}"
+                ))
+
+
+def _create_missing_indexes(connection, inspector):
+    """Cria os índices declarados nos modelos que ainda não existem no banco"""
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(connection)
+
+
+def upgrade_schema():
+    """Aplica as alterações de esquema pendentes (deve rodar dentro de um app context)"""
+    with db.engine.begin() as connection:
+        inspector = inspect(connection)
+        _add_missing_columns(connection, inspector)
+        _widen_string_columns(connection, inspector)
+        _create_missing_indexes(connection, inspector)
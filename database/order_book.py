@@ -0,0 +1,300 @@
+# ================================
+# LIVRO DE OFERTAS LOCAL (DEPTH)
+# ================================
+# Livro de ofertas por símbolo montado a partir de um snapshot REST e
+# mantido com os diffs de profundidade da Binance (stream <symbol>@depth).
+# Os níveis ficam em arrays ordenados (bisect) de preços e quantidades:
+# topo do livro, spread e VWAP custam O(N) nos N níveis lidos.
+#
+# Os snapshots dos símbolos do stream são buscados em um executor (no
+# máximo um por símbolo), fora do loop asyncio do MarketStream; enquanto
+# isso os diffs ficam no buffer do livro e são aplicados depois do snapshot.
+
+import os
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from bisect import bisect_left
+
+import requests
+
+from database.market_data import BINANCE_API_URL, InvalidSymbolError
+from database.rate_limit import governed_get, depth_weight, RateLimitExceeded
+
+DEPTH_SNAPSHOT_LIMIT = int(os.getenv("DEPTH_SNAPSHOT_LIMIT", 1000))
+DEPTH_SNAPSHOT_TTL = float(os.getenv("DEPTH_SNAPSHOT_TTL", 2))
+DEPTH_SNAPSHOT_WORKERS = int(os.getenv("DEPTH_SNAPSHOT_WORKERS", 2))
+DEPTH_SNAPSHOT_RETRY = float(os.getenv("DEPTH_SNAPSHOT_RETRY", 1))  # espera após snapshot com erro
+DEPTH_BUFFER_MAX = int(os.getenv("DEPTH_BUFFER_MAX", 10000))  # diffs guardados sem snapshot
+
+INVALID_SYMBOL_CODE = -1121  # código de erro da Binance para símbolo inexistente
+
+
+class _Ladder:
+    """
+    Um lado do livro: preços em ordem crescente com as quantidades em paralelo
+
+    Para bids os preços são guardados negativos, de modo que a posição 0
+    é sempre o melhor preço nos dois lados.
+    """
+
+    def __init__(self, descending):
+        self.sign = -1.0 if descending else 1.0
+        self.prices = array("d")
+        self.quantities = array("d")
+
+    def clear(self):
+        self.prices = array("d")
+        self.quantities = array("d")
+
+    def update(self, price, quantity):
+        key = price * self.sign
+        index = bisect_left(self.prices, key)
+        exists = index < len(self.prices) and self.prices[index] == key
+        if quantity == 0:
+            if exists:
+                del self.prices[index]
+                del self.quantities[index]
+        elif exists:
+            self.quantities[index] = quantity
+        else:
+            self.prices.insert(index, key)
+            self.quantities.insert(index, quantity)
+
+    def best(self):
+        return self.prices[0] * self.sign if self.prices else None
+
+    def top(self, depth):
+        return [[self.prices[i] * self.sign, self.quantities[i]] for i in range(min(depth, len(self.prices)))]
+
+    def vwap(self, quantity):
+        """Preço médio para executar quantity consumindo os níveis; None se faltar liquidez"""
+        remaining = quantity
+        notional = 0.0
+        for i in range(len(self.prices)):
+            filled = min(remaining, self.quantities[i])
+            notional += filled * self.prices[i] * self.sign
+            remaining -= filled
+            if remaining <= 0:
+                return notional / quantity
+        return None
+
+
+class OrderBook:
+    """
+    Livro de ofertas de um símbolo
+
+    - load_snapshot(snapshot): carrega o resultado de GET /api/v3/depth e
+      aplica os diffs do buffer (retorna False se o livro ainda precisar
+      de um snapshot mais novo)
+    - apply_diff(event): aplica um evento depthUpdate (retorna False se
+      houver lacuna na sequência e o livro precisar de novo snapshot)
+
+    Em uma lacuna o evento e os seguintes ficam no buffer e são aplicados
+    sobre o próximo snapshot, sem descartar nada.
+    """
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.bids = _Ladder(descending=True)
+        self.asks = _Ladder(descending=False)
+        self.last_update_id = None
+        self.synced = False
+        self.updated_at = None
+        self._buffer = []  # diffs recebidos antes do snapshot
+        self._lock = threading.Lock()
+
+    def load_snapshot(self, snapshot):
+        with self._lock:
+            self.bids.clear()
+            self.asks.clear()
+            for price, quantity in snapshot["bids"]:
+                self.bids.update(float(price), float(quantity))
+            for price, quantity in snapshot["asks"]:
+                self.asks.update(float(price), float(quantity))
+            self.last_update_id = snapshot["lastUpdateId"]
+            self.synced = True
+            self.updated_at = time.time()
+
+            # Aplica os diffs que chegaram enquanto o snapshot era buscado; em uma
+            # lacuna, o evento e os seguintes voltam ao buffer para o próximo snapshot
+            buffered, self._buffer = self._buffer, []
+            for index, event in enumerate(buffered):
+                if not self._apply(event):
+                    self._buffer.extend(buffered[index + 1:])
+                    return False
+            return True
+
+    def apply_diff(self, event):
+        with self._lock:
+            if not self.synced:
+                self._buffer.append(event)
+                if len(self._buffer) > DEPTH_BUFFER_MAX:
+                    # Snapshot atrasado demais: descarta os diffs mais antigos
+                    del self._buffer[:len(self._buffer) - DEPTH_BUFFER_MAX]
+                return False
+            return self._apply(event)
+
+    def _apply(self, event):
+        first_id, final_id = event["U"], event["u"]
+
+        # Evento antigo, já contido no snapshot
+        if final_id <= self.last_update_id:
+            return True
+
+        # Lacuna na sequência: o livro precisa de um novo snapshot
+        # (o evento fica guardado para ser aplicado depois dele)
+        if first_id > self.last_update_id + 1:
+            self.synced = False
+            self._buffer.append(event)
+            return False
+
+        for price, quantity in event["b"]:
+            self.bids.update(float(price), float(quantity))
+        for price, quantity in event["a"]:
+            self.asks.update(float(price), float(quantity))
+        self.last_update_id = final_id
+        self.updated_at = time.time()
+        return True
+
+    def summary(self, depth=10, quantity=None):
+        """Topo do livro, spread e (opcionalmente) VWAP de compra/venda para quantity"""
+        with self._lock:
+            best_bid, best_ask = self.bids.best(), self.asks.best()
+            result = {
+                "symbol": self.symbol,
+                "last_update_id": self.last_update_id,
+                "bids": self.bids.top(depth),
+                "asks": self.asks.top(depth),
+                "spread": best_ask - best_bid if best_bid is not None and best_ask is not None else None,
+                "mid": (best_ask + best_bid) / 2 if best_bid is not None and best_ask is not None else None,
+            }
+            if quantity:
+                # Compra consome os asks; venda consome os bids
+                result["vwap"] = {"buy": self.asks.vwap(quantity), "sell": self.bids.vwap(quantity)}
+            return result
+
+
+class OrderBookManager:
+    """
+    Livros de todos os símbolos
+
+    Quando o stream de profundidade está ativo os livros são mantidos pelos
+    diffs; caso contrário um novo snapshot é buscado quando o atual tem
+    mais de DEPTH_SNAPSHOT_TTL segundos. Fora do stream o livro só é criado
+    depois de um snapshot válido (símbolos inválidos não ocupam memória).
+    """
+
+    def __init__(self, base_url=BINANCE_API_URL, timeout=5.0, workers=DEPTH_SNAPSHOT_WORKERS):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.workers = workers
+        self.session = requests.Session()
+        self.streaming = set()  # símbolos mantidos pelo stream de diffs
+        self._books = {}
+        self._snapshots = {}  # symbol -> Future do snapshot em andamento
+        self._failed_at = {}  # symbol -> instante do último snapshot com erro
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _book(self, symbol):
+        with self._lock:
+            book = self._books.get(symbol)
+            if book is None:
+                book = self._books[symbol] = OrderBook(symbol)
+            return book
+
+    def download_snapshot(self, symbol):
+        """GET /api/v3/depth (bloqueante: passa pelo governador de peso)"""
+        response = governed_get(
+            self.session,
+            f"{self.base_url}/api/v3/depth",
+            depth_weight(DEPTH_SNAPSHOT_LIMIT),
+            params={"symbol": symbol, "limit": DEPTH_SNAPSHOT_LIMIT},
+            timeout=self.timeout,
+        )
+        if response.status_code in (429, 418):
+            # O governador já bloqueou o host até o Retry-After
+            raise RateLimitExceeded(float(response.headers.get("Retry-After") or 60), "banned")
+        if response.status_code != 200:
+            try:
+                code = response.json().get("code")
+            except (ValueError, AttributeError):
+                code = None
+            if code == INVALID_SYMBOL_CODE:
+                raise InvalidSymbolError([symbol])
+            # Indisponibilidade ou outro erro da Binance: requests.HTTPError
+            response.raise_for_status()
+        return response.json()
+
+    def fetch_snapshot(self, symbol):
+        """Busca e carrega o snapshot na thread atual; retorna True se o livro ficou sincronizado"""
+        snapshot = self.download_snapshot(symbol)
+        return self._book(symbol).load_snapshot(snapshot)
+
+    def request_snapshot(self, symbol):
+        """
+        Agenda o snapshot do símbolo no executor e retorna o Future
+
+        Se já houver um snapshot do símbolo em andamento, retorna o mesmo
+        Future (no máximo um por símbolo).
+        """
+        with self._lock:
+            future = self._snapshots.get(symbol)
+            if future is None:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="depth-snapshot")
+                future = self._snapshots[symbol] = self._executor.submit(self._snapshot_job, symbol)
+            return future
+
+    def _snapshot_job(self, symbol):
+        try:
+            synced = self.fetch_snapshot(symbol)
+        except Exception:
+            with self._lock:
+                # A espera após erro só vale para os símbolos do stream (conjunto fixo)
+                if symbol in self.streaming:
+                    self._failed_at[symbol] = time.monotonic()
+                del self._snapshots[symbol]
+            raise
+        with self._lock:
+            self._failed_at.pop(symbol, None)
+            del self._snapshots[symbol]
+        if not synced:
+            # Snapshot anterior aos diffs do buffer: busca outro
+            self.request_snapshot(symbol)
+        return synced
+
+    def handle_diff(self, event):
+        """Recebe um evento depthUpdate do stream (no loop asyncio: nunca bloqueia)"""
+        symbol = event["s"]
+        if self._book(symbol).apply_diff(event):
+            return
+        # Primeiro diff ou lacuna na sequência: o diff fica no buffer e o snapshot
+        # é buscado no executor (após um erro, espera DEPTH_SNAPSHOT_RETRY)
+        with self._lock:
+            failed_at = self._failed_at.get(symbol)
+        if failed_at is None or time.monotonic() - failed_at >= DEPTH_SNAPSHOT_RETRY:
+            self.request_snapshot(symbol)
+
+    def get(self, symbol):
+        symbol = symbol.upper()
+        if symbol in self.streaming:
+            book = self._book(symbol)
+            if not book.synced:
+                # Aguarda o snapshot em andamento (ou agenda um) em vez de buscar outro
+                self.request_snapshot(symbol).result(timeout=self.timeout * 2)
+            return book
+        with self._lock:
+            book = self._books.get(symbol)
+        if book is None or not book.synced or time.time() - book.updated_at >= DEPTH_SNAPSHOT_TTL:
+            # Requisições simultâneas do mesmo símbolo compartilham um único download
+            self.request_snapshot(symbol).result(timeout=self.timeout * 2)
+            with self._lock:
+                book = self._books[symbol]
+        return book
+
+
+# Instância única usada pelas rotas
+order_books = OrderBookManager(timeout=float(os.getenv("BINANCE_HTTP_TIMEOUT", 5)))
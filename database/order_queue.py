@@ -0,0 +1,392 @@
+# ================================
+# PIPELINE ASSÍNCRONO DE ORDENS
+# ================================
+# Modo opcional em que a rota de criação de ordem apenas valida e
+# enfileira a ordem, devolvendo 202 com um tracking_id. Um pool de
+# workers envia a ordem à Binance e grava o Order fora da thread da
+# requisição. A fila pode ser persistida em um arquivo SQLite.
+#
+# Com vários processos (workers do gunicorn) o journal é compartilhado:
+# cada processo tem um dono (owner) com heartbeat na tabela queue_owners,
+# um job só é enviado depois de reivindicado com um UPDATE condicional
+# (QUEUED -> SUBMITTING) e apenas os jobs de donos sem heartbeat há mais
+# de ORDER_QUEUE_LEASE segundos são recuperados. O status dos jobs é lido
+# do journal, valendo para qualquer worker (sem ORDER_QUEUE_JOURNAL, apenas
+# o processo que recebeu a ordem conhece o seu status).
+#
+# A resposta da Binance é gravada no journal (PLACED) antes do INSERT do
+# Order. Se o banco falhar, o INSERT é repetido (ORDER_QUEUE_DB_RETRIES
+# vezes) e, se ainda assim falhar, o job continua PLACED e (com o journal) é
+# retomado pela recuperação após ORDER_QUEUE_LEASE segundos, sem reenviar a
+# ordem.
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from sqlalchemy import select
+
+from database.binance_clients import client_registry
+from database.credentials import credential_cache
+from database.custom_models import db, Order
+from database.http_cache import bump_user
+from database.metrics import registry
+from database.order_service import send_binance_order, record_binance_response
+from database.positions import apply_order
+
+ORDER_ASYNC_ENABLED = os.getenv("ORDER_ASYNC_ENABLED", "false").lower() == "true"
+ORDER_QUEUE_LEASE = float(os.getenv("ORDER_QUEUE_LEASE", 30))
+ORDER_QUEUE_DB_RETRIES = int(os.getenv("ORDER_QUEUE_DB_RETRIES", 3))
+
+# Estados de um job
+QUEUED = "QUEUED"
+SUBMITTING = "SUBMITTING"
+PLACED = "PLACED"  # aceita pela Binance, Order local ainda não gravado
+DONE = "DONE"
+FAILED = "FAILED"
+UNKNOWN = "UNKNOWN"  # interrompido durante o envio (reinício do processo)
+
+# Métricas da fila
+queue_depth = registry.gauge("order_queue_depth", "Ordens aguardando na fila assíncrona")
+queue_inflight = registry.gauge("order_queue_inflight", "Ordens sendo enviadas pelos workers")
+queue_jobs = registry.counter("order_queue_jobs_total", "Ordens processadas pela fila, por estado final", ("status",))
+queue_rejected = registry.counter("order_queue_rejected_total", "Ordens recusadas por fila cheia")
+
+
+class QueueFullError(Exception):
+    """Fila no limite de capacidade (backpressure)"""
+
+
+class _Journal:
+    """Persistência opcional dos jobs em um arquivo SQLite (compartilhado entre processos)"""
+
+    _COLUMNS = "tracking_id, user_id, payload, status, order_id, result, error, updated_at, owner"
+
+    def __init__(self, path, owner):
+        self.owner = owner
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._lock = threading.Lock()
+        # WAL: leitores de outros processos não bloqueiam as escritas
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS order_jobs ("
+            "tracking_id TEXT PRIMARY KEY, user_id INTEGER, payload TEXT, status TEXT, "
+            "order_id INTEGER, result TEXT, error TEXT, updated_at REAL, owner TEXT)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(order_jobs)")}
+        if "owner" not in columns:
+            # Journal criado antes da coluna owner: jobs antigos ficam sem dono (recuperáveis)
+            self._conn.execute("ALTER TABLE order_jobs ADD COLUMN owner TEXT")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS queue_owners (owner TEXT PRIMARY KEY, heartbeat_at REAL)")
+
+    def save(self, job):
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO order_jobs ({self._COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job["tracking_id"], job["user_id"], json.dumps(job["order_data"]), job["status"],
+                    job["order_id"], json.dumps(job["binance_response"]), job["error"], job["updated_at"],
+                    self.owner,
+                ),
+            )
+
+    def load(self, tracking_id):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM order_jobs WHERE tracking_id = ?", (tracking_id,)
+            ).fetchone()
+        return self._to_job(row) if row else None
+
+    def claim(self, tracking_id, status=QUEUED):
+        """
+        Reivindica um job deste processo ainda no estado status; True se conseguiu
+
+        QUEUED passa a SUBMITTING; PLACED (apenas gravar o Order) continua PLACED.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE order_jobs SET status = ?, updated_at = ? WHERE tracking_id = ? AND status = ? AND owner = ?",
+                (SUBMITTING if status == QUEUED else status, time.time(), tracking_id, status, self.owner),
+            )
+        return cursor.rowcount == 1
+
+    def heartbeat(self):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO queue_owners (owner, heartbeat_at) VALUES (?, ?)", (self.owner, time.time())
+            )
+
+    def remove_owner(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM queue_owners WHERE owner = ?", (self.owner,))
+
+    def take_orphans(self, lease):
+        """
+        Assume os jobs de donos sem heartbeat dentro de lease segundos
+
+        Retorna os jobs QUEUED assumidos (para reenfileirar); os SUBMITTING
+        órfãos viram UNKNOWN, pois a ordem pode ter chegado à Binance. Também
+        retorna os PLACED órfãos ou parados há mais de lease segundos (inclusive
+        deste processo), cujo Order local ainda precisa ser gravado.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                live = "SELECT owner FROM queue_owners WHERE heartbeat_at >= ?"
+                self._conn.execute(
+                    f"UPDATE order_jobs SET status = ?, updated_at = ?, error = ? "
+                    f"WHERE status = ? AND (owner IS NULL OR owner NOT IN ({live}))",
+                    (UNKNOWN, now, "Processo encerrado durante o envio", SUBMITTING, now - lease),
+                )
+                rows = self._conn.execute(
+                    f"SELECT {self._COLUMNS} FROM order_jobs "
+                    f"WHERE (status = ? AND (owner IS NULL OR owner NOT IN ({live}))) "
+                    f"OR (status = ? AND (owner IS NULL OR owner NOT IN ({live}) OR updated_at < ?)) "
+                    f"ORDER BY updated_at",
+                    (QUEUED, now - lease, PLACED, now - lease, now - lease),
+                ).fetchall()
+                # updated_at renovado: um PLACED retomado não é assumido de novo enquanto é gravado
+                self._conn.executemany(
+                    "UPDATE order_jobs SET owner = ?, updated_at = ? WHERE tracking_id = ?",
+                    [(self.owner, now, row[0]) for row in rows],
+                )
+                self._conn.execute("DELETE FROM queue_owners WHERE heartbeat_at < ?", (now - lease,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [self._to_job(row) for row in rows]
+
+    @staticmethod
+    def _to_job(row):
+        tracking_id, user_id, payload, status, order_id, result, error, updated_at, _ = row
+        return {
+            "tracking_id": tracking_id,
+            "user_id": user_id,
+            "order_data": json.loads(payload),
+            "status": status,
+            "order_id": order_id,
+            "binance_response": json.loads(result) if result else None,
+            "error": error,
+            "updated_at": updated_at,
+        }
+
+
+class OrderQueue:
+    """
+    Fila de ordens com pool de workers
+
+    - submit(user_id, order_data): enfileira e retorna o tracking_id
+      (QueueFullError quando a fila atinge max_depth)
+    - status(tracking_id): estado atual do job
+    """
+
+    def __init__(self, workers=4, max_depth=1000, history_size=10000, journal_path=None, lease=ORDER_QUEUE_LEASE):
+        self.workers = workers
+        self.history_size = history_size
+        self.journal_path = journal_path
+        self.lease = lease
+        self._queue = queue.Queue(maxsize=max_depth)
+        self._jobs = OrderedDict()  # tracking_id -> job (limitado a history_size)
+        self._lock = threading.Lock()
+        self._journal = None
+        self._threads = []
+        self._app = None
+        self._inflight = 0
+
+        queue_depth.set_function(self._queue.qsize)
+        queue_inflight.set_function(lambda: self._inflight)
+
+    def init_app(self, app):
+        """Guarda o app (para o app context dos workers) e inicia o pool"""
+        self._app = app
+        if self.journal_path and self._journal is None:
+            # Dono criado aqui (após o fork), um por processo
+            self._journal = _Journal(self.journal_path, owner=f"{os.getpid()}-{uuid.uuid4().hex[:8]}")
+            self._journal.heartbeat()
+            self._recover()
+            threading.Thread(target=self._keepalive, name="order-queue-lease", daemon=True).start()
+        self.start()
+
+    def start(self):
+        if self._threads:
+            return
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"order-worker-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    # ---------- registro dos jobs ----------
+
+    def _save(self, job):
+        job["updated_at"] = time.time()
+        with self._lock:
+            self._jobs[job["tracking_id"]] = job
+            self._jobs.move_to_end(job["tracking_id"])
+            while len(self._jobs) > self.history_size:
+                self._jobs.popitem(last=False)
+        if self._journal is not None:
+            self._journal.save(job)
+
+    def _recover(self):
+        """
+        Reenfileira os jobs QUEUED de processos encerrados e os PLACED pendentes
+        (os interrompidos no envio ficam UNKNOWN)
+        """
+        for job in self._journal.take_orphans(self.lease):
+            with self._lock:
+                self._jobs[job["tracking_id"]] = job
+            self._queue.put(job["tracking_id"])
+
+    def _keepalive(self):
+        """Renova o heartbeat deste processo e recupera jobs de processos que morreram"""
+        while True:
+            time.sleep(self.lease / 3)
+            try:
+                self._journal.heartbeat()
+                self._recover()
+            except sqlite3.Error:
+                pass
+
+    # ---------- API pública ----------
+
+    def submit(self, user_id, order_data):
+        """Enfileira uma ordem e retorna o tracking_id"""
+        job = {
+            "tracking_id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "order_data": order_data,
+            "status": QUEUED,
+            "order_id": None,
+            "binance_response": None,
+            "error": None,
+            "updated_at": None,
+        }
+        if self._queue.full():
+            queue_rejected.inc()
+            raise QueueFullError("Fila de ordens cheia, tente novamente em instantes")
+
+        self._save(job)
+        try:
+            self._queue.put_nowait(job["tracking_id"])
+        except queue.Full:
+            job["status"] = FAILED
+            job["error"] = "Fila de ordens cheia"
+            self._save(job)
+            queue_rejected.inc()
+            raise QueueFullError("Fila de ordens cheia, tente novamente em instantes")
+        return job["tracking_id"]
+
+    def status(self, tracking_id):
+        """Retorna uma cópia do job ou None (do journal, se houver: vale para jobs de qualquer processo)"""
+        if self._journal is not None:
+            return self._journal.load(tracking_id)
+        with self._lock:
+            job = self._jobs.get(tracking_id)
+        return dict(job) if job is not None else None
+
+    def depth(self):
+        return self._queue.qsize()
+
+    # ---------- workers ----------
+
+    def _worker(self):
+        while True:
+            tracking_id = self._queue.get()
+            with self._lock:
+                job = self._jobs.get(tracking_id)
+            if job is None:
+                job = self._journal.load(tracking_id) if self._journal is not None else None
+            if job is None:
+                continue
+            # Reivindica o job no journal: outro processo pode tê-lo assumido
+            if self._journal is not None and not self._journal.claim(tracking_id, job["status"]):
+                continue
+
+            with self._lock:
+                self._inflight += 1
+            try:
+                with self._app.app_context():
+                    self._process(job)
+            finally:
+                with self._lock:
+                    self._inflight -= 1
+                queue_jobs.inc(status=job["status"])
+
+    def _process(self, job):
+        """Envia a ordem para a Binance (se ainda não enviada) e grava o Order local"""
+        order_data = dict(job["order_data"])
+        if job["status"] != PLACED:
+            try:
+                credentials = credential_cache.get(job["user_id"])
+                if credentials is None:
+                    raise LookupError(f"Usuário {job['user_id']} não encontrado")
+
+                job["status"] = SUBMITTING
+                self._save(job)
+
+                client = client_registry.get(job["user_id"], *credentials)
+                job["binance_response"] = send_binance_order(client, order_data)
+            except Exception as e:
+                job["status"] = FAILED
+                job["error"] = str(e)
+                self._save(job)
+                return
+
+            # Resposta no journal antes de qualquer escrita no banco
+            job["status"] = PLACED
+            self._save(job)
+
+        for attempt in range(ORDER_QUEUE_DB_RETRIES):
+            try:
+                order = self._store(order_data, job["binance_response"])
+                break
+            except Exception as e:
+                db.session.rollback()
+                job["error"] = f"Ordem aceita pela Binance; gravação local pendente: {e}"
+                self._save(job)
+                if attempt + 1 < ORDER_QUEUE_DB_RETRIES:
+                    time.sleep(min(0.5 * 2 ** attempt, 5))
+        else:
+            return  # continua PLACED: retomado por _recover sem reenviar à Binance
+
+        job["order_id"] = order.id
+        job["status"] = DONE
+        job["error"] = None
+        self._save(job)
+
+    @staticmethod
+    def _store(order_data, binance_response):
+        """Grava o Order (uma só vez por orderId da Binance) e atualiza a posição"""
+        binance_order_id = (binance_response or {}).get("orderId")
+        if binance_order_id is not None:
+            # Commit anterior pode ter sido gravado apesar do erro (ex: conexão perdida)
+            existing = db.session.execute(
+                select(Order).where(
+                    Order.symbol == order_data.get("symbol"), Order.binance_order_id == binance_order_id
+                )
+            ).scalar_one_or_none()
+            if existing is not None:
+                return existing
+
+        order = Order(**order_data)
+        record_binance_response(order, binance_response)
+        db.session.add(order)
+        apply_order(order)
+        db.session.commit()
+        bump_user(order.user_id)
+        return order
+
+
+# Instância única usada pelas rotas (iniciada em app.py se habilitada)
+order_queue = OrderQueue(
+    workers=int(os.getenv("ORDER_QUEUE_WORKERS", 4)),
+    max_depth=int(os.getenv("ORDER_QUEUE_MAX_DEPTH", 1000)),
+    journal_path=os.getenv("ORDER_QUEUE_JOURNAL"),
+)
@@ -0,0 +1,80 @@
+# ================================
+# ENVIO DE ORDENS PARA A BINANCE
+# ================================
+# Funções compartilhadas pelas rotas de ordem: envio de uma ordem
+# individual e despacho concorrente de lotes de ordens.
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from database.custom_models import Order
+from database.rate_limit import governed_call
+
+# Limites do envio em lote
+ORDER_BATCH_WORKERS = int(os.getenv("ORDER_BATCH_WORKERS", 8))
+ORDER_BATCH_MAX_SIZE = int(os.getenv("ORDER_BATCH_MAX_SIZE", 100))
+
+# Pool compartilhado para não criar threads a cada lote
+_batch_executor = ThreadPoolExecutor(max_workers=ORDER_BATCH_WORKERS, thread_name_prefix="order-batch")
+
+
+def normalize_order(order_data, user_id):
+    """
+    Converte o JSON da ordem nos campos do modelo Order, antes de qualquer envio à Binance
+
+    - 'type' (nome da API) vira a coluna 'types' (padrão LIMIT)
+    - timeInForce padrão GTC
+    - ValueError se algum campo obrigatório (NOT NULL) estiver ausente
+    """
+    if not isinstance(order_data, dict):
+        raise ValueError("Cada ordem deve ser um objeto JSON")
+    order_data = dict(order_data, user_id=user_id)
+    order_type = order_data.pop('type', None)
+    order_data.setdefault('types', order_type or 'LIMIT')
+    order_data.setdefault('timeInForce', 'GTC')
+
+    missing = [
+        column.key for column in Order.__table__.columns
+        if not column.nullable and not column.primary_key and column.default is None
+        and order_data.get(column.key) is None
+    ]
+    if missing:
+        raise ValueError(f"Campos obrigatórios ausentes: {', '.join(missing)}")
+    return order_data
+
+
+def send_binance_order(client, order_data):
+    """Extrai os parâmetros da ordem e envia para a Binance, retornando a resposta"""
+    return governed_call(client, lambda: client.create_order(
+        symbol=order_data.get('symbol'),
+        side=order_data.get('side', 'BUY'),
+        type=order_data.get('types', order_data.get('type', 'LIMIT')),
+        quantity=order_data.get('quantity'),
+        price=order_data.get('price'),
+        timeInForce=order_data.get('timeInForce', 'GTC')
+    ), endpoint="/api/v3/order", account=order_data.get('user_id'), orders=1)
+
+
+def record_binance_response(order, binance_response):
+    """Guarda no Order local o orderId, o status e a quantidade executada informados pela Binance"""
+    if not binance_response:
+        return
+    order.binance_order_id = binance_response.get('orderId')
+    order.status = binance_response.get('status')
+    order.executed_qty = binance_response.get('executedQty')
+
+
+def dispatch_batch(client, orders_data):
+    """
+    Envia várias ordens para a Binance em paralelo (no máximo ORDER_BATCH_WORKERS por vez)
+
+    Retorna uma lista, na mesma ordem da entrada, de tuplas
+    (binance_response, erro) — exatamente um dos dois é None
+    """
+    def send(order_data):
+        try:
+            return send_binance_order(client, order_data), None
+        except Exception as e:
+            return None, str(e)
+
+    return list(_batch_executor.map(send, orders_data))
@@ -0,0 +1,68 @@
+# ================================
+# PAGINAÇÃO POR CURSOR (KEYSET)
+# ================================
+# Paginação baseada no ID (WHERE id > after ORDER BY id LIMIT n), que
+# mantém o custo de cada página constante independente do tamanho da tabela.
+
+import os
+from datetime import datetime
+
+DEFAULT_PAGE_SIZE = int(os.getenv("PAGE_SIZE_DEFAULT", 100))
+MAX_PAGE_SIZE = int(os.getenv("PAGE_SIZE_MAX", 500))
+
+
+class PaginationError(ValueError):
+    """Parâmetro de paginação ou filtro inválido"""
+
+
+def _int_arg(args, name, default):
+    value = args.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise PaginationError(f"Parâmetro '{name}' deve ser inteiro")
+
+
+def date_arg(args, name):
+    """Lê uma data ISO 8601 da query string (ex: 2025-01-31 ou 2025-01-31T12:00:00)"""
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise PaginationError(f"Parâmetro '{name}' deve ser uma data ISO 8601")
+
+
+def page_params(args):
+    """Extrai (limit, after) da query string, aplicando o tamanho máximo de página"""
+    limit = _int_arg(args, "limit", DEFAULT_PAGE_SIZE)
+    after = _int_arg(args, "after", 0)
+    if limit < 1:
+        raise PaginationError("Parâmetro 'limit' deve ser maior que zero")
+    return min(limit, MAX_PAGE_SIZE), after
+
+
+def paginate(query, id_column, args):
+    """
+    Aplica a paginação por cursor a uma query
+
+    Retorna (itens, next_cursor); next_cursor é None na última página
+    """
+    limit, after = page_params(args)
+    rows = query.filter(id_column > after).order_by(id_column).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+    return rows, next_cursor
+
+
+def with_cursor(response, next_cursor):
+    """Adiciona o próximo cursor aos cabeçalhos da resposta"""
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return response
@@ -0,0 +1,167 @@
+# ================================
+# AGREGAÇÃO DE LUCRO/PREJUÍZO (P&L)
+# ================================
+# Totais, quebras por símbolo e por período calculados com GROUP BY no
+# banco; o drawdown máximo é calculado em uma única passada em streaming.
+# Relatórios arquivados (trade_reports_archive) entram em todos os cálculos.
+# Os resultados ficam em cache até que um relatório ou ordem do usuário mude
+# (versão compartilhada entre processos) ou por no máximo PNL_CACHE_TTL segundos.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import case, func, select, union_all
+
+from database.custom_models import db, Order, TradeReport, ArchivedOrder, ArchivedTradeReport
+from database.http_cache import versions
+
+BUCKETS = ("day", "week")
+
+# Camadas (relatório, ordem): tabelas quentes e de arquivo
+TIERS = ((TradeReport, Order), (ArchivedTradeReport, ArchivedOrder))
+
+
+def _aggregates(report):
+    """Colunas agregadas comuns: quantidade, soma, ganhos e perdas"""
+    # Execuções importadas pela reconciliação não têm profit_loss (sem custo
+    # médio); COUNT(coluna) ignora os nulos e as deixa fora de trades/ganhos/perdas
+    return (
+        func.count(report.profit_loss).label("trades"),
+        func.coalesce(func.sum(report.profit_loss), 0).label("profit_loss"),
+        func.sum(case((report.profit_loss > 0, 1), else_=0)).label("wins"),
+        func.sum(case((report.profit_loss < 0, 1), else_=0)).label("losses"),
+    )
+
+
+def _as_dict(row):
+    return {
+        "trades": row.trades,
+        "profit_loss": float(row.profit_loss or 0),
+        "wins": int(row.wins or 0),
+        "losses": int(row.losses or 0),
+    }
+
+
+def _add(totals, key, values):
+    """Soma values em totals[key] (mesmo símbolo/período em camadas ou dias diferentes)"""
+    if key in totals:
+        for field, value in values.items():
+            totals[key][field] += value
+    else:
+        totals[key] = values
+
+
+def _max_drawdown(user_id):
+    """Maior queda do P&L acumulado em relação ao pico anterior (uma passada)"""
+    # Uma única consulta (UNION ALL das camadas) para manter um só cursor em streaming
+    tiers = union_all(*(
+        select(report.report_date, report.id, report.profit_loss)
+        .join(order, report.order_id == order.id)
+        .where(order.user_id == user_id, report.profit_loss.is_not(None))
+        for report, order in TIERS
+    )).subquery()
+    statement = (
+        select(tiers.c.profit_loss)
+        .order_by(tiers.c.report_date, tiers.c.id)
+        .execution_options(yield_per=1000)
+    )
+    equity = peak = max_drawdown = Decimal(0)
+    for profit_loss in db.session.execute(statement).scalars():
+        equity += profit_loss
+        peak = max(peak, equity)
+        max_drawdown = max(max_drawdown, peak - equity)
+    return float(max_drawdown)
+
+
+def _week_of(day):
+    """Converte '2025-01-31' (ou date) em '2025-W05' (semana ISO)"""
+    if not isinstance(day, date):
+        day = date.fromisoformat(str(day))
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def compute_pnl(user_id, bucket="day"):
+    """Calcula o P&L completo de um usuário"""
+    totals, by_symbol, by_period = {"trades": 0, "profit_loss": 0.0, "wins": 0, "losses": 0}, {}, {}
+
+    for report, order in TIERS:
+        base = select(*_aggregates(report)).join(order, report.order_id == order.id).where(order.user_id == user_id)
+
+        for field, value in _as_dict(db.session.execute(base).one()).items():
+            totals[field] += value
+
+        for row in db.session.execute(base.add_columns(order.symbol).group_by(order.symbol)):
+            _add(by_symbol, row.symbol, _as_dict(row))
+
+        day = func.date(report.report_date).label("day")
+        for row in db.session.execute(base.add_columns(day).group_by(day)):
+            if row.day is None:
+                continue
+            # Soma dias da mesma semana
+            _add(by_period, str(row.day) if bucket == "day" else _week_of(row.day), _as_dict(row))
+
+    return {
+        "user_id": user_id,
+        "totals": totals,
+        "max_drawdown": _max_drawdown(user_id),
+        "by_symbol": by_symbol,
+        "bucket": bucket,
+        "by_period": dict(sorted(by_period.items())),
+    }
+
+
+class PnlCache:
+    """
+    Cache LRU dos resultados de P&L por (usuário, período)
+
+    Cada entrada guarda a versão do escopo "pnl:<user_id>" da tabela
+    cache_versions e vale enquanto essa versão não mudar e por no máximo
+    ttl segundos. invalidate incrementa a versão compartilhada, de modo que
+    todos os workers e o processo do "flask reconcile" descartam o resultado.
+    """
+
+    def __init__(self, max_size=1024, ttl=None):
+        self.max_size = max_size
+        self.ttl = float(os.getenv("PNL_CACHE_TTL", 60)) if ttl is None else ttl
+        self._entries = OrderedDict()  # (user_id, bucket) -> (resultado, versão, expira_em)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _scope(user_id):
+        return f"pnl:{user_id}"
+
+    def get(self, user_id, bucket="day"):
+        key = (user_id, bucket)
+        # Lida antes do cálculo: uma invalidação durante o cálculo torna a entrada obsoleta
+        version, _ = versions.get(self._scope(user_id))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == version and entry[2] > time.monotonic():
+                self._entries.move_to_end(key)
+                return entry[0]
+
+        result = compute_pnl(user_id, bucket)
+
+        with self._lock:
+            self._entries[key] = (result, version, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return result
+
+    def invalidate(self, *user_ids):
+        """Descarta o P&L em cache dos usuários informados (em todos os processos)"""
+        user_ids = {user_id for user_id in user_ids if user_id is not None}
+        versions.bump(*(self._scope(user_id) for user_id in user_ids))
+        with self._lock:
+            for key in [key for key in self._entries if key[0] in user_ids]:
+                del self._entries[key]
+
+
+# Instância única usada pelas rotas
+pnl_cache = PnlCache()
@@ -0,0 +1,86 @@
+# ================================
+# POOL DE CONEXÕES DO SQLALCHEMY
+# ================================
+# Opções do pool definidas por variáveis de ambiente e um QueuePool que
+# mede o tempo de espera para obter uma conexão.
+
+import os
+import threading
+import time
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que registra quantas vezes e por quanto tempo se esperou por uma conexão"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with self._wait_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._wait_lock:
+                self.wait_count += 1
+                self.wait_total += elapsed
+                self.wait_max = max(self.wait_max, elapsed)
+
+
+def _is_memory_sqlite(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(uri):
+    """Monta SQLALCHEMY_ENGINE_OPTIONS a partir das variáveis DB_POOL_*"""
+    options = {
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 280)),
+    }
+    if not uri or _is_memory_sqlite(uri):
+        # SQLite em memória usa StaticPool (conexão única): sem dimensionamento
+        return options
+
+    options.update({
+        "poolclass": TimedQueuePool,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 10)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 20)),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+    })
+    return options
+
+
+def pool_stats(engine):
+    """Resumo do estado do pool de uma engine"""
+    pool = engine.pool
+    stats = {"pool_class": type(pool).__name__, "status": pool.status()}
+
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        })
+    if isinstance(pool, TimedQueuePool):
+        with pool._wait_lock:
+            stats.update({
+                "acquire_count": pool.wait_count,
+                "acquire_timeouts": pool.timeouts,
+                "acquire_wait_avg": pool.wait_total / pool.wait_count if pool.wait_count else 0.0,
+                "acquire_wait_max": pool.wait_max,
+            })
+    return stats
@@ -0,0 +1,142 @@
+# ================================
+# LIVRO DE POSIÇÕES POR USUÁRIO
+# ================================
+# Mantém a tabela positions (usuário x símbolo) atualizada de forma
+# incremental, na mesma transação das rotas de ordem, para que a leitura
+# da posição custe O(símbolos) em vez de O(ordens).
+
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import case, delete, func, insert, select, union_all
+from sqlalchemy.exc import IntegrityError
+
+from database.custom_models import db, Order, ArchivedOrder, Position
+
+
+def _signed_quantity(order):
+    """Quantidade com sinal: positiva para BUY, negativa para SELL"""
+    quantity = Decimal(str(order.quantity))
+    return -quantity if str(order.side).upper() == 'SELL' else quantity
+
+
+def _upsert_position(row):
+    """
+    INSERT ... ON DUPLICATE KEY / ON CONFLICT somando os deltas da linha
+
+    Duas primeiras ordens simultâneas do mesmo par não disputam o INSERT:
+    o banco transforma a segunda em UPDATE (SELECT ... FOR UPDATE não
+    trava uma linha que ainda não existe). Retorna False em bancos sem upsert.
+    """
+    table = Position.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        statement = dialect_insert(table).values(row)
+        statement = statement.on_duplicate_key_update(
+            quantity=table.c.quantity + statement.inserted.quantity,
+            notional=table.c.notional + statement.inserted.notional,
+            orders_count=table.c.orders_count + statement.inserted.orders_count,
+            updated_at=statement.inserted.updated_at,
+        )
+    elif dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        statement = dialect_insert(table).values(row)
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_id", "symbol"],
+            set_={
+                "quantity": table.c.quantity + statement.excluded.quantity,
+                "notional": table.c.notional + statement.excluded.notional,
+                "orders_count": table.c.orders_count + statement.excluded.orders_count,
+                "updated_at": statement.excluded.updated_at,
+            },
+        )
+    else:
+        return False
+
+    db.session.execute(statement)
+    return True
+
+
+def _merge_position(row):
+    """Soma os deltas pelo ORM; um INSERT concorrente vira UPDATE dentro de um SAVEPOINT"""
+    for _ in range(2):
+        position = db.session.execute(
+            select(Position)
+            .where(Position.user_id == row["user_id"], Position.symbol == row["symbol"])
+            .with_for_update()
+        ).scalar_one_or_none()
+
+        if position is None:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(Position(**row))
+                return
+            except IntegrityError:
+                # Outra transação criou a linha primeiro: repete como UPDATE
+                continue
+
+        position.quantity = Decimal(str(position.quantity)) + row["quantity"]
+        position.notional = Decimal(str(position.notional)) + row["notional"]
+        position.orders_count += row["orders_count"]
+        return
+
+
+def apply_order(order, sign=1):
+    """
+    Aplica (sign=1) ou reverte (sign=-1) o efeito de uma ordem na posição
+
+    Deve ser chamada antes do commit da rota, dentro da mesma transação
+    """
+    quantity = _signed_quantity(order) * sign
+    row = {
+        "user_id": order.user_id,
+        "symbol": order.symbol,
+        "quantity": quantity,
+        "notional": quantity * Decimal(str(order.price)),
+        "orders_count": sign,
+        "updated_at": datetime.utcnow(),
+    }
+    if not _upsert_position(row):
+        _merge_position(row)
+
+    # Sem ordens restantes: remove a linha para não bloquear a exclusão do usuário
+    if sign < 0:
+        db.session.execute(
+            delete(Position)
+            .where(Position.user_id == order.user_id, Position.symbol == order.symbol, Position.orders_count <= 0)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def rebuild_positions():
+    """Recalcula toda a tabela positions a partir das ordens (quentes e arquivadas) com um único INSERT ... SELECT"""
+    orders = union_all(*(
+        select(order.user_id, order.symbol, order.side, order.quantity, order.price, order.id)
+        for order in (Order, ArchivedOrder)
+    )).subquery()
+    signed = case((func.upper(orders.c.side) == 'SELL', -orders.c.quantity), else_=orders.c.quantity)
+    aggregated = (
+        select(
+            orders.c.user_id,
+            orders.c.symbol,
+            func.sum(signed),
+            func.sum(signed * orders.c.price),
+            func.count(orders.c.id),
+            func.now(),
+        )
+        .group_by(orders.c.user_id, orders.c.symbol)
+    )
+
+    db.session.execute(delete(Position))
+    db.session.execute(
+        insert(Position).from_select(
+            ['user_id', 'symbol', 'quantity', 'notional', 'orders_count', 'updated_at'], aggregated
+        )
+    )
+    db.session.commit()
+    return db.session.scalar(select(func.count(Position.id)))
@@ -0,0 +1,232 @@
+# ================================
+# PROFILING DE REQUISIÇÕES (OPCIONAL)
+# ================================
+# Hooks before/after_request que perfilam uma fração das requisições com
+# cProfile (PROFILE_SAMPLE_RATE) e, nas demais, amostram a pilha da thread
+# para guardar o perfil das que passarem de PROFILE_SLOW_MS. Cada perfil
+# inclui as consultas SQL executadas e fica em um buffer circular com os
+# últimos PROFILE_BUFFER_SIZE, baixados pelas rotas /admin/profiles.
+#
+# A partir do Python 3.12 (a imagem Docker usa 3.13) o cProfile é baseado em
+# sys.monitoring, que vale para o interpretador inteiro: um perfil "sampled"
+# inclui também o trabalho das outras threads (outras requisições, workers de
+# fundo) durante a requisição. O campo "scope" do perfil indica isso
+# ("interpreter" ou "thread"); as pilhas do modo "slow" são sempre da thread.
+
+import cProfile
+import io
+import itertools
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0.01))
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", 500))  # 0 desativa a captura por latência
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", 50))
+PROFILE_STACK_INTERVAL = float(os.getenv("PROFILE_STACK_INTERVAL", 0.005))
+PROFILE_MAX_SQL = 200  # consultas guardadas por perfil
+
+# Abrangência do cProfile nesta versão do Python (ver cabeçalho)
+CPROFILE_SCOPE = "interpreter" if sys.version_info >= (3, 12) else "thread"
+
+
+class StackSampler:
+    """
+    Thread de fundo que amostra a pilha das threads registradas
+
+    As amostras de cada thread são contadas por pilha no formato "colapsado"
+    (frame;frame;frame), o mesmo usado por ferramentas de flame graph.
+    Sem threads registradas a thread de fundo fica parada em um Event.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._threads = {}  # id da thread -> Counter de pilhas
+        self._lock = threading.Lock()
+        self._active = threading.Event()  # setado enquanto houver thread registrada
+        self._thread = None
+
+    def track(self, thread_id):
+        with self._lock:
+            self._threads[thread_id] = Counter()
+            self._active.set()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+
+    def untrack(self, thread_id):
+        with self._lock:
+            stacks = self._threads.pop(thread_id, None)
+            if not self._threads:
+                self._active.clear()
+            return stacks
+
+    def _run(self):
+        while True:
+            self._active.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, stacks in self._threads.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[_collapse(frame)] += 1
+
+
+def _collapse(frame, max_depth=64):
+    names = []
+    while frame is not None and len(names) < max_depth:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class ProfileStore:
+    """Buffer circular com os últimos perfis capturados"""
+
+    def __init__(self, size):
+        self._profiles = deque(maxlen=size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, profile):
+        with self._lock:
+            profile["id"] = next(self._ids)
+            self._profiles.append(profile)
+
+    def list(self):
+        """Resumo dos perfis (sem os dados brutos), do mais recente ao mais antigo"""
+        with self._lock:
+            profiles = list(self._profiles)
+        return [
+            {key: value for key, value in profile.items() if key not in ("sql", "stats", "stacks", "raw")}
+            for profile in reversed(profiles)
+        ]
+
+    def get(self, profile_id):
+        with self._lock:
+            for profile in self._profiles:
+                if profile["id"] == profile_id:
+                    return profile
+        return None
+
+
+profiles = ProfileStore(PROFILE_BUFFER_SIZE)
+stack_sampler = StackSampler(PROFILE_STACK_INTERVAL)
+
+# O cProfile usa um gancho global do interpretador: apenas um perfil por vez
+_cprofile_lock = threading.Lock()
+
+
+# ---------- consultas SQL ----------
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if PROFILING_ENABLED and has_request_context() and "profile_sql" in g:
+        conn.info.setdefault("profile_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("profile_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    if has_request_context() and "profile_sql" in g and len(g.profile_sql) < PROFILE_MAX_SQL:
+        g.profile_sql.append({"statement": statement, "duration_ms": round(elapsed * 1000, 3)})
+
+
+# ---------- requisições HTTP ----------
+
+def _before_request():
+    g.profile_start = time.perf_counter()
+    g.profile_sql = []
+    g.profiler = None
+    g.profile_thread = None
+
+    if random.random() < PROFILE_SAMPLE_RATE and _cprofile_lock.acquire(blocking=False):
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+    elif PROFILE_SLOW_MS > 0:
+        g.profile_thread = threading.get_ident()
+        stack_sampler.track(g.profile_thread)
+
+
+def _stop():
+    """Encerra a captura da requisição atual; retorna (profiler, pilhas)"""
+    profiler, stacks = g.pop("profiler", None), None
+    if profiler is not None:
+        profiler.disable()
+        _cprofile_lock.release()
+    thread_id = g.pop("profile_thread", None)
+    if thread_id is not None:
+        stacks = stack_sampler.untrack(thread_id)
+    return profiler, stacks
+
+
+def _after_request(response):
+    start = g.pop("profile_start", None)
+    if start is None:
+        return response
+    duration_ms = (time.perf_counter() - start) * 1000
+    profiler, stacks = _stop()
+    sql = g.pop("profile_sql", [])
+
+    if profiler is None and duration_ms < PROFILE_SLOW_MS:
+        return response
+
+    profile = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "method": request.method,
+        "path": request.full_path.rstrip("?"),
+        "route": request.url_rule.rule if request.url_rule is not None else None,
+        "status": response.status_code,
+        "duration_ms": round(duration_ms, 3),
+        "reason": "sampled" if profiler is not None else "slow",
+        "kind": "cprofile" if profiler is not None else "stack",
+        "scope": CPROFILE_SCOPE if profiler is not None else "thread",
+        "sql_count": len(sql),
+        "sql_ms": round(sum(query["duration_ms"] for query in sql), 3),
+        "sql": sql,
+    }
+    if profiler is not None:
+        profiler.create_stats()
+        profile["raw"] = marshal.dumps(profiler.stats)
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(40)
+        profile["stats"] = output.getvalue()
+    else:
+        profile["stacks"] = (stacks or Counter()).most_common()
+    profiles.add(profile)
+    return response
+
+
+def _teardown_request(exc):
+    # Garante que o profiler e o amostrador sejam liberados mesmo sem after_request
+    if "profile_start" in g:
+        _stop()
+
+
+def init_app(app):
+    """Registra os hooks de profiling na aplicação se PROFILING_ENABLED=true"""
+    if PROFILING_ENABLED:
+        app.before_request(_before_request)
+        app.after_request(_after_request)
+        app.teardown_request(_teardown_request)
+
+
+def collapsed_stacks(profile):
+    """Pilhas amostradas no formato texto 'frame;frame;frame contagem' (flame graph)"""
+    return "".join(f"{stack} {count}\n" for stack, count in profile.get("stacks", []))
@@ -0,0 +1,273 @@
+# ================================
+# CONTROLE DE RATE LIMIT DA BINANCE
+# ================================
+# Governador compartilhado por todo o tráfego para a Binance: token buckets
+# de peso de requisição (por IP/host) e de ordens (por conta), sincronizados
+# com os headers X-MBX-USED-WEIGHT-* / X-MBX-ORDER-COUNT-* das respostas.
+# Quando o limite está próximo a chamada espera (até RATE_LIMIT_MAX_WAIT
+# segundos) ou é descartada com RateLimitExceeded, antes de sair pela rede.
+# Após um 429/418 todas as chamadas ao host ficam bloqueadas até o Retry-After.
+#
+# O estado fica na memória do processo; como os headers refletem o uso real
+# do IP, workers diferentes convergem para o mesmo consumo a cada resposta.
+
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+from database.instrumentation import observe_binance
+from database.metrics import registry
+
+# Limites da Binance (spot) com margem de segurança
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_WEIGHT_PER_MINUTE = int(os.getenv("RATE_LIMIT_WEIGHT_PER_MINUTE", 6000))
+RATE_LIMIT_ORDERS_PER_10S = int(os.getenv("RATE_LIMIT_ORDERS_PER_10S", 100))
+RATE_LIMIT_HEADROOM = float(os.getenv("RATE_LIMIT_HEADROOM", 0.9))
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", 1.0))
+
+# Peso das chamadas usadas pela aplicação (documentação da API spot)
+WEIGHT_ORDER = 1
+WEIGHT_TICKER_PRICE = 2
+WEIGHT_TICKER_PRICE_ALL = 4
+WEIGHT_KLINES = 2
+WEIGHT_EXCHANGE_INFO = 20
+
+
+def depth_weight(limit):
+    """Peso de GET /api/v3/depth conforme o limit pedido"""
+    if limit <= 100:
+        return 5
+    if limit <= 500:
+        return 25
+    if limit <= 1000:
+        return 50
+    return 250
+
+
+# Métricas do governador
+weight_available = registry.gauge(
+    "binance_ratelimit_weight_available", "Peso de requisição disponível no bucket", ("host",)
+)
+weight_used = registry.gauge(
+    "binance_ratelimit_weight_used", "Último X-MBX-USED-WEIGHT-1M informado pela Binance", ("host",)
+)
+delayed_total = registry.counter(
+    "binance_ratelimit_delayed_total", "Chamadas atrasadas pelo governador", ("host", "limit")
+)
+delay_seconds_total = registry.counter(
+    "binance_ratelimit_delay_seconds_total", "Tempo total de espera imposto pelo governador", ("host",)
+)
+shed_total = registry.counter(
+    "binance_ratelimit_shed_total", "Chamadas descartadas antes de chegar à Binance", ("host", "reason")
+)
+bans_total = registry.counter(
+    "binance_ratelimit_bans_total", "Respostas 429/418 recebidas da Binance", ("host", "status")
+)
+
+
+class RateLimitExceeded(Exception):
+    """Chamada descartada pelo governador; retry_after em segundos"""
+
+    def __init__(self, retry_after, reason):
+        self.retry_after = retry_after
+        self.reason = reason
+        super().__init__(f"Limite de requisições da Binance atingido ({reason}), tente em {retry_after:.1f}s")
+
+
+class TokenBucket:
+    """Bucket de capacity fichas reabastecido continuamente ao longo de period segundos"""
+
+    def __init__(self, capacity, period):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, cost, now):
+        """Segundos até haver cost fichas (0 se já houver)"""
+        self._refill(now)
+        missing = cost - self.tokens
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def take(self, cost):
+        self.tokens -= cost
+
+    def sync(self, used, now):
+        """Ajusta as fichas ao uso informado pelo servidor (used fichas já consumidas na janela)"""
+        self._refill(now)
+        self.tokens = min(self.tokens, self.capacity - used)
+
+
+class RateLimitGovernor:
+    """
+    Governador de um host da Binance
+
+    - acquire(weight, account, orders): reserva peso/ordens, esperando ou
+      lançando RateLimitExceeded
+    - observe(status_code, headers, account): sincroniza com a resposta
+    """
+
+    def __init__(self, host, weight_limit=RATE_LIMIT_WEIGHT_PER_MINUTE, orders_limit=RATE_LIMIT_ORDERS_PER_10S,
+                 headroom=RATE_LIMIT_HEADROOM, max_wait=RATE_LIMIT_MAX_WAIT):
+        self.host = host
+        self.max_wait = max_wait
+        self.weight = TokenBucket(weight_limit * headroom, 60)
+        self._order_capacity = orders_limit * headroom
+        self._orders = {}  # conta -> TokenBucket
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _orders_bucket(self, account):
+        bucket = self._orders.get(account)
+        if bucket is None:
+            bucket = self._orders[account] = TokenBucket(self._order_capacity, 10)
+        return bucket
+
+    def acquire(self, weight=1, account=None, orders=0):
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    shed_total.inc(host=self.host, reason="banned")
+                    raise RateLimitExceeded(self.blocked_until - now, "banned")
+
+                wait, limit = self.weight.wait_time(weight, now), "weight"
+                if orders:
+                    order_wait = self._orders_bucket(account).wait_time(orders, now)
+                    if order_wait > wait:
+                        wait, limit = order_wait, "orders"
+
+                if wait == 0:
+                    self.weight.take(weight)
+                    if orders:
+                        self._orders_bucket(account).take(orders)
+                    weight_available.set(round(self.weight.tokens, 2), host=self.host)
+                    if waited:
+                        delay_seconds_total.inc(waited, host=self.host)
+                    return
+
+                if waited + wait > self.max_wait:
+                    shed_total.inc(host=self.host, reason=limit)
+                    raise RateLimitExceeded(wait, limit)
+
+            # Espera fora do lock e tenta de novo (outras threads podem ter consumido)
+            delayed_total.inc(host=self.host, limit=limit)
+            time.sleep(wait)
+            waited += wait
+
+    def observe(self, status_code, headers, account=None):
+        if headers is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            used = headers.get("X-MBX-USED-WEIGHT-1M") or headers.get("X-MBX-USED-WEIGHT")
+            if used is not None:
+                self.weight.sync(int(used), now)
+                weight_used.set(int(used), host=self.host)
+                weight_available.set(round(self.weight.tokens, 2), host=self.host)
+
+            order_count = headers.get("X-MBX-ORDER-COUNT-10S")
+            if order_count is not None:
+                self._orders_bucket(account).sync(int(order_count), now)
+
+            # 429: limite excedido; 418: IP banido. Ambos trazem Retry-After
+            if status_code in (429, 418):
+                bans_total.inc(host=self.host, status=status_code)
+                retry_after = float(headers.get("Retry-After") or 60)
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+
+
+_governors = {}
+_governors_lock = threading.Lock()
+
+
+def governor_for(url):
+    """Governador do host de url (cada host tem limites próprios, ex: testnet e produção)"""
+    host = urlparse(url).netloc or url
+    with _governors_lock:
+        governor = _governors.get(host)
+        if governor is None:
+            governor = _governors[host] = RateLimitGovernor(host)
+        return governor
+
+
+def governed_get(session, url, weight, **kwargs):
+    """session.get(url) passando pelo governador do host (e medindo a latência)"""
+    governor = governor_for(url) if RATE_LIMIT_ENABLED else None
+    if governor is not None:
+        governor.acquire(weight)
+
+    endpoint = urlparse(url).path
+    start = time.perf_counter()
+    try:
+        response = session.get(url, **kwargs)
+    except Exception:
+        observe_binance(endpoint, None, time.perf_counter() - start)
+        raise
+    observe_binance(endpoint, response.status_code, time.perf_counter() - start)
+
+    if governor is not None:
+        governor.observe(response.status_code, response.headers)
+    return response
+
+
+# Última resposta HTTP recebida pela thread atual. client.response é
+# compartilhado: com o mesmo cliente em várias threads (lote de ordens)
+# ele pode já conter a resposta de outra chamada
+_responses = threading.local()
+_hooks_lock = threading.Lock()
+
+
+def _capture_response(response, *args, **kwargs):
+    _responses.last = response
+    return response
+
+
+def _track_responses(client):
+    """Instala (uma vez) o hook que guarda cada resposta da sessão do cliente na thread que a recebeu"""
+    session = getattr(client, "session", None)
+    if session is None:
+        return False
+    hooks = session.hooks.setdefault("response", [])
+    if _capture_response not in hooks:
+        with _hooks_lock:
+            if _capture_response not in hooks:
+                hooks.append(_capture_response)
+    return True
+
+
+def governed_call(client, call, endpoint, account=None, weight=WEIGHT_ORDER, orders=0):
+    """
+    Executa call() de um Client do python-binance passando pelo governador
+
+    Os headers são lidos da resposta recebida por esta thread (hook na sessão
+    do cliente; client.response em clientes sem sessão) ou, em caso de erro
+    da API, da resposta anexada à exceção.
+    """
+    governor = governor_for(client.API_URL) if RATE_LIMIT_ENABLED else None
+    if governor is not None:
+        governor.acquire(weight, account, orders)
+
+    tracked = _track_responses(client)
+    _responses.last = None
+    start = time.perf_counter()
+    try:
+        result = call()
+    except Exception as e:
+        observe_binance(endpoint, getattr(e, "status_code", None), time.perf_counter() - start)
+        response = getattr(e, "response", None)
+        if governor is not None and response is not None:
+            governor.observe(response.status_code, response.headers, account)
+        raise
+
+    response = _responses.last if tracked else getattr(client, "response", None)
+    observe_binance(endpoint, response.status_code if response is not None else 200, time.perf_counter() - start)
+    if governor is not None and response is not None:
+        governor.observe(response.status_code, response.headers, account)
+    return result
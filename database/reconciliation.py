@@ -0,0 +1,303 @@
+# ================================
+# RECONCILIAÇÃO DE ORDENS COM A BINANCE
+# ================================
+# Worker de fundo que, a cada RECONCILE_INTERVAL segundos, consulta na
+# Binance as ordens em aberto e as execuções (myTrades) dos pares
+# usuário x símbolo com atividade, atualiza status/quantidade executada
+# dos Orders e cria os TradeReports das novas execuções.
+#
+# Cada par guarda em reconcile_cursors o id do último trade importado, de
+# modo que uma varredura busca apenas as execuções novas. Uma execução cuja
+# ordem ainda não existe localmente (ordem aceita pela Binance com o INSERT
+# ainda pendente) segura o cursor antes dela por até RECONCILE_UNMATCHED_GRACE
+# segundos; depois disso é tratada como ordem criada fora da API. As escritas são
+# feitas em lote (UPDATE por chave primária, INSERT com várias linhas e
+# upsert dos cursores) com um commit por usuário.
+#
+# Com vários workers do gunicorn habilite RECONCILE_ENABLED em apenas um
+# processo (ou rode "flask reconcile --loop" separado); o índice único de
+# (order_id, binance_trade_id) impede relatórios duplicados.
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from sqlalchemy import func, insert, select, update
+
+from database.binance_clients import client_registry
+from database.credentials import credential_cache
+from database.custom_models import db, Order, TradeReport, ReconcileCursor
+from database.http_cache import bump_user
+from database.metrics import registry
+from database.pnl import pnl_cache
+from database.rate_limit import governed_call
+
+RECONCILE_ENABLED = os.getenv("RECONCILE_ENABLED", "false").lower() == "true"
+RECONCILE_INTERVAL = float(os.getenv("RECONCILE_INTERVAL", 30))
+RECONCILE_UNMATCHED_GRACE = float(os.getenv("RECONCILE_UNMATCHED_GRACE", 300))
+
+OPEN_STATUSES = ("NEW", "PARTIALLY_FILLED", "PENDING_NEW")
+TRADES_PAGE_SIZE = 1000  # máximo aceito pela Binance em myTrades
+
+# Peso das chamadas (documentação da API spot)
+WEIGHT_OPEN_ORDERS = 6
+WEIGHT_GET_ORDER = 4
+WEIGHT_MY_TRADES = 20
+
+# Métricas da reconciliação
+sweeps_total = registry.counter("reconcile_sweeps_total", "Varreduras de reconciliação executadas")
+orders_updated = registry.counter("reconcile_orders_updated_total", "Ordens com status/execução atualizados")
+trades_imported = registry.counter("reconcile_trades_imported_total", "Execuções importadas como TradeReport")
+errors_total = registry.counter("reconcile_errors_total", "Usuários com falha na reconciliação")
+sweep_seconds = registry.gauge("reconcile_last_sweep_seconds", "Duração da última varredura")
+
+
+def _default_client(user_id):
+    credentials = credential_cache.get(user_id)
+    if credentials is None:
+        raise LookupError(f"Usuário {user_id} não encontrado")
+    return client_registry.get(user_id, *credentials)
+
+
+def _upsert_cursors(rows):
+    """INSERT ... ON DUPLICATE KEY / ON CONFLICT dos cursores (user_id, symbol)"""
+    table = ReconcileCursor.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        statement = dialect_insert(table).values(rows)
+        statement = statement.on_duplicate_key_update(
+            last_trade_id=statement.inserted.last_trade_id, updated_at=statement.inserted.updated_at
+        )
+    elif dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        statement = dialect_insert(table).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_id", "symbol"],
+            set_={"last_trade_id": statement.excluded.last_trade_id, "updated_at": statement.excluded.updated_at},
+        )
+    else:
+        # Outros bancos: merge linha a linha
+        for row in rows:
+            cursor = ReconcileCursor.query.filter_by(user_id=row["user_id"], symbol=row["symbol"]).first()
+            if cursor is None:
+                db.session.add(ReconcileCursor(**row))
+            else:
+                cursor.last_trade_id = row["last_trade_id"]
+                cursor.updated_at = row["updated_at"]
+        return
+
+    db.session.execute(statement)
+
+
+class Reconciler:
+    """
+    Worker de reconciliação
+
+    - sweep(): uma varredura completa (deve rodar dentro de um app context)
+    - init_app(app): inicia a thread que chama sweep() periodicamente
+    - client_factory(user_id): cria o cliente da Binance do usuário; pode ser
+      trocado por um cliente de uma exchange local de testes
+    """
+
+    def __init__(self, interval=RECONCILE_INTERVAL, client_factory=_default_client,
+                 unmatched_grace=RECONCILE_UNMATCHED_GRACE):
+        self.interval = interval
+        self.client_factory = client_factory
+        self.unmatched_grace = unmatched_grace
+        self._since = None  # início da última varredura sem erros
+        self._pending = set()  # pares (user_id, symbol) com o cursor segurado por execuções sem ordem local
+        self._app = None
+        self._thread = None
+        self._stopping = threading.Event()
+
+    # ---------- ciclo de vida ----------
+
+    def init_app(self, app):
+        self._app = app
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="reconciler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            with self._app.app_context():
+                try:
+                    self.sweep()
+                except Exception:
+                    db.session.rollback()
+                    errors_total.inc()
+            self._stopping.wait(self.interval)
+
+    # ---------- varredura ----------
+
+    def _active_pairs(self):
+        """Pares (user_id, symbol) com ordens em aberto ou criadas desde a última varredura"""
+        open_pairs = select(Order.user_id, Order.symbol).where(
+            Order.status.in_(OPEN_STATUSES), Order.binance_order_id.is_not(None)
+        )
+
+        since = self._since or db.session.scalar(select(func.max(ReconcileCursor.updated_at)))
+        recent_pairs = select(Order.user_id, Order.symbol).where(Order.binance_order_id.is_not(None))
+        if since is not None:
+            recent_pairs = recent_pairs.where(Order.created_at >= since)
+
+        pairs = {}
+        for user_id, symbol in [*db.session.execute(open_pairs.union(recent_pairs)), *self._pending]:
+            pairs.setdefault(user_id, set()).add(symbol)
+        return pairs
+
+    def sweep(self):
+        """Reconcilia todos os pares ativos; retorna (ordens atualizadas, trades importados)"""
+        started = time.perf_counter()
+        # Marca o início (horário UTC sem fuso, como created_at) antes de consultar a Binance
+        sweep_started = datetime.now(timezone.utc).replace(tzinfo=None)
+
+        pairs = self._active_pairs()
+
+        totals, failed = [0, 0], False
+        for user_id, symbols in sorted(pairs.items()):
+            try:
+                updated, imported = self._reconcile_user(user_id, sorted(symbols), sweep_started)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                errors_total.inc()
+                failed = True
+                continue
+
+            orders_updated.inc(updated)
+            trades_imported.inc(imported)
+            if updated or imported:
+                pnl_cache.invalidate(user_id)
+                bump_user(user_id)
+            totals[0] += updated
+            totals[1] += imported
+
+        if not failed:
+            self._since = sweep_started
+        sweeps_total.inc()
+        sweep_seconds.set(round(time.perf_counter() - started, 3))
+        return tuple(totals)
+
+    def _reconcile_user(self, user_id, symbols, sweep_started):
+        """Prepara e executa as escritas de um usuário (o commit fica com sweep); retorna os totais"""
+        client = self.client_factory(user_id)
+
+        def call(weight, endpoint, method, **params):
+            return governed_call(client, lambda: method(**params), endpoint=endpoint, account=user_id, weight=weight)
+
+        cursors = dict(db.session.execute(
+            select(ReconcileCursor.symbol, ReconcileCursor.last_trade_id).where(
+                ReconcileCursor.user_id == user_id, ReconcileCursor.symbol.in_(symbols)
+            )
+        ).all())
+
+        order_updates, reports, cursor_rows = [], [], []
+        for symbol in symbols:
+            # Status das ordens em aberto: uma chamada por símbolo e get_order só
+            # para as que saíram da lista de abertas
+            local_open = db.session.execute(
+                select(Order.id, Order.binance_order_id, Order.status, Order.executed_qty).where(
+                    Order.user_id == user_id,
+                    Order.symbol == symbol,
+                    Order.status.in_(OPEN_STATUSES),
+                    Order.binance_order_id.is_not(None),
+                )
+            ).all()
+            if local_open:
+                remote_open = {
+                    item["orderId"]: item
+                    for item in call(WEIGHT_OPEN_ORDERS, "/api/v3/openOrders", client.get_open_orders, symbol=symbol)
+                }
+                for order_id, binance_order_id, status, executed_qty in local_open:
+                    remote = remote_open.get(binance_order_id) or call(
+                        WEIGHT_GET_ORDER, "/api/v3/order", client.get_order, symbol=symbol, orderId=binance_order_id
+                    )
+                    remote_qty = Decimal(str(remote["executedQty"]))
+                    if remote["status"] != status or executed_qty is None or remote_qty != Decimal(str(executed_qty)):
+                        order_updates.append({"id": order_id, "status": remote["status"], "executed_qty": remote_qty})
+
+            # Execuções novas desde o cursor
+            last_trade_id = cursors.get(symbol, 0)
+            trades = []
+            while True:
+                page = call(
+                    WEIGHT_MY_TRADES, "/api/v3/myTrades", client.get_my_trades,
+                    symbol=symbol, fromId=last_trade_id + 1, limit=TRADES_PAGE_SIZE,
+                )
+                trades.extend(page)
+                if page:
+                    last_trade_id = max(trade["id"] for trade in page)
+                if len(page) < TRADES_PAGE_SIZE:
+                    break
+
+            self._pending.discard((user_id, symbol))
+            if trades:
+                local_orders = dict(db.session.execute(
+                    select(Order.binance_order_id, Order.id).where(
+                        Order.user_id == user_id,
+                        Order.symbol == symbol,
+                        Order.binance_order_id.in_({trade["orderId"] for trade in trades}),
+                    )
+                ).all())
+
+                # Execuções recentes sem ordem local: o cursor fica antes da primeira
+                # delas para que a próxima varredura as busque de novo. As mais antigas
+                # que a carência são de ordens criadas fora da API e são ignoradas
+                grace_ms = (time.time() - self.unmatched_grace) * 1000
+                unmatched = [
+                    trade["id"] for trade in trades
+                    if trade["orderId"] not in local_orders and trade["time"] >= grace_ms
+                ]
+                if unmatched:
+                    last_trade_id = min(unmatched) - 1
+                    self._pending.add((user_id, symbol))
+
+                # Execuções já importadas em uma varredura anterior (buscadas de novo
+                # por causa de um cursor segurado)
+                imported = set(db.session.execute(
+                    select(TradeReport.binance_trade_id).where(
+                        TradeReport.order_id.in_(set(local_orders.values())),
+                        TradeReport.binance_trade_id.in_({trade["id"] for trade in trades}),
+                    )
+                ).scalars())
+
+                reports.extend(
+                    {
+                        "order_id": local_orders[trade["orderId"]],
+                        "binance_trade_id": trade["id"],
+                        "quantity": Decimal(str(trade["qty"])),
+                        "price": Decimal(str(trade["price"])),
+                        "commission": Decimal(str(trade["commission"])),
+                        "commission_asset": trade["commissionAsset"],
+                        "report_date": datetime.fromtimestamp(trade["time"] / 1000, timezone.utc).replace(tzinfo=None),
+                    }
+                    for trade in trades
+                    if trade["orderId"] in local_orders and trade["id"] not in imported
+                )
+
+            cursor_rows.append({
+                "user_id": user_id, "symbol": symbol, "last_trade_id": last_trade_id, "updated_at": sweep_started
+            })
+
+        if order_updates:
+            db.session.execute(update(Order), order_updates)
+        if reports:
+            db.session.execute(insert(TradeReport), reports)
+        _upsert_cursors(cursor_rows)
+        return len(order_updates), len(reports)
+
+
+# Instância única (iniciada em app.py se habilitada)
+reconciler = Reconciler()
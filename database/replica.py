@@ -0,0 +1,201 @@
+# ================================
+# RÉPLICA DE LEITURA (OPCIONAL)
+# ================================
+# Com DATABASE_REPLICA_URI definida, os SELECTs das requisições GET/HEAD
+# vão para a réplica (bind "replica" do Flask-SQLAlchemy) e todo o resto
+# (escritas, flush, SELECT ... FOR UPDATE, workers de fundo) continua no
+# primário. Uma requisição GET volta a ler do primário quando:
+#
+# - o usuário da rota (user_id) teve escrita há menos de REPLICA_STICKY_SECONDS
+#   neste processo (marcado por http_cache.bump_user, inclusive pela fila de
+#   ordens e pela reconciliação);
+# - o cliente escreveu há pouco: as respostas de escrita levam o cookie
+#   db_primary_until, que vale entre workers diferentes;
+# - o atraso medido da réplica passa de REPLICA_MAX_LAG (ou não pôde ser medido).
+#
+# O atraso é medido a cada REPLICA_LAG_INTERVAL segundos e exposto em
+# /metrics como db_replica_lag_seconds. As variáveis são lidas em
+# create_app (depois do load_dotenv), não na importação.
+
+import os
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+
+from database.metrics import registry
+from database.pool import engine_options
+
+STICKY_COOKIE = "db_primary_until"
+READ_METHODS = ("GET", "HEAD")
+
+replica_lag = registry.gauge("db_replica_lag_seconds", "Atraso medido da réplica de leitura")
+replica_lag_errors = registry.counter("db_replica_lag_errors_total", "Falhas ao medir o atraso da réplica")
+read_routing = registry.counter(
+    "db_read_routing_total", "Requisições de leitura por banco escolhido e motivo", ("target", "reason")
+)
+
+
+def replica_binds():
+    """SQLALCHEMY_BINDS com a réplica de DATABASE_REPLICA_URI (mesmas opções de pool do primário), ou vazio"""
+    uri = os.getenv("DATABASE_REPLICA_URI")
+    if not uri:
+        return {}
+    return {"replica": {"url": uri, **engine_options(uri)}}
+
+
+def _measure_lag(connection):
+    """Atraso da réplica em segundos (None se a replicação está parada ou não informa)"""
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        return connection.execute(text(
+            "SELECT CASE WHEN pg_is_in_recovery() "
+            "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) ELSE 0 END"
+        )).scalar()
+    if dialect == "mysql":
+        try:
+            row = connection.execute(text("SHOW REPLICA STATUS")).mappings().first()
+            column = "Seconds_Behind_Source"
+        except Exception:
+            # MySQL < 8.0.22 / MariaDB
+            row = connection.execute(text("SHOW SLAVE STATUS")).mappings().first()
+            column = "Seconds_Behind_Master"
+        if row is None:
+            return 0  # não é réplica (ex: mesmo servidor configurado como réplica)
+        return row[column]
+    return 0
+
+
+class ReplicaRouter:
+    """
+    Decide, por requisição, se as leituras vão para a réplica
+
+    - init_app(app): lê REPLICA_* e registra os hooks (apenas com o bind "replica")
+    - mark_written(*user_ids): prende as leituras desses usuários ao primário por REPLICA_STICKY_SECONDS
+    - use_replica(): True se a requisição atual deve ler da réplica
+    """
+
+    def __init__(self, sticky_seconds=None, max_lag=None, lag_interval=None):
+        # None: lido da variável de ambiente em init_app
+        self.sticky_seconds = sticky_seconds
+        self.max_lag = max_lag
+        self.lag_interval = lag_interval
+        self.enabled = False
+        self.lag = None  # último atraso medido (None = desconhecido)
+        self._checked_at = 0.0
+        self._written = {}  # user_id -> instante (monotônico) até quando lê do primário
+        self._lock = threading.Lock()
+        self._lag_lock = threading.Lock()
+
+    # ---------- ciclo de vida ----------
+
+    def init_app(self, app):
+        if "replica" not in app.config.get("SQLALCHEMY_BINDS", {}):
+            return
+        if self.sticky_seconds is None:
+            self.sticky_seconds = float(os.getenv("REPLICA_STICKY_SECONDS", 5))
+        if self.max_lag is None:
+            self.max_lag = float(os.getenv("REPLICA_MAX_LAG", 30))
+        if self.lag_interval is None:
+            self.lag_interval = float(os.getenv("REPLICA_LAG_INTERVAL", 5))
+        self.enabled = True
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    # ---------- read-your-writes ----------
+
+    def mark_written(self, *user_ids):
+        if not self.enabled:
+            return
+        until = time.monotonic() + self.sticky_seconds
+        with self._lock:
+            for user_id in user_ids:
+                self._written[user_id] = until
+            if len(self._written) > 10000:
+                # Descarta as marcações vencidas
+                now = time.monotonic()
+                self._written = {user_id: until for user_id, until in self._written.items() if until > now}
+
+    def _user_sticky(self, user_id):
+        with self._lock:
+            until = self._written.get(user_id)
+        return until is not None and until > time.monotonic()
+
+    def _cookie_sticky(self):
+        try:
+            return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    # ---------- atraso da réplica ----------
+
+    def _refresh_lag(self):
+        """Mede o atraso se a última medição venceu (uma thread por vez, sem bloquear as demais)"""
+        if time.monotonic() - self._checked_at < self.lag_interval or not self._lag_lock.acquire(blocking=False):
+            return
+        try:
+            with current_app.extensions["sqlalchemy"].engines["replica"].connect() as connection:
+                lag = _measure_lag(connection)
+            self.lag = float(lag) if lag is not None else None
+        except Exception:
+            self.lag = None
+            replica_lag_errors.inc()
+        finally:
+            self._checked_at = time.monotonic()
+            self._lag_lock.release()
+        if self.lag is not None:
+            replica_lag.set(round(self.lag, 3))
+
+    # ---------- requisições HTTP ----------
+
+    def _route(self):
+        """Retorna (usa a réplica, motivo)"""
+        user_id = (request.view_args or {}).get("user_id")
+        if user_id is not None and self._user_sticky(user_id):
+            return False, "sticky_user"
+        if self._cookie_sticky():
+            return False, "sticky_client"
+        self._refresh_lag()
+        if self.lag is None or self.lag > self.max_lag:
+            return False, "lag"
+        return True, "read"
+
+    def _before_request(self):
+        if request.method not in READ_METHODS:
+            g.db_replica = False
+            return
+        g.db_replica, reason = self._route()
+        read_routing.inc(target="replica" if g.db_replica else "primary", reason=reason)
+
+    def _after_request(self, response):
+        # Escrita bem-sucedida: o mesmo cliente lê do primário durante a janela, em qualquer worker
+        if request.method not in READ_METHODS + ("OPTIONS",) and response.status_code < 400:
+            response.set_cookie(
+                STICKY_COOKIE, f"{time.time() + self.sticky_seconds:.3f}",
+                max_age=int(self.sticky_seconds) + 1, httponly=True, samesite="Lax",
+            )
+        return response
+
+    def use_replica(self):
+        return self.enabled and has_request_context() and g.get("db_replica", False)
+
+
+# Instância única (configurada em app.py)
+replica_router = ReplicaRouter()
+
+
+class RoutingSession(Session):
+    """Sessão do Flask-SQLAlchemy que envia os SELECTs das leituras roteadas para a réplica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and getattr(clause, "is_select", False)
+            and getattr(clause, "_for_update_arg", None) is None
+            and replica_router.use_replica()
+        ):
+            return self._db.engines["replica"]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
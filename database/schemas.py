@@ -1,7 +1,7 @@
 # Importacao das bibliotecas usadas
 
 from flask_marshmallow import Marshmallow
-from database.custom_models import User, Order, TradeReport
+from database.custom_models import User, Order, TradeReport, Position
 
 # Definicao de variavel para chamar o Marshmallow e suas funcoes
 ma = Marshmallow()
@@ -26,4 +26,11 @@ class TradeReportSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = TradeReport
         include_fk = True
+        instance = True
+
+# Schema para a tabela de Position
+class PositionSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = Position
+        include_fk = True
         instance = True
\ No newline at end of file
@@ -0,0 +1,64 @@
+# ================================
+# CONFIGURAÇÃO DO GUNICORN (PRODUÇÃO)
+# ================================
+# Uso: gunicorn -c gunicorn.conf.py
+# Todos os parâmetros podem ser ajustados por variáveis de ambiente.
+
+import multiprocessing
+import os
+
+# Com preload a aplicação é importada no mestre antes do fork
+preload_app = os.getenv("GUNICORN_PRELOAD", "false").lower() == "true"
+
+# Fábrica da aplicação: os workers não criam o esquema (feito uma vez no
+# mestre) e, com preload, as threads de fundo só iniciam após o fork
+wsgi_app = f"app:create_app(init_db=False, services={not preload_app})"
+
+bind = f"0.0.0.0:{os.getenv('PORT', 80)}"
+
+# Processos x threads por processo
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+worker_class = "gthread" if threads > 1 else "sync"
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# Recicla workers periodicamente para conter vazamentos de memória
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 0))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+
+
+def on_starting(server):
+    """Cria/atualiza o esquema uma única vez, no processo mestre, antes dos workers"""
+    if os.getenv("DB_AUTO_CREATE", "true").lower() != "true":
+        return
+
+    from app import create_app, init_database
+    from database.custom_models import db
+
+    app = create_app(init_db=False, services=False)
+    init_database(app)
+
+    # Não deixa conexões abertas no mestre para serem herdadas pelos workers
+    with app.app_context():
+        db.engine.dispose()
+
+
+def post_fork(server, worker):
+    """Com preload: cria um pool de conexões próprio por worker e inicia as threads de fundo"""
+    if not preload_app:
+        return
+
+    from app import start_services
+    from database.custom_models import db
+
+    app = server.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    start_services(app)
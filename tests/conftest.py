@@ -0,0 +1,42 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Raiz do projeto no path (os módulos são importados como database.*)
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Banco em memória: os testes nunca usam o DATABASE_URI do .env
+os.environ["DATABASE_URI"] = "sqlite://"
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+@pytest.fixture
+def depth_fixture():
+    """Snapshot e diffs de profundidade gravados do BTCUSDT"""
+    with open(FIXTURES / "depth_btcusdt.json") as file:
+        return json.load(file)
+
+
+@pytest.fixture
+def app():
+    """Aplicação com banco SQLite em memória e sem as threads de fundo"""
+    from app import create_app
+    from database.custom_models import db
+
+    app = create_app(services=False)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
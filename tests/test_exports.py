@@ -0,0 +1,62 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from database.custom_models import db, User, Order, TradeReport, ArchivedOrder, ArchivedTradeReport
+
+# IDs 2-4 arquivados e 1, 5, 6 na tabela quente
+ARCHIVED_IDS = (2, 3, 4)
+
+
+@pytest.fixture
+def tiered(app):
+    with app.app_context():
+        db.session.add(User(id=1, login="alice", password="p", binance_api_key="k", binance_secret_key="s", saldo_inicio=100))
+        for order_id in range(1, 7):
+            archived = order_id in ARCHIVED_IDS
+            order_model, report_model = (ArchivedOrder, ArchivedTradeReport) if archived else (Order, TradeReport)
+            db.session.add(order_model(
+                id=order_id, user_id=1, symbol="BTCUSDT", side="BUY", types="LIMIT",
+                quantity=1, price=100, timeInForce="GTC", created_at=datetime(2025, 1, order_id),
+                binance_order_id=1000 + order_id, status="FILLED" if archived else "NEW",
+                executed_qty=1 if archived else 0,
+            ))
+            db.session.flush()
+            db.session.add(report_model(
+                id=order_id, order_id=order_id, profit_loss=order_id, report_date=datetime(2025, 1, order_id),
+            ))
+        db.session.commit()
+    return app
+
+
+@pytest.mark.parametrize("path", ["/api/export/orders", "/api/export/reports"])
+def test_export_spanning_tiers_is_in_id_order(tiered, client, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    ids = [json.loads(line)["id"] for line in response.get_data(as_text=True).splitlines()]
+    assert ids == [1, 2, 3, 4, 5, 6]
+
+
+def test_order_export_includes_binance_state(tiered, client):
+    rows = [json.loads(line) for line in client.get("/api/export/orders").get_data(as_text=True).splitlines()]
+    assert [row["binance_order_id"] for row in rows] == [1001, 1002, 1003, 1004, 1005, 1006]
+    assert [row["status"] for row in rows] == ["NEW", "FILLED", "FILLED", "FILLED", "NEW", "NEW"]
+    assert [float(row["executed_qty"]) for row in rows] == [0, 1, 1, 1, 0, 0]
+
+
+def test_csv_export_spanning_tiers_is_in_id_order(tiered, client):
+    response = client.get("/api/export/orders?format=csv")
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [int(row["id"]) for row in rows] == [1, 2, 3, 4, 5, 6]
+    assert [row["status"] for row in rows] == ["NEW", "FILLED", "FILLED", "FILLED", "NEW", "NEW"]
+    assert rows[1]["binance_order_id"] == "1002"
+
+
+def test_csv_export_without_rows_has_header(app, client):
+    response = client.get("/api/export/orders?format=csv")
+    assert response.get_data(as_text=True).splitlines() == [
+        "id,user_id,login,symbol,side,types,quantity,price,timeInForce,created_at,binance_order_id,status,executed_qty"
+    ]
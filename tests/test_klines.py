@@ -0,0 +1,27 @@
+import numpy as np
+
+from database.klines import ema, rsi, sma
+
+
+CLOSE = np.array([10.0, 11.0, 10.5, 12.0, 11.5, 13.0])
+
+
+def test_period_one_returns_the_series():
+    assert np.array_equal(ema(CLOSE, 1), CLOSE)
+    assert np.array_equal(sma(CLOSE, 1), CLOSE)
+
+
+def test_rsi_period_one_has_no_nan_after_first():
+    result = rsi(CLOSE, 1)
+    assert np.isnan(result[0])
+    # Com um único período o RSI é 100 nas altas e 0 nas quedas
+    assert result[1:].tolist() == [100.0, 0.0, 100.0, 0.0, 100.0]
+
+
+def test_ema_matches_recursive_definition():
+    period = 3
+    alpha = 2.0 / (period + 1)
+    expected = [CLOSE[:period].mean()]
+    for value in CLOSE[period:]:
+        expected.append(alpha * value + (1 - alpha) * expected[-1])
+    assert np.allclose(ema(CLOSE, period)[period - 1:], expected)
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+import websockets
+
+from database.market_stream import MarketStream
+
+
+class LocalStreamServer:
+    """Servidor websocket local: a primeira conexão envia as cotações e cai; as seguintes ficam abertas"""
+
+    def __init__(self):
+        self.paths = []
+        self._loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._main, daemon=True)
+
+    async def _handler(self, ws):
+        self.paths.append(getattr(ws, "request", ws).path)
+        if len(self.paths) == 1:
+            await ws.send(json.dumps({"stream": "btcusdt@bookTicker",
+                                      "data": {"u": 1, "s": "BTCUSDT", "b": "67000.10", "a": "67000.20"}}))
+            await ws.send(json.dumps({"stream": "btcusdt@miniTicker",
+                                      "data": {"e": "24hrMiniTicker", "s": "BTCUSDT", "c": "67000.15"}}))
+            return  # encerra a conexão: o cliente deve reconectar
+        await ws.send(json.dumps({"stream": "btcusdt@miniTicker",
+                                  "data": {"e": "24hrMiniTicker", "s": "BTCUSDT", "c": "67100.00"}}))
+        await ws.wait_closed()
+
+    async def _serve(self):
+        return await websockets.serve(self._handler, "127.0.0.1", 0)
+
+    def _main(self):
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(self._serve())
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started.set()
+        self._loop.run_forever()
+
+    def __enter__(self):
+        self._thread.start()
+        self._started.wait(5)
+        return self
+
+    def __exit__(self, *exc):
+        async def shutdown():
+            self._server.close()
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture
+def server():
+    with LocalStreamServer() as server:
+        yield server
+
+
+def test_quotes_and_reconnect_after_server_drop(server):
+    stream = MarketStream(["btcusdt"], base_url=f"ws://127.0.0.1:{server.port}", max_age=30)
+    stream.start()
+    try:
+        assert _wait_for(lambda: stream.last_price("BTCUSDT") == 67000.15)
+        quote = stream.quote("btcusdt")
+        assert (quote["bid"], quote["ask"]) == (67000.10, 67000.20)
+        assert server.paths[0] == "/stream?streams=btcusdt@bookTicker/btcusdt@miniTicker"
+
+        # Servidor derrubou a primeira conexão: reconecta após o backoff inicial (1 s)
+        assert _wait_for(lambda: stream.last_price("BTCUSDT") == 67100.00)
+        assert len(server.paths) == 2
+        assert stream.reconnects == 1
+        assert _wait_for(lambda: stream.connected)
+    finally:
+        stream.stop()
+    assert not stream.running
@@ -0,0 +1,208 @@
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+from database.market_data import InvalidSymbolError
+from database.order_book import OrderBook, OrderBookManager
+from database.rate_limit import RateLimitExceeded
+
+
+def _levels(book):
+    summary = book.summary(depth=10)
+    return summary["bids"], summary["asks"]
+
+
+# ---------- OrderBook: snapshot + replay dos diffs ----------
+
+def test_snapshot_replays_buffered_diffs(depth_fixture):
+    book = OrderBook("BTCUSDT")
+    for event in depth_fixture["diffs"]:
+        assert book.apply_diff(event) is False  # sem snapshot: fica no buffer
+
+    assert book.load_snapshot(depth_fixture["snapshot"]) is True
+
+    bids, asks = _levels(book)
+    # O diff 990-995 já estava contido no snapshot e não é aplicado
+    assert bids == [[67000.15, 0.4], [67000.10, 1.2], [66999.50, 2.0]]
+    assert asks == [[67000.30, 0.9], [67000.50, 1.2], [67001.00, 3.0]]
+    assert book.last_update_id == 1007
+    assert book.synced
+
+
+def test_live_diffs_match_buffered_replay(depth_fixture):
+    book = OrderBook("BTCUSDT")
+    book.load_snapshot(depth_fixture["snapshot"])
+    for event in depth_fixture["diffs"]:
+        assert book.apply_diff(event) is True
+
+    replayed = OrderBook("BTCUSDT")
+    for event in depth_fixture["diffs"]:
+        replayed.apply_diff(event)
+    replayed.load_snapshot(depth_fixture["snapshot"])
+
+    assert _levels(book) == _levels(replayed)
+    assert book.last_update_id == replayed.last_update_id == 1007
+
+
+# ---------- OrderBook: lacunas ----------
+
+def test_gap_in_stream_keeps_events_for_resync(depth_fixture):
+    book = OrderBook("BTCUSDT")
+    book.load_snapshot(depth_fixture["snapshot"])
+    for event in depth_fixture["diffs"]:
+        book.apply_diff(event)
+
+    first, second = depth_fixture["gap_diffs"]
+    assert book.apply_diff(first) is False  # 1008-1009 perdidos
+    assert not book.synced
+    assert book.apply_diff(second) is False
+
+    assert book.load_snapshot(depth_fixture["resync_snapshot"]) is True
+    bids, asks = _levels(book)
+    assert bids[0] == [67000.20, 0.3]
+    assert asks[0] == [67000.30, 0.5]
+    assert book.last_update_id == 1015
+
+
+def test_gap_inside_buffer_keeps_the_rest(depth_fixture):
+    book = OrderBook("BTCUSDT")
+    for event in depth_fixture["diffs"] + depth_fixture["gap_diffs"]:
+        book.apply_diff(event)
+
+    # Aplica até a lacuna e guarda os diffs seguintes para o próximo snapshot
+    assert book.load_snapshot(depth_fixture["snapshot"]) is False
+    assert book.last_update_id == 1007
+    assert not book.synced
+
+    assert book.load_snapshot(depth_fixture["resync_snapshot"]) is True
+    assert book.last_update_id == 1015
+
+
+def test_stale_snapshot_is_rejected(depth_fixture):
+    book = OrderBook("BTCUSDT")
+    for event in depth_fixture["gap_diffs"]:
+        book.apply_diff(event)
+
+    # Snapshot anterior ao primeiro diff do buffer: precisa de outro
+    assert book.load_snapshot(depth_fixture["snapshot"]) is False
+    assert book.load_snapshot(depth_fixture["resync_snapshot"]) is True
+    assert book.last_update_id == 1015
+
+
+# ---------- OrderBookManager: snapshots fora do loop do stream ----------
+
+class _RecordedManager(OrderBookManager):
+    """Devolve os snapshots gravados em ordem, liberados pelo teste"""
+
+    def __init__(self, snapshots):
+        super().__init__(base_url="http://binance.invalid")
+        self.snapshots = list(snapshots)
+        self.calls = 0
+        self.release = threading.Event()
+
+    def download_snapshot(self, symbol):
+        self.calls += 1
+        self.release.wait(5)
+        return self.snapshots.pop(0)
+
+
+def _wait_synced(book, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not book.synced and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return book.synced
+
+
+def test_handle_diff_does_not_block_and_fetches_once(depth_fixture):
+    manager = _RecordedManager([depth_fixture["snapshot"]])
+
+    start = time.monotonic()
+    for event in depth_fixture["diffs"]:
+        manager.handle_diff(event)
+    assert time.monotonic() - start < 1  # o download está preso em release
+
+    deadline = time.monotonic() + 5
+    while manager.calls == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    for event in depth_fixture["diffs"]:
+        manager.handle_diff(event)
+    assert manager.calls == 1  # um snapshot em andamento por símbolo
+    manager.release.set()
+
+    book = manager._book("BTCUSDT")
+    assert _wait_synced(book)
+    assert book.last_update_id == 1007
+
+
+def test_gap_triggers_resync_in_background(depth_fixture):
+    manager = _RecordedManager([depth_fixture["snapshot"], depth_fixture["resync_snapshot"]])
+    manager.release.set()
+
+    for event in depth_fixture["diffs"]:
+        manager.handle_diff(event)
+    book = manager._book("BTCUSDT")
+    assert _wait_synced(book)
+
+    for event in depth_fixture["gap_diffs"]:
+        manager.handle_diff(event)
+    deadline = time.monotonic() + 5
+    while book.last_update_id != 1015 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert book.synced
+    assert book.last_update_id == 1015
+    assert manager.calls == 2
+
+
+def test_get_without_stream_shares_one_download(depth_fixture):
+    manager = _RecordedManager([depth_fixture["snapshot"]])
+    books = []
+    threads = [threading.Thread(target=lambda: books.append(manager.get("btcusdt"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+
+    deadline = time.monotonic() + 5
+    while manager.calls == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    manager.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert manager.calls == 1
+    assert len(books) == 4 and all(book is books[0] for book in books)
+
+
+# ---------- OrderBookManager: erros do snapshot ----------
+
+class _StaticSession:
+    """Sessão que responde sempre com o mesmo status/corpo"""
+
+    def __init__(self, status, body, headers=None):
+        self.status, self.body, self.headers = status, body, headers or {}
+
+    def get(self, url, **kwargs):
+        response = requests.Response()
+        response.status_code = self.status
+        response._content = json.dumps(self.body).encode()
+        response.headers.update(self.headers)
+        response.url = url
+        return response
+
+
+@pytest.mark.parametrize("status, body, headers, error", [
+    (400, {"code": -1121, "msg": "Invalid symbol."}, {}, InvalidSymbolError),
+    (503, {"code": -1001, "msg": "Internal error"}, {}, requests.HTTPError),
+    (429, {"code": -1003, "msg": "Too many requests"}, {"Retry-After": "5"}, RateLimitExceeded),
+])
+def test_snapshot_errors_keep_no_book(status, body, headers, error):
+    manager = OrderBookManager(base_url=f"http://depth-{status}.invalid")
+    manager.session = _StaticSession(status, body, headers)
+
+    with pytest.raises(error):
+        manager.get("NOTASYMBOL")
+    assert manager._books == {}
+    assert manager._failed_at == {}
@@ -0,0 +1,81 @@
+import pytest
+
+from database import order_queue as order_queue_module
+from database.custom_models import db, Order, User
+from database.order_queue import DONE, PLACED, OrderQueue, _Journal
+
+ORDER = {"symbol": "BTCUSDT", "side": "BUY", "types": "LIMIT", "quantity": "0.001", "price": "45000",
+         "timeInForce": "GTC", "user_id": 1}
+
+
+@pytest.fixture
+def queue_app(app, monkeypatch):
+    with app.app_context():
+        db.session.add(User(id=1, login="alice", password="x", binance_api_key="k", binance_secret_key="s",
+                            saldo_inicio=1000))
+        db.session.commit()
+
+    sent = []
+
+    def send(client, order_data):
+        sent.append(order_data)
+        return {"orderId": 777, "status": "NEW", "executedQty": "0"}
+
+    monkeypatch.setattr(order_queue_module, "send_binance_order", send)
+    monkeypatch.setattr(order_queue_module.client_registry, "get", lambda *args: object())
+    monkeypatch.setattr(order_queue_module.time, "sleep", lambda seconds: None)
+    app.sent = sent
+    return app
+
+
+def _failing_apply_order(monkeypatch, failures):
+    """apply_order falha nas primeiras failures chamadas (banco indisponível)"""
+    calls = []
+    apply_order = order_queue_module.apply_order
+
+    def flaky(order, sign=1):
+        calls.append(order)
+        if len(calls) <= failures:
+            raise RuntimeError("database is locked")
+        return apply_order(order, sign)
+
+    monkeypatch.setattr(order_queue_module, "apply_order", flaky)
+
+
+def _run(queue, app, tracking_id):
+    with app.app_context():
+        queue._process(queue.status(tracking_id))
+    return queue.status(tracking_id)
+
+
+def test_db_failure_after_binance_accepts_is_retried(queue_app, monkeypatch):
+    _failing_apply_order(monkeypatch, failures=2)
+    queue = OrderQueue(workers=0)
+    job = _run(queue, queue_app, queue.submit(1, dict(ORDER)))
+
+    assert job["status"] == DONE
+    assert job["error"] is None
+    assert len(queue_app.sent) == 1
+    with queue_app.app_context():
+        assert Order.query.filter_by(binance_order_id=777).count() == 1
+
+
+def test_placed_job_is_recovered_without_resending(queue_app, monkeypatch, tmp_path):
+    _failing_apply_order(monkeypatch, failures=order_queue_module.ORDER_QUEUE_DB_RETRIES)
+    queue = OrderQueue(workers=0, lease=0)
+    queue._journal = _Journal(str(tmp_path / "jobs.db"), owner="worker-1")
+    tracking_id = queue.submit(1, dict(ORDER))
+
+    job = _run(queue, queue_app, tracking_id)
+    assert job["status"] == PLACED  # aceita pela Binance: não vira FAILED
+    assert job["binance_response"]["orderId"] == 777
+    assert "gravação local pendente" in job["error"]
+
+    # Lease vencido: a recuperação retoma o job e apenas grava o Order
+    queue._recover()
+    assert queue._journal.claim(tracking_id, PLACED)
+    job = _run(queue, queue_app, tracking_id)
+    assert job["status"] == DONE
+    assert len(queue_app.sent) == 1
+    with queue_app.app_context():
+        assert Order.query.filter_by(binance_order_id=777).count() == 1
@@ -0,0 +1,41 @@
+from decimal import Decimal
+
+import pytest
+
+from database.custom_models import db, Order, Position, User
+from database.positions import apply_order, rebuild_positions
+
+
+def _order(side, quantity, price):
+    return Order(user_id=1, symbol="BTCUSDT", side=side, types="LIMIT", quantity=Decimal(quantity),
+                 price=Decimal(price), timeInForce="GTC")
+
+
+@pytest.fixture
+def user(app):
+    with app.app_context():
+        db.session.add(User(id=1, login="alice", password="x", binance_api_key="k", binance_secret_key="s",
+                            saldo_inicio=1000))
+        db.session.commit()
+
+
+def _position():
+    position = Position.query.filter_by(user_id=1, symbol="BTCUSDT").one_or_none()
+    return position and (Decimal(str(position.quantity)), Decimal(str(position.notional)), position.orders_count)
+
+
+def test_apply_order_upserts_and_removes_position(app, user):
+    orders = [_order("BUY", "0.003", "45000"), _order("SELL", "0.001", "46000")]
+    with app.app_context():
+        for order in orders:
+            db.session.add(order)
+            apply_order(order)
+        db.session.commit()
+        assert _position() == (Decimal("0.002"), Decimal("89"), 2)
+        assert rebuild_positions() == 1
+        assert _position() == (Decimal("0.002"), Decimal("89"), 2)
+
+        for order in orders:
+            apply_order(order, -1)
+        db.session.commit()
+        assert _position() is None
@@ -0,0 +1,69 @@
+import re
+
+import pytest
+from sqlalchemy import event
+
+from database.custom_models import db, User, Order, TradeReport
+
+
+@pytest.fixture
+def seeded(app):
+    with app.app_context():
+        db.session.add(User(id=1, login="alice", password="p", binance_api_key="k", binance_secret_key="s", saldo_inicio=100))
+        for order_id, symbol in enumerate(["BTCUSDT", "ETHUSDT", "BTCUSDT"], start=1):
+            db.session.add(Order(
+                id=order_id, user_id=1, symbol=symbol, side="BUY", types="LIMIT",
+                quantity=1, price=100, timeInForce="GTC",
+            ))
+            db.session.add(TradeReport(order_id=order_id, profit_loss=order_id))
+        db.session.commit()
+    return app
+
+
+def _plans(app, client, url, table):
+    """Executa a rota e retorna o EXPLAIN QUERY PLAN de cada SELECT que lê table"""
+    statements = []
+    reads_table = re.compile(rf"\bFROM {table}\b")
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and reads_table.search(statement):
+            statements.append((statement, parameters))
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", capture)
+        try:
+            response = client.get(url)
+            response.get_data()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", capture)
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+        plans = []
+        with db.engine.connect() as connection:
+            for statement, parameters in statements:
+                rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+                plans.append("\n".join(row[-1] for row in rows))
+    assert plans, f"nenhuma consulta em {table} para {url}"
+    return plans
+
+
+@pytest.mark.parametrize("url, index", [
+    # Listagem paginada das ordens do usuário
+    ("/api/users/1/orders", "ix_orders_user_id_id"),
+    # Ordens do usuário filtradas por símbolo
+    ("/api/users/1/orders?symbol=BTCUSDT", "ix_orders_user_id_symbol"),
+    # Listagem geral filtrada por símbolo
+    ("/api/orders?symbol=BTCUSDT", "ix_orders_symbol_id"),
+])
+def test_order_listing_uses_index(seeded, client, url, index):
+    for plan in _plans(seeded, client, url, "orders"):
+        assert f"USING INDEX {index}" in plan or f"USING COVERING INDEX {index}" in plan, plan
+
+
+@pytest.mark.parametrize("url", ["/api/users/1/pnl", "/api/users/1/reports"])
+def test_report_queries_use_indexes(seeded, client, url):
+    for plan in _plans(seeded, client, url, "trade_reports"):
+        # Ordens do usuário pelo índice de user_id e relatórios pelo índice de order_id
+        assert "SEARCH orders USING COVERING INDEX ix_orders_user_id_" in plan, plan
+        assert "SEARCH trade_reports USING INDEX ix_trade_reports_order_id_" in plan, plan
+        assert "SCAN orders" not in plan and "SCAN trade_reports" not in plan, plan
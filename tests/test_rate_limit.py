@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+
+import pytest
+import requests
+from binance.exceptions import BinanceAPIException
+from requests.adapters import BaseAdapter
+
+from database import rate_limit
+from database.rate_limit import RateLimitExceeded, governed_call, governor_for
+
+
+class StubAdapter(BaseAdapter):
+    """Responde a cada requisição com o status/headers pedidos na própria URL (?status=...&h=Nome:valor)"""
+
+    def send(self, request, **kwargs):
+        query = requests.utils.urlparse(request.url).query
+        params = dict(part.split("=", 1) for part in query.split("&") if part)
+        response = requests.Response()
+        response.status_code = int(params.pop("status", 200))
+        response.headers.update(dict(header.split(":", 1) for header in params.pop("h", "").split(",") if header))
+        response._content = json.dumps({} if response.status_code < 300 else {"code": -1003, "msg": "limit"}).encode()
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+class StubClient:
+    """Cliente com a mesma forma do python-binance: sessão compartilhada e client.response"""
+
+    def __init__(self, host):
+        self.API_URL = f"https://{host}/api"
+        self.session = requests.Session()
+        self.session.mount("https://", StubAdapter())
+        self.response = None
+
+    def request(self, status=200, after=None, **headers):
+        header_list = ",".join(f"{name}:{value}" for name, value in headers.items())
+        self.response = self.session.get(f"{self.API_URL}/v3/order?status={status}&h={header_list}")
+        if after is not None:
+            after()
+        if not 200 <= self.response.status_code < 300:
+            raise BinanceAPIException(self.response, self.response.status_code, self.response.text)
+        return self.response.json()
+
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_ENABLED", True)
+
+
+def test_headers_sync_weight_and_order_buckets(request):
+    client = StubClient(f"{request.node.name}.test")
+    governed_call(client, lambda: client.request(**{
+        "X-MBX-USED-WEIGHT-1M": "5000", "X-MBX-ORDER-COUNT-10S": "80",
+    }), endpoint="/api/v3/order", account=1, orders=1)
+
+    governor = governor_for(client.API_URL)
+    assert governor.weight.tokens == pytest.approx(governor.weight.capacity - 5000, abs=1)
+    assert governor._orders[1].tokens == pytest.approx(governor._orders[1].capacity - 80, abs=0.1)
+
+
+@pytest.mark.parametrize("status", [429, 418])
+def test_retry_after_blocks_the_host(request, status):
+    client = StubClient(f"{request.node.name}.test".replace("[", "-").replace("]", ""))
+    with pytest.raises(BinanceAPIException):
+        governed_call(client, lambda: client.request(status=status, **{"Retry-After": "7"}), endpoint="/api/v3/order")
+
+    governor = governor_for(client.API_URL)
+    assert governor.blocked_until - time.monotonic() == pytest.approx(7, abs=0.5)
+
+    calls = []
+    with pytest.raises(RateLimitExceeded) as error:
+        governed_call(client, lambda: calls.append(1), endpoint="/api/v3/order")
+    assert error.value.reason == "banned"
+    assert calls == []
+
+
+def test_headers_come_from_the_calling_thread(request, monkeypatch):
+    client = StubClient(f"{request.node.name}.test")
+    observed = {}
+
+    class Recorder:
+        def acquire(self, *args):
+            pass
+
+        def observe(self, status_code, headers, account=None):
+            observed[account] = headers["X-MBX-USED-WEIGHT-1M"]
+
+    monkeypatch.setattr(rate_limit, "governor_for", lambda url: Recorder())
+
+    # As duas respostas chegam antes de qualquer chamada terminar: client.response
+    # fica com a da última thread
+    barrier = threading.Barrier(2)
+
+    def run(account):
+        governed_call(client, lambda: client.request(after=barrier.wait, **{"X-MBX-USED-WEIGHT-1M": str(account)}),
+                      endpoint="/api/v3/order", account=account)
+
+    threads = [threading.Thread(target=run, args=(account,)) for account in (10, 20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert observed == {10: "10", 20: "20"}
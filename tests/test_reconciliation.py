@@ -0,0 +1,104 @@
+import time
+from decimal import Decimal
+
+import pytest
+
+from database import reconciliation
+from database.custom_models import db, Order, ReconcileCursor, TradeReport, User
+from database.reconciliation import Reconciler
+
+
+class FakeBinance:
+    """Cliente falso com as chamadas usadas pela reconciliação"""
+
+    API_URL = "https://fake.binance.local/api"
+
+    def __init__(self):
+        self.open_orders = []
+        self.orders = {}
+        self.trades = []
+        self.trade_calls = []
+
+    def get_open_orders(self, symbol):
+        return [order for order in self.open_orders if order["symbol"] == symbol]
+
+    def get_order(self, symbol, orderId):
+        return self.orders[orderId]
+
+    def get_my_trades(self, symbol, fromId, limit):
+        self.trade_calls.append(fromId)
+        matching = [trade for trade in self.trades if trade["symbol"] == symbol and trade["id"] >= fromId]
+        return matching[:limit]
+
+    def add_trade(self, trade_id, order_id, age=0.0):
+        self.trades.append({
+            "id": trade_id, "orderId": order_id, "symbol": "BTCUSDT", "qty": "0.001", "price": "45000",
+            "commission": "0.0000001", "commissionAsset": "BTC", "time": int((time.time() - age) * 1000),
+        })
+
+
+@pytest.fixture
+def fake(app):
+    with app.app_context():
+        db.session.add(User(id=1, login="alice", password="x", binance_api_key="k", binance_secret_key="s",
+                            saldo_inicio=1000))
+        db.session.add(Order(id=1, user_id=1, symbol="BTCUSDT", side="BUY", types="LIMIT", quantity=Decimal("0.003"),
+                             price=Decimal("45000"), timeInForce="GTC", binance_order_id=100, status="NEW",
+                             executed_qty=Decimal(0)))
+        db.session.commit()
+    return FakeBinance()
+
+
+def _cursor():
+    return db.session.query(ReconcileCursor.last_trade_id).filter_by(user_id=1, symbol="BTCUSDT").scalar()
+
+
+def test_open_order_becomes_filled(app, fake):
+    fake.orders[100] = {"orderId": 100, "symbol": "BTCUSDT", "status": "FILLED", "executedQty": "0.003"}
+    for trade_id in (1, 2, 3):
+        fake.add_trade(trade_id, 100)
+
+    with app.app_context():
+        assert Reconciler(client_factory=lambda user_id: fake).sweep() == (1, 3)
+        order = db.session.get(Order, 1)
+        assert order.status == "FILLED"
+        assert Decimal(str(order.executed_qty)) == Decimal("0.003")
+        assert TradeReport.query.count() == 3
+        assert _cursor() == 3
+
+
+def test_trades_paged_past_page_size(app, fake, monkeypatch):
+    monkeypatch.setattr(reconciliation, "TRADES_PAGE_SIZE", 2)
+    fake.open_orders.append({"orderId": 100, "symbol": "BTCUSDT", "status": "PARTIALLY_FILLED", "executedQty": "0.005"})
+    for trade_id in range(1, 6):
+        fake.add_trade(trade_id, 100)
+
+    with app.app_context():
+        Reconciler(client_factory=lambda user_id: fake).sweep()
+        assert fake.trade_calls == [1, 3, 5]
+        assert TradeReport.query.count() == 5
+        assert _cursor() == 5
+
+
+def test_unmatched_trade_holds_cursor_until_order_exists(app, fake):
+    fake.open_orders.append({"orderId": 100, "symbol": "BTCUSDT", "status": "NEW", "executedQty": "0"})
+    fake.add_trade(1, 999, age=3600)  # ordem criada fora da API: ignorada
+    fake.add_trade(2, 100)
+    fake.add_trade(3, 200)  # ordem aceita pela Binance, INSERT local ainda pendente
+    fake.add_trade(4, 100)
+
+    with app.app_context():
+        reconciler = Reconciler(client_factory=lambda user_id: fake)
+        reconciler.sweep()
+        assert TradeReport.query.count() == 2
+        assert _cursor() == 2
+
+        db.session.add(Order(id=2, user_id=1, symbol="BTCUSDT", side="SELL", types="LIMIT",
+                             quantity=Decimal("0.001"), price=Decimal("46000"), timeInForce="GTC",
+                             binance_order_id=200, status="FILLED", executed_qty=Decimal("0.001")))
+        db.session.commit()
+
+        reconciler.sweep()
+        imported = sorted(db.session.query(TradeReport.binance_trade_id).all())
+        assert imported == [(2,), (3,), (4,)]
+        assert _cursor() == 4